@@ -0,0 +1,170 @@
+import datetime
+
+import numpy as np
+
+__all__ = [
+    "day",
+    "intraday_payload",
+    "hrv_payload",
+    "spo2_payload",
+    "br_payload",
+    "sleep_payload",
+]
+
+day = datetime.datetime(2023, 3, 5)
+""":class:`datetime.datetime`: Day for which the payloads are generated."""
+
+
+def _clock(seconds):
+    return f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+def intraday_payload(name="heart", step=1, seed=0):
+    """Generate a response of an intraday activity request in the format returned by
+    the API.
+
+    Args:
+        name (str, optional): Name of the activity. Defaults to `"heart"`.
+        step (int, optional): Resolution in seconds. Defaults to one second.
+        seed (int, optional): Random seed. Defaults to zero.
+
+    Returns:
+        dict: Response.
+    """
+    state = np.random.RandomState(seed)
+    seconds = range(0, 24 * 3600, step)
+    values = state.randint(45, 180, len(seconds))
+    return {
+        f"activities-{name}-intraday": {
+            "dataset": [
+                {"time": _clock(s), "value": int(v)} for s, v in zip(seconds, values)
+            ],
+            "datasetInterval": step,
+            "datasetType": "second" if step == 1 else "minute",
+        }
+    }
+
+
+def hrv_payload(minutes=420, seed=0):
+    """Generate a response of a heart rate variability request.
+
+    Args:
+        minutes (int, optional): Number of minutes of sleep. Defaults to 420.
+        seed (int, optional): Random seed. Defaults to zero.
+
+    Returns:
+        dict: Response.
+    """
+    state = np.random.RandomState(seed)
+    return {
+        "hrv": [
+            {
+                "dateTime": day.strftime("%Y-%m-%d"),
+                "minutes": [
+                    {
+                        "minute": day.strftime("%Y-%m-%dT") + _clock(60 * m) + ".000",
+                        "value": {
+                            "rmssd": float(state.uniform(20, 80)),
+                            "coverage": 0.95,
+                            "hf": float(state.uniform(100, 1000)),
+                            "lf": float(state.uniform(100, 1000)),
+                        },
+                    }
+                    for m in range(minutes)
+                ],
+            }
+        ]
+    }
+
+
+def spo2_payload(minutes=420, seed=0):
+    """Generate a response of an SpO2 request.
+
+    Args:
+        minutes (int, optional): Number of minutes of sleep. Defaults to 420.
+        seed (int, optional): Random seed. Defaults to zero.
+
+    Returns:
+        dict: Response.
+    """
+    state = np.random.RandomState(seed)
+    return {
+        "dateTime": day.strftime("%Y-%m-%d"),
+        "minutes": [
+            {
+                "minute": day.strftime("%Y-%m-%dT") + _clock(60 * m),
+                "value": float(state.uniform(90, 100)),
+            }
+            for m in range(minutes)
+        ],
+    }
+
+
+def br_payload(days=30, seed=0):
+    """Generate a response of a breathing rate request for a range of days.
+
+    Args:
+        days (int, optional): Number of days. Defaults to 30.
+        seed (int, optional): Random seed. Defaults to zero.
+
+    Returns:
+        dict: Response.
+    """
+    state = np.random.RandomState(seed)
+    keys = [
+        "fullSleepSummary",
+        "deepSleepSummary",
+        "remSleepSummary",
+        "lightSleepSummary",
+    ]
+    return {
+        "br": [
+            {
+                "dateTime": (day + datetime.timedelta(days=d)).strftime("%Y-%m-%d"),
+                "value": {
+                    k: {"breathingRate": float(state.uniform(12, 18))} for k in keys
+                },
+            }
+            for d in range(days)
+        ]
+    }
+
+
+def sleep_payload(stages=40, seed=0):
+    """Generate a response of a sleep request for one day.
+
+    Args:
+        stages (int, optional): Number of sleep stages. Defaults to 40.
+        seed (int, optional): Random seed. Defaults to zero.
+
+    Returns:
+        dict: Response.
+    """
+    state = np.random.RandomState(seed)
+    levels = ["wake", "light", "deep", "rem"]
+    durations = state.randint(1, 30, stages) * 30
+    starts = 3600 + np.concatenate(([0], np.cumsum(durations)[:-1]))
+    date = day.strftime("%Y-%m-%dT")
+    return {
+        "sleep": [
+            {
+                "dateOfSleep": day.strftime("%Y-%m-%d"),
+                "isMainSleep": True,
+                "startTime": date + _clock(3600) + ".000",
+                "endTime": date + _clock(int(starts[-1] + durations[-1])) + ".000",
+                "levels": {
+                    "data": [
+                        {
+                            "dateTime": date + _clock(int(s)) + ".000",
+                            "level": levels[state.randint(len(levels))],
+                            "seconds": int(d),
+                        }
+                        for s, d in zip(starts, durations)
+                    ]
+                },
+            }
+        ],
+        "summary": {
+            "stages": {level: 60 for level in ["deep", "rem", "light", "wake"]}
+        },
+    }
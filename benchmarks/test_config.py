@@ -0,0 +1,31 @@
+import pytest
+
+from fitbit.config import Config
+
+pytest.importorskip("pytest_benchmark")
+
+
+@pytest.fixture()
+def config(tmp_path):
+    path = tmp_path / "config.toml"
+    path.write_text('[session]\ntoken = "token"\n')
+    return Config(path=str(path))
+
+
+def test_get(benchmark, config):
+    assert benchmark(config.get, "session", "token") == "token"
+
+
+def test_set(benchmark, config):
+    # Writes are batched, so this does not touch the disk.
+    benchmark(config.set, "session", "token", "new")
+    config.flush()
+
+
+def _set_and_flush(config):
+    config.set("session", "token", "new")
+    config.flush()
+
+
+def test_set_and_flush(benchmark, config):
+    benchmark(_set_and_flush, config)
@@ -0,0 +1,22 @@
+import pytest
+
+from fitbit import cache
+from fitbit.api import hr
+from fitbit.replay import save_fixture
+
+from .payloads import day, intraday_payload
+
+pytest.importorskip("pytest_benchmark")
+
+
+def test_hr_1sec(benchmark, replay_server):
+    # Fetch, decode and parse a full day through a local server which replays the
+    # response.
+    save_fixture(
+        replay_server.directory,
+        "GET",
+        "/1/user/-/activities/heart/date/2023-03-05/1d/1sec.json",
+        intraday_payload("heart", step=1),
+    )
+    df = benchmark.pedantic(hr, args=("token", day), setup=cache.clear, rounds=10)
+    assert len(df) == 24 * 3600
@@ -0,0 +1,15 @@
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+
+def test_import(benchmark):
+    benchmark.pedantic(
+        subprocess.run,
+        args=([sys.executable, "-c", "import fitbit"],),
+        kwargs={"check": True},
+        rounds=10,
+    )
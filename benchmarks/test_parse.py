@@ -0,0 +1,81 @@
+import json
+
+import pytest
+
+from fitbit.api import (
+    _loads,
+    _parse_br,
+    _parse_hrv,
+    _parse_intraday,
+    _parse_intraday_content,
+    _parse_sleep,
+    _parse_spo2,
+)
+
+from .payloads import (
+    br_payload,
+    day,
+    hrv_payload,
+    intraday_payload,
+    sleep_payload,
+    spo2_payload,
+)
+
+pytest.importorskip("pytest_benchmark")
+
+
+def test_hr_1sec(benchmark):
+    res = intraday_payload("heart", step=1)
+    df = benchmark(_parse_intraday, res, "activities-heart-intraday", "hr", day)
+    assert len(df) == 24 * 3600
+
+
+def _content(res):
+    return json.dumps(res, separators=(",", ":")).encode()
+
+
+def _decode_and_parse(content, key, column_name, day):
+    return _parse_intraday(_loads(content), key, column_name, day)
+
+
+def test_hr_1sec_decode(benchmark):
+    content = _content(intraday_payload("heart", step=1))
+    key = "activities-heart-intraday"
+    df = benchmark(_decode_and_parse, content, key, "hr", day)
+    assert len(df) == 24 * 3600
+
+
+def test_hr_1sec_content(benchmark):
+    content = _content(intraday_payload("heart", step=1))
+    key = "activities-heart-intraday"
+    df = benchmark(_parse_intraday_content, content, key, "hr", day)
+    assert len(df) == 24 * 3600
+
+
+def test_steps_1min(benchmark):
+    res = intraday_payload("steps", step=60)
+    df = benchmark(_parse_intraday, res, "activities-steps-intraday", "steps", day)
+    assert len(df) == 24 * 60
+
+
+def test_hrv(benchmark):
+    df = benchmark(_parse_hrv, hrv_payload())
+    assert len(df) == 420
+
+
+def test_spo2(benchmark):
+    df = benchmark(_parse_spo2, spo2_payload())
+    assert len(df) == 420
+
+
+def test_br(benchmark):
+    df = benchmark(_parse_br, br_payload())
+    assert len(df) == 30
+
+
+def test_sleep(benchmark):
+    res = sleep_payload()
+    summary, series = benchmark(
+        _parse_sleep, day, res["sleep"], res["summary"]["stages"]
+    )
+    assert len(series) == 40
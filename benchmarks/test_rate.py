@@ -0,0 +1,25 @@
+import pytest
+
+from fitbit.rate import RateLimiter
+
+pytest.importorskip("pytest_benchmark")
+
+
+def _acquire(limiter):
+    with limiter:
+        pass
+
+
+def test_acquire(benchmark, tmp_path):
+    # The bucket never runs out, so this measures only the overhead of the limiter.
+    limiter = RateLimiter(capacity=10**9, path=str(tmp_path / "rate_limit.json"))
+    benchmark(_acquire, limiter)
+
+
+def test_update(benchmark, tmp_path):
+    limiter = RateLimiter(path=str(tmp_path / "rate_limit.json"))
+    headers = {
+        "Fitbit-Rate-Limit-Remaining": "100",
+        "Fitbit-Rate-Limit-Reset": "1800",
+    }
+    benchmark(limiter.update, headers)
@@ -0,0 +1,56 @@
+import datetime
+
+import pandas as pd
+import pytest
+
+from fitbit.api import _parse_intraday
+from fitbit.store import Store
+
+from .payloads import day, intraday_payload
+
+pytest.importorskip("pytest_benchmark")
+pytest.importorskip("pyarrow")
+
+days = [day + datetime.timedelta(days=d) for d in range(30)]
+
+
+@pytest.fixture()
+def csvs(tmp_path):
+    # Legacy CSVs of a month, like the ones imported by `scripts/scrape_collate.py`.
+    for i, d in enumerate(days):
+        df = _parse_intraday(
+            intraday_payload("steps", step=60, seed=i),
+            "activities-steps-intraday",
+            "steps",
+            d,
+        )
+        df.to_csv(tmp_path / f"{d:%Y-%m-%d}.csv")
+    return tmp_path
+
+
+def _collate(csvs, store):
+    for d in days:
+        df = pd.read_csv(csvs / f"{d:%Y-%m-%d}.csv", parse_dates=["date"])
+        store.write("steps", d, df.set_index("date"))
+
+
+def test_collate(benchmark, csvs):
+    store = Store(csvs / "store")
+    benchmark(_collate, csvs, store)
+
+
+def test_load(benchmark, csvs):
+    store = Store(csvs / "store")
+    _collate(csvs, store)
+    end = days[-1] + datetime.timedelta(days=1)
+    df = benchmark(store.load, "steps", days[0], end)
+    assert len(df) == 30 * 24 * 60
+
+
+def test_load_hourly(benchmark, csvs):
+    store = Store(csvs / "store")
+    _collate(csvs, store)
+    end = days[-1] + datetime.timedelta(days=1)
+    # This is computed from the hourly rollups rather than from the data.
+    df = benchmark(store.load, "steps", days[0], end, resample="1h", how="sum")
+    assert len(df) == 30 * 24
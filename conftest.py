@@ -0,0 +1,54 @@
+import pytest
+
+from fitbit import cache
+from fitbit.replay import replay, save_fixture
+
+
+@pytest.fixture(autouse=True)
+def _paths(tmp_path, monkeypatch):
+    """Keep the configuration, the SSL certificate and the state of the rate limiter
+    of every test in `tmp_path`, so tests never touch the files of a user."""
+    monkeypatch.setenv("FITBIT_CONFIG", str(tmp_path / "config.toml"))
+    monkeypatch.setenv("FITBIT_KEY", str(tmp_path / "server.pem"))
+
+
+@pytest.fixture()
+def replay_server(tmp_path):
+    """Direct all requests to a local server which replays fixtures.
+
+    Save fixtures with `save_fixture(replay_server.directory, ...)`. They can be
+    saved at any time, because the server reads them when they are requested. The
+    cache is cleared before and after.
+
+    Yields:
+        :class:`fitbit.replay.ReplayServer`: Server.
+    """
+    cache.clear()
+    with replay(tmp_path / "fixtures") as server:
+        yield server
+    cache.clear()
+
+
+@pytest.fixture()
+def steps_server(replay_server):
+    """Replay the intraday steps of 2023-03-05, which are 0 and 12 for the first two
+    minutes.
+
+    Yields:
+        :class:`fitbit.replay.ReplayServer`: Server.
+    """
+    save_fixture(
+        replay_server.directory,
+        "GET",
+        "/1/user/-/activities/steps/date/2023-03-05/1d/1min.json",
+        {
+            "activities-steps-intraday": {
+                "dataset": [
+                    {"time": "00:00:00", "value": 0},
+                    {"time": "00:01:00", "value": 12},
+                ]
+            }
+        },
+        headers={"Fitbit-Rate-Limit-Remaining": "149"},
+    )
+    yield replay_server
@@ -1,27 +1,94 @@
+import importlib
 import os
 from pathlib import Path
 
-# Get the path to the configuration file.
-_path_config = str(Path(__file__).parent.parent.resolve() / "config.toml")
-if not os.path.exists(_path_config):
-    raise FileNotFoundError(
-        "Cannot find your `config.toml`. "
-        "Please carefully follow the instructions from the repository."
-    )
+# Importing the package should be cheap: it does not touch the disk and does not
+# import heavy dependencies. Everything is loaded when first needed.
 
-# Get the path to the SSL certificate.
-_path_key = str(Path(__file__).parent.parent.resolve() / "server.pem")
-if not os.path.exists(_path_key):
-    raise FileNotFoundError(
-        "Cannot find your `server.pem`. "
-        "Please carefully follow the instructions from the repository."
-    )
+_root = Path(__file__).parent.parent.resolve()
 
-from plum import Dispatcher
 
-_dispatch = Dispatcher()
+def _path_config():
+    """Get the path to the configuration file. Set the environment variable
+    `FITBIT_CONFIG` to use a different path.
+
+    Returns:
+        str: Path to the configuration file.
+    """
+    return os.environ.get("FITBIT_CONFIG", str(_root / "config.toml"))
+
+
+def _path_key():
+    """Get the path to the SSL certificate. Set the environment variable
+    `FITBIT_KEY` to use a different path.
+
+    Returns:
+        str: Path to the SSL certificate.
+    """
+    path = os.environ.get("FITBIT_KEY", str(_root / "server.pem"))
+    if not os.path.exists(path):
+        raise FileNotFoundError(
+            "Cannot find your `server.pem`. "
+            "Please carefully follow the instructions from the repository."
+        )
+    return path
+
 
 from .config import *
+from .metrics import *
+from .endpoints import *
+from .cache import *
+from .raw import *
+from .store import *
+from .manifest import *
 from .rate import *
+from .transport import *
 from .auth import *
-from .api import *
+from .users import *
+from .scheduler import *
+from .subscriptions import *
+
+_lazy = {
+    name: "api"
+    for name in [
+        "cal",
+        "dist",
+        "elev",
+        "floors",
+        "steps",
+        "hr",
+        "hrv",
+        "spo2",
+        "br",
+        "sleep_summary",
+        "sleep_series",
+        "daily_calls",
+        "hrv_range",
+        "spo2_range",
+        "br_range",
+        "sleep_range",
+        "fetch_days",
+        "iter_days",
+    ]
+}
+_lazy["CompactSeries"] = "compact"
+_lazy["aligned"] = "align"
+"""dict[str, str]: Names which are loaded on first use and the submodule which
+defines them. These submodules depend on NumPy and pandas."""
+
+
+def __getattr__(name):
+    if name == "_dispatch":
+        from plum import Dispatcher
+
+        globals()["_dispatch"] = Dispatcher()
+        return globals()["_dispatch"]
+    if name in _lazy:
+        module = importlib.import_module("." + _lazy[name], __name__)
+        globals()[name] = getattr(module, name)
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_lazy))
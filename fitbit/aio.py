@@ -0,0 +1,309 @@
+"""Asynchronous variants of the calls in :mod:`fitbit.api`.
+
+All calls are methods of a :class:`.Client`, which keeps one pool of connections::
+
+    async with Client() as client:
+        df = await client.hr(token, day)
+
+The calls go through the same rate limiter, cache and store of raw responses as
+the calls in :mod:`fitbit.api` and return the same data frames. This module
+requires `aiohttp`.
+"""
+
+import asyncio
+import functools
+import time
+import warnings
+
+import aiohttp
+import pandas as pd
+
+from . import api
+from .cache import cache
+from .endpoints import endpoints
+from .metrics import metrics
+from .rate import _retry_after
+from .raw import raw_store
+from .transport import transport
+
+__all__ = ["Client"]
+
+
+class Client:
+    """Asynchronous client for the API.
+
+    Args:
+        base_url (str, optional): Base URL of the API. Defaults to the base URL of
+            :data:`fitbit.transport.transport`.
+        timeout (float, optional): Total timeout of a request in seconds. Defaults to
+            60 seconds.
+        pool_size (int, optional): Maximum number of simultaneous connections.
+            Defaults to 10.
+    """
+
+    def __init__(self, base_url=None, timeout=60, pool_size=10):
+        self.base_url = transport.base_url if base_url is None else base_url
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self._session = None
+        # Requests which are in flight, so simultaneous calls for the same data
+        # perform one request.
+        self._in_flight = {}
+
+    @property
+    def session(self):
+        """:class:`aiohttp.ClientSession`: Session. It is created when first used."""
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={"Accept-Encoding": "gzip, deflate"},
+            )
+        return self._session
+
+    async def close(self):
+        """Close all connections."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def _fetch(
+        self, token, url, day, version=1, end=None, max_retries=3, since=None
+    ):
+        """Asynchronous variant of :func:`fitbit.api._fetch`."""
+        content = await self._fetch_raw(
+            token, url, day, version, end, max_retries, since
+        )
+        with metrics.timer("decode_seconds", endpoint=api._resource(url)):
+            return api._loads(content)
+
+    async def _fetch_raw(
+        self, token, url, day, version=1, end=None, max_retries=3, since=None
+    ):
+        """Asynchronous variant of :func:`fitbit.api._fetch_raw`."""
+        # Getting the token may refresh it, which blocks.
+        token, limiter, user_id = await _in_thread(api._credentials, token)
+        path = api._path(url, day, version, end, user_id)
+        key = (path, since)
+        if key not in self._in_flight:
+            task = asyncio.ensure_future(
+                self._fetch_content(
+                    token,
+                    limiter,
+                    path,
+                    day if end is None else end,
+                    max_retries,
+                    api._resource(url),
+                    since,
+                )
+            )
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        # Every caller waits on a shield, so a caller which is cancelled does not
+        # cancel the request for the other callers.
+        return await asyncio.shield(self._in_flight[key])
+
+    async def _fetch_content(
+        self, token, limiter, path, day, max_retries, resource, since
+    ):
+        # The cache and the store of raw responses access files, so they are used
+        # from a thread to not block the event loop.
+        content, source = await _in_thread(_load, path, since)
+        if content is None:
+            source = "api"
+            for _ in range(max_retries + 1):
+                await _wait_for_rate_limiter(limiter)
+                start = time.perf_counter()
+                async with self.session.get(
+                    self.base_url + path,
+                    headers={
+                        "Accept": "application/json",
+                        "Authorization": f"Bearer {token}",
+                    },
+                ) as res:
+                    content = await res.read()
+                api._observe_request(resource, res.status, start, len(content))
+                await _in_thread(limiter.update, res.headers)
+                if res.status != 429:
+                    break
+                # We exceeded the rate limit. Wait until the quota resets and try again.
+                await _in_thread(limiter.backoff, _retry_after(res.headers))
+            if res.status >= 400:
+                print("Full response:")
+                print(content.decode(errors="replace"))
+                res.raise_for_status()
+            await _in_thread(_save, path, day, content)
+        metrics.increment("responses_total", endpoint=resource, source=source)
+        return content
+
+    async def _range(self, parse, token, endpoint, start, end, since=None):
+        responses = await asyncio.gather(
+            *(
+                self._fetch(
+                    token,
+                    endpoint.range_url,
+                    first,
+                    endpoint.version,
+                    last,
+                    since=since,
+                )
+                for first, last in api._windows(start, end, endpoint.max_days)
+            )
+        )
+        with metrics.timer("build_seconds", endpoint=api._resource(endpoint.url)):
+            return pd.concat([parse(res) for res in responses])
+
+    async def sleep(self, token, day, since=None):
+        """Asynchronous variant of :func:`fitbit.api.sleep`."""
+        endpoint = endpoints["sleep_summary"]
+        res = await self._fetch(token, endpoint.url, day, endpoint.version, since=since)
+        with metrics.timer("build_seconds", endpoint=api._resource(endpoint.url)):
+            return api._parse_sleep(day, res["sleep"], res["summary"]["stages"])
+
+    async def sleep_range(self, token, start, end, since=None):
+        """Asynchronous variant of :func:`fitbit.api.sleep_range`."""
+        endpoint = endpoints["sleep_summary"]
+        responses = await asyncio.gather(
+            *(
+                self._fetch(
+                    token,
+                    endpoint.range_url,
+                    first,
+                    endpoint.version,
+                    last,
+                    since=since,
+                )
+                for first, last in api._windows(start, end, endpoint.max_days)
+            )
+        )
+        with metrics.timer("build_seconds", endpoint=api._resource(endpoint.url)):
+            return api._parse_sleep_range(responses)
+
+    async def sleep_summary(self, token, day, since=None):
+        """Asynchronous variant of :func:`fitbit.api.sleep_summary`."""
+        return (await self.sleep(token, day, since))[0]
+
+    async def sleep_series(self, token, day, since=None):
+        """Asynchronous variant of :func:`fitbit.api.sleep_series`."""
+        return (await self.sleep(token, day, since))[1]
+
+
+def _intraday_call(endpoint):
+    (column,) = endpoint.columns
+
+    async def call(self, token, day, compact=False, since=None):
+        if endpoint.warning:
+            warnings.warn(endpoint.warning, stacklevel=2)
+        content = await self._fetch_raw(
+            token, endpoint.url, day, endpoint.version, since=since
+        )
+        resource = api._resource(endpoint.url)
+        with metrics.timer("decode_seconds", endpoint=resource):
+            seconds, values = api._decode_intraday(content, endpoint.response)
+        with metrics.timer("build_seconds", endpoint=resource):
+            return api._intraday(seconds, values, column, day, compact)
+
+    return call
+
+
+def _day_call(endpoint, parse):
+    async def call(self, token, day, since=None):
+        res = await self._fetch(token, endpoint.url, day, endpoint.version, since=since)
+        with metrics.timer("build_seconds", endpoint=api._resource(endpoint.url)):
+            return parse(res)
+
+    return call
+
+
+def _range_call(endpoint, parse):
+    async def call(self, token, start, end, since=None):
+        return await self._range(parse, token, endpoint, start, end, since)
+
+    return call
+
+
+def _add_call(name, call):
+    call.__name__ = name
+    call.__qualname__ = "Client." + name
+    call.__doc__ = f"""Asynchronous variant of :func:`fitbit.api.{name}`."""
+    setattr(Client, name, call)
+
+
+# Generate the calls of the endpoints, like :mod:`fitbit.api` does.
+for _endpoint in endpoints.values():
+    if _endpoint.intraday:
+        _add_call(_endpoint.name, _intraday_call(_endpoint))
+    elif _endpoint.name in api._parsers:
+        _parse = api._parsers[_endpoint.name]
+        _add_call(_endpoint.name, _day_call(_endpoint, _parse))
+        _add_call(_endpoint.name + "_range", _range_call(_endpoint, _parse))
+
+
+async def _in_thread(fn, *args):
+    """Call a function which blocks in a thread, so the event loop keeps running.
+    This is :func:`asyncio.to_thread`, which requires Python 3.9.
+
+    Args:
+        fn (function): Function.
+        *args (object): Arguments of `fn`.
+
+    Returns:
+        object: Result of `fn`.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, functools.partial(fn, *args))
+
+
+def _load(path, since):
+    """Load a response from the cache or the store of raw responses, like
+    :func:`fitbit.api._fetch_raw` does.
+
+    Args:
+        path (str): Path of the request.
+        since (float or None): Only use responses fetched at or after this time.
+
+    Returns:
+        bytes or None: Response, or `None` if it must be fetched.
+        str: Source of the response.
+    """
+    content = cache.get(path, since)
+    if content is not None:
+        return content, "cache"
+    content = raw_store.get(path, since)
+    if content is not None:
+        cache.set(path, content)
+    return content, "raw"
+
+
+def _save(path, day, content):
+    """Save a fetched response in the cache and the store of raw responses.
+
+    Args:
+        path (str): Path of the request.
+        day (:class:`datetime.datetime`): Last day covered by the response.
+        content (bytes): Response.
+    """
+    cache.set(path, content)
+    raw_store.put(path, day, content)
+
+
+async def _wait_for_rate_limiter(limiter):
+    """Asynchronous variant of entering a rate limiter.
+
+    Args:
+        limiter (:class:`.rate.RateLimiter`): Rate limiter.
+    """
+    with metrics.timer("rate_limit_wait_seconds"):
+        while True:
+            # Taking a token locks the file with the state of the rate limiter.
+            to_sleep = await _in_thread(limiter._acquire)
+            if to_sleep <= 0:
+                return
+            print(f"Waiting {to_sleep:.1f} seconds to not exceed API rate limit.")
+            await asyncio.sleep(to_sleep + 0.01)
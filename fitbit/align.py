@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+
+from . import api
+from .endpoints import endpoints
+
+__all__ = ["aligned"]
+
+_aggregations = {
+    column: endpoint.aggregation
+    for endpoint in endpoints.values()
+    if endpoint.aggregation is not None
+    for column in endpoint.columns
+}
+"""dict[str, str]: Aggregation of every time series column when it is resampled.
+Other columns hold daily values or sleep stages and are carried forward."""
+
+
+def _fetch_range(token, call, start, end):
+    """Fetch the data of a call from day `start` up to and including day `end` with
+    as few requests as possible.
+
+    Args:
+        token (str or :class:`.users.User`): Authentication token or user.
+        call (str): Name of the call.
+        start (:class:`datetime.datetime`): First day.
+        end (:class:`datetime.datetime`): Last day.
+
+    Returns:
+        :class:`pandas.DataFrame` or None: Data, or `None` if there is no data.
+    """
+    if endpoints[call].supports_range:
+        # Calls which share a request, like the calls of sleep, make it once, because
+        # the cache shares the responses.
+        data = api.fetch_days(call, token, start, end).values()
+    else:
+        data = (df for _, df in api.iter_days(call, token, start, end))
+    dfs = [df for df in data if len(df) > 0]
+    return pd.concat(dfs) if dfs else None
+
+
+def _align(df, grid):
+    """Align the data of a call to a grid of time.
+
+    Args:
+        df (:class:`pandas.DataFrame`): Data.
+        grid (:class:`pandas.DatetimeIndex`): Grid.
+
+    Returns:
+        :class:`pandas.DataFrame`: Data aligned to `grid`.
+    """
+    df = df.sort_index()
+    df.index = df.index.astype(grid.dtype)
+    resolution = grid.freq
+    if "sleep_stage_dur_mins" in df.columns:
+        # Every stage lasts for a duration. Carry the stage forward, but not beyond
+        # the end of the stage.
+        ends = df.index + pd.to_timedelta(df["sleep_stage_dur_mins"], unit="min")
+        df = pd.DataFrame(
+            {"sleep_stage_level": df["sleep_stage_level"].to_numpy(), "end": ends},
+            index=df.index,
+        )
+        df = df.resample(resolution).last().reindex(grid).ffill()
+        df.loc[~(df.index < df["end"]), "sleep_stage_level"] = np.nan
+        return df[["sleep_stage_level"]]
+    aggregations = {c: _aggregations.get(c, "last") for c in df.columns}
+    df = df.resample(resolution).agg(aggregations).reindex(grid)
+    carried = [c for c, how in aggregations.items() if how == "last"]
+    if carried:
+        # Carry daily values forward, but only within the same day.
+        df[carried] = df[carried].groupby(df.index.normalize()).ffill()
+    return df
+
+
+def aligned(token, calls, start, end=None, resolution="1min"):
+    """Fetch the data of multiple calls and align them to one grid of time.
+
+    Time series are aggregated to the resolution: counts, like steps, are summed and
+    measurements, like heart rate, are averaged. Daily values, like breathing rate,
+    are repeated over their day, and sleep stages are repeated over their duration.
+
+    Calls for which multi-day endpoints exist fetch the whole range at once. Calls
+    which share an endpoint, like `sleep_summary` and `sleep_series`, fetch it once.
+
+    Args:
+        token (str or :class:`.users.User`): Authentication token or user.
+        calls (list[str]): Names of the calls, e.g. `["hr", "steps", "spo2"]`.
+        start (:class:`datetime.datetime`): First day in your local time zero.
+        end (:class:`datetime.datetime`, optional): Last day in your local time zero.
+            Defaults to `start`.
+        resolution (str, optional): Resolution of the grid. Defaults to `"1min"`.
+
+    Returns:
+        :class:`pandas.DataFrame`: Data of all calls, with one column per column of
+            every call.
+    """
+    end = start if end is None else end
+    grid = pd.date_range(
+        pd.Timestamp(start).normalize(),
+        pd.Timestamp(end).normalize() + pd.Timedelta(days=1),
+        freq=resolution,
+        inclusive="left",
+        name="date",
+    )
+    frames = []
+    for call in calls:
+        df = _fetch_range(token, call, start, end)
+        if df is None:
+            continue
+        frames.append(_align(df, grid))
+    return pd.concat(frames, axis=1) if frames else pd.DataFrame(index=grid)
@@ -1,250 +1,619 @@
 import datetime
 import pprint
+import time
 import warnings
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
 
+import numpy as np
 import pandas as pd
 import requests
 
-from .rate import rate_limiter
-
-__all__ = [
-    # AZM endpoint appears to be broken currently.
-    # "zone",
-    "cal",
-    "dist",
-    "elev",
-    "floors",
-    "steps",
-    "hr",
-    "hrv",
-    "spo2",
-    "br",
-    "sleep_summary",
-    "sleep_series",
+try:
+    # orjson decodes about twice as fast as the standard library.
+    from orjson import loads as _loads
+except ImportError:  # pragma: no cover
+    from json import loads as _loads
+
+from . import _dispatch, util
+from .cache import cache
+from .compact import CompactSeries
+from .endpoints import endpoints
+from .metrics import metrics
+from .rate import _retry_after, rate_limiter
+from .raw import raw_store
+from .transport import transport
+from .users import User
+from .util import format_date
+
+daily_calls = [name for name, endpoint in endpoints.items() if not endpoint.warning]
+"""list[str]: Names of all calls which fetch data for a single day."""
+
+__all__ = daily_calls + [
+    "daily_calls",
+    "hrv_range",
+    "spo2_range",
+    "br_range",
+    "sleep_range",
+    "fetch_days",
+    "iter_days",
 ]
 
 
-def zone(token, day):
-    """Get your active zone minutes time series at day `day`.
+def _capitalise(description):
+    return description[0].upper() + description[1:]
+
+
+def _intraday_call(endpoint):
+    """Generate the call of an intraday endpoint.
 
     Args:
-        token (str): Authentication token.
-        day (:class:`datetime.datetime`): Day in your local time zero.
+        endpoint (:class:`.endpoints.Endpoint`): Endpoint.
 
     Returns:
-        :class:`pandas.DataFrame`: Active zone minutes time series.
+        function: Call.
     """
-    warnings.warn(
-        "The API endpoint for intraday active zone minutes appears to be broken. "
-        "For example, see the following thread: "
-        "https://community.fitbit.com/t5/Web-API-Development"
-        "/active-zone-minutes-endpoint-throwing-error/td-p/5438823",
-        stacklevel=1,
-    )
-    return _intraday_activity("active-zone-minutes", "1min", "zone", token, day)
+    (column,) = endpoint.columns
 
+    def call(token, day, compact=False, since=None):
+        if endpoint.warning:
+            warnings.warn(endpoint.warning, stacklevel=2)
+        content = _fetch_raw(token, endpoint.url, day, endpoint.version, since=since)
+        resource = _resource(endpoint.url)
+        with metrics.timer("decode_seconds", endpoint=resource):
+            seconds, values = _decode_intraday(content, endpoint.response)
+        with metrics.timer("build_seconds", endpoint=resource):
+            return _intraday(seconds, values, column, day, compact)
 
-def cal(token, day):
-    """Get your calories time series at day `day`.
+    call.__name__ = call.__qualname__ = endpoint.name
+    call.__doc__ = f"""Get your {endpoint.description} at day `day`.
 
     Args:
-        token (str): Authentication token.
+        token (str or :class:`.users.User`): Authentication token or user.
         day (:class:`datetime.datetime`): Day in your local time zero.
+        compact (bool, optional): Return a :class:`.compact.CompactSeries` instead of
+            a data frame. Defaults to `False`.
+        since (float, optional): Only use responses from the cache or the store of
+            raw responses which were fetched at or after this time. Defaults to
+            using all stored responses.
 
     Returns:
-        :class:`pandas.DataFrame`: Calories time series.
+        :class:`pandas.DataFrame` or :class:`.compact.CompactSeries`:
+            {_capitalise(endpoint.description)}.
     """
-    return _intraday_activity("calories", "1min", "cal", token, day)
+    return call
 
 
-def dist(token, day):
-    """Get your distance time series at day `day`.
+def _day_call(endpoint, parse):
+    """Generate the call of an endpoint which fetches the data of one day.
 
     Args:
-        token (str): Authentication token.
-        day (:class:`datetime.datetime`): Day in your local time zero.
+        endpoint (:class:`.endpoints.Endpoint`): Endpoint.
+        parse (function): Parser of the response.
 
     Returns:
-        :class:`pandas.DataFrame`: Distance time series.
+        function: Call.
     """
-    return _intraday_activity("distance", "1min", "dist", token, day)
 
+    def call(token, day, since=None):
+        res = _fetch(token, endpoint.url, day, endpoint.version, since=since)
+        with metrics.timer("build_seconds", endpoint=_resource(endpoint.url)):
+            return parse(res)
 
-def elev(token, day):
-    """Get your elevation time series at day `day`.
+    call.__name__ = call.__qualname__ = endpoint.name
+    call.__doc__ = f"""Get your {endpoint.description} at day `day`.
 
     Args:
-        token (str): Authentication token.
+        token (str or :class:`.users.User`): Authentication token or user.
         day (:class:`datetime.datetime`): Day in your local time zero.
+        since (float, optional): Only use responses from the cache or the store of
+            raw responses which were fetched at or after this time. Defaults to
+            using all stored responses.
 
     Returns:
-        :class:`pandas.DataFrame`: Elevation time series.
+        :class:`pandas.DataFrame`: {_capitalise(endpoint.description)}.
     """
-    return _intraday_activity("elevation", "1min", "elev", token, day)
+    return call
 
 
-def floors(token, day):
-    """Get your floors times series at day `day`.
+def _range_call(endpoint, parse):
+    """Generate the call of an endpoint which fetches the data of a range of days.
 
     Args:
-        token (str): Authentication token.
-        day (:class:`datetime.datetime`): Day in your local time zero.
+        endpoint (:class:`.endpoints.Endpoint`): Endpoint.
+        parse (function): Parser of the response.
 
     Returns:
-        :class:`pandas.DataFrame`: Floors time series.
+        function: Call.
     """
-    return _intraday_activity("elevation", "1min", "elev", token, day)
 
+    def call(token, start, end, since=None):
+        responses = [
+            _fetch(
+                token,
+                endpoint.range_url,
+                first,
+                endpoint.version,
+                last,
+                since=since,
+            )
+            for first, last in _windows(start, end, endpoint.max_days)
+        ]
+        with metrics.timer("build_seconds", endpoint=_resource(endpoint.url)):
+            return pd.concat([parse(res) for res in responses])
 
-def steps(token, day):
-    """Get your steps times series at day `day`.
+    call.__name__ = call.__qualname__ = endpoint.name + "_range"
+    call.__doc__ = f"""Get your {endpoint.description} from day `start` up to and
+    including day `end`.
 
     Args:
-        token (str): Authentication token.
-        day (:class:`datetime.datetime`): Day in your local time zero.
+        token (str or :class:`.users.User`): Authentication token or user.
+        start (:class:`datetime.datetime`): First day in your local time zero.
+        end (:class:`datetime.datetime`): Last day in your local time zero.
+        since (float, optional): Only use responses from the cache or the store of
+            raw responses which were fetched at or after this time. Defaults to
+            using all stored responses.
 
     Returns:
-        :class:`pandas.DataFrame`: Steps time series.
+        :class:`pandas.DataFrame`: {_capitalise(endpoint.description)}.
     """
-    return _intraday_activity("steps", "1min", "steps", token, day)
+    return call
 
 
-def hr(token, day):
-    """Get your heart rate time series at day `day`.
+def _parse_intraday(res, key, column_name, day, compact=False):
+    """Parse the response of an intraday activity request.
 
     Args:
-        token (str): Authentication token.
+        res (dict): Response.
+        key (str): Key of the response which holds the time series, e.g.
+            `"activities-heart-intraday"`.
+        column_name (str): Name of the column in the resulting data frame.
         day (:class:`datetime.datetime`): Day in your local time zero.
+        compact (bool, optional): Return a :class:`.compact.CompactSeries` instead of
+            a data frame. Defaults to `False`.
 
     Returns:
-        :class:`pandas.DataFrame`: Heart rate time series.
+        :class:`pandas.DataFrame` or :class:`.compact.CompactSeries`: Intraday
+            activity time series.
     """
-    return _intraday_activity("heart", "1sec", "hr", token, day)
+    return _intraday(*_dataset(res, key), column_name, day, compact)
 
 
-def _intraday_activity(name, resolution, column_name, token, day):
-    """Get intraday activity time series at day `day`.
+def _dataset(res, key):
+    """Get an intraday time series from a decoded response.
 
     Args:
-        name (str): Name of the activity.
+        res (dict): Response.
+        key (str): Key of the response which holds the time series.
+
+    Returns:
+        :class:`numpy.ndarray`: Seconds since midnight.
+        :class:`numpy.ndarray`: Values.
+    """
+    dataset = res[key]["dataset"]
+    seconds = _parse_clock(list(map(itemgetter("time"), dataset)))
+    values = np.array(list(map(itemgetter("value"), dataset)))
+    return seconds, values
+
+
+def _parse_intraday_content(content, key, column_name, day, compact=False):
+    """Parse the undecoded response of an intraday activity request.
+
+    The time series is read directly from the bytes of the response, without
+    decoding every sample into a dictionary. If the response is not in the expected
+    format, it is decoded and parsed by :func:`_parse_intraday`.
+
+    Args:
+        content (bytes): Response.
+        key (str): Key of the response which holds the time series, e.g.
+            `"activities-heart-intraday"`.
         column_name (str): Name of the column in the resulting data frame.
-        token (str): Authentication token.
         day (:class:`datetime.datetime`): Day in your local time zero.
+        compact (bool, optional): Return a :class:`.compact.CompactSeries` instead of
+            a data frame. Defaults to `False`.
 
     Returns:
-        :class:`pandas.DataFrame`: Intraday activity time series.
+        :class:`pandas.DataFrame` or :class:`.compact.CompactSeries`: Intraday
+            activity time series.
     """
-    res = _fetch(token, f"activities/{name}/date/{{date}}/1d/{resolution}.json", day)
+    return _intraday(*_decode_intraday(content, key), column_name, day, compact)
+
 
-    def parse_time(x, ref):
-        h, m, s = map(int, x.split(":"))
-        dt = datetime.datetime(ref.year, ref.month, ref.day, h, m, s)
-        return dt
+def _decode_intraday(content, key):
+    """Get an intraday time series from an undecoded response. See
+    :func:`_parse_intraday_content`.
+
+    Args:
+        content (bytes): Response.
+        key (str): Key of the response which holds the time series.
+
+    Returns:
+        :class:`numpy.ndarray`: Seconds since midnight.
+        :class:`numpy.ndarray`: Values.
+    """
+    extracted = _extract_dataset(content, key)
+    if extracted is None:
+        return _dataset(_loads(content), key)
+    return extracted
 
-    series = res[f"activities-{name}-intraday"]["dataset"]
-    series = [(parse_time(x["time"], day), x["value"]) for x in series]
-    series = pd.DataFrame(series, columns=["date", column_name]).set_index("date")
 
-    return series
+_sample = b'{"time":"00:00:00","value":'
+"""bytes: Start of every sample of an intraday time series, where the zeros are the
+digits of the time."""
 
 
-def hrv(token, day):
-    """Get your heart rate variability time series at day `day`.
+def _extract_dataset(content, key):
+    """Extract an intraday time series directly from the bytes of a response.
+
+    Every sample must be of the form `{"time":"HH:MM:SS","value":V}`, where `V` is
+    a decimal number without exponent. This is how the API formats the samples.
 
     Args:
-        token (str): Authentication token.
+        content (bytes): Response.
+        key (str): Key of the response which holds the time series.
+
+    Returns:
+        tuple[:class:`numpy.ndarray`, :class:`numpy.ndarray`] or None: Seconds since
+            midnight and values, or `None` if the response is not in the expected
+            format.
+    """
+    start = content.find(f'"{key}":'.encode())
+    if start < 0:
+        return None
+    start = content.find(b'"dataset":[', start)
+    if start < 0:
+        return None
+    start += len(b'"dataset":[')
+    end = content.find(b"]", start)
+    if end < 0:
+        return None
+    data = np.frombuffer(content, dtype=np.uint8, count=end - start, offset=start)
+    opens = np.flatnonzero(data == ord("{"))
+    closes = np.flatnonzero(data == ord("}"))
+    if len(opens) != len(closes) or len(opens) == 0:
+        return None
+    if np.any(closes[:-1] > opens[1:]) or np.any(closes - opens <= len(_sample)):
+        return None
+    for i, c in enumerate(_sample):
+        if c != ord("0") and not np.all(data[opens + i] == c):
+            return None
+
+    def digit(i):
+        d = data[opens + i].astype(np.int64) - ord("0")
+        return d if np.all((d >= 0) & (d <= 9)) else None
+
+    digits = [digit(i) for i in [9, 10, 12, 13, 15, 16]]
+    if any(d is None for d in digits):
+        return None
+    h1, h2, m1, m2, s1, s2 = digits
+    seconds = 3600 * (10 * h1 + h2) + 60 * (10 * m1 + m2) + 10 * s1 + s2
+
+    # Read the values one character at a time, but for all samples at once.
+    first = opens + len(_sample)
+    widths = closes - first
+    values = np.zeros(len(opens), dtype=np.int64)
+    negative = np.zeros(len(opens), dtype=bool)
+    point = np.zeros(len(opens), dtype=bool)
+    decimals = np.zeros(len(opens), dtype=np.int64)
+    count = np.zeros(len(opens), dtype=np.int64)
+    for j in range(widths.max()):
+        active = widths > j
+        c = data[np.where(active, first + j, 0)]
+        is_digit = active & (c >= ord("0")) & (c <= ord("9"))
+        is_minus = active & (c == ord("-")) & (j == 0)
+        is_point = active & (c == ord(".")) & ~point
+        if not np.all(is_digit | is_minus | is_point | ~active):
+            return None
+        # Stop at 18 digits, which is as many as fit in a 64-bit integer.
+        values = np.where(
+            is_digit & (count < 18),
+            10 * values + (c.astype(np.int64) - ord("0")),
+            values,
+        )
+        decimals += is_digit & point & (count < 18)
+        count += is_digit
+        negative |= is_minus
+        point |= is_point
+    if np.any((count > 18) & ~point):
+        return None
+    values = np.where(negative, -values, values)
+    if np.any(point):
+        # Dividing gives the same value as `float` only if the digits fit in the
+        # mantissa of a float. Parse the values with more digits on their own.
+        inexact = np.flatnonzero(
+            (decimals > 0) & ((np.abs(values) >= 2**53) | (count > 18))
+        )
+        values = values / 10.0**decimals
+        for i in inexact:
+            values[i] = float(data[first[i] : closes[i]].tobytes())
+    return seconds, values
+
+
+def _intraday(seconds, values, column_name, day, compact):
+    """Construct an intraday time series.
+
+    Args:
+        seconds (:class:`numpy.ndarray`): Seconds since midnight.
+        values (:class:`numpy.ndarray`): Values.
+        column_name (str): Name of the column in the resulting data frame.
         day (:class:`datetime.datetime`): Day in your local time zero.
+        compact (bool): Return a :class:`.compact.CompactSeries` instead of a data
+            frame.
 
     Returns:
-        :class:`pandas.DataFrame`: Heart rate variability time series.
+        :class:`pandas.DataFrame` or :class:`.compact.CompactSeries`: Intraday
+            activity time series.
     """
-    res = _fetch(token, "hrv/date/{date}/all.json", day)
+    if compact:
+        return CompactSeries.from_values(_day_start(day), seconds, values, column_name)
+    dates = _day_start(day) + seconds.astype("timedelta64[s]")
+    return _frame(dates, {column_name: values})
 
-    def parse_time(x):
-        return datetime.datetime.strptime(x, "%Y-%m-%dT%H:%M:%S.000")
 
-    series = res["hrv"][0]["minutes"]
-    series = [(parse_time(x["minute"]), x["value"]["rmssd"]) for x in series]
-    series = pd.DataFrame(series, columns=["date", "hrv"]).set_index("date")
+def _day_start(day):
+    """Get the start of a day as a NumPy date time.
 
-    return series
+    Args:
+        day (:class:`datetime.datetime`): Day.
 
+    Returns:
+        :class:`numpy.datetime64`: Start of `day` with a resolution of seconds.
+    """
+    return np.datetime64(f"{day.year:04d}-{day.month:02d}-{day.day:02d}", "s")
 
-def spo2(token, day):
-    """Get your SpO2 time series at day `day`.
+
+def _parse_clock(times):
+    """Parse times of the form `HH:MM:SS` into seconds since midnight.
+
+    Rather than parsing every time separately, all times are joined into one byte
+    string and the digits are read off in one go.
 
     Args:
-        token (str): Authentication token.
-        day (:class:`datetime.datetime`): Day in your local time zero.
+        times (list[str]): Times.
 
     Returns:
-        :class:`pandas.DataFrame`: SpO2 time series.
+        :class:`numpy.ndarray`: Seconds since midnight.
     """
-    res = _fetch(token, "spo2/date/{date}/all.json", day)
+    digits = np.frombuffer("".join(times).encode("ascii"), dtype=np.uint8)
+    if len(digits) != 8 * len(times):
+        raise ValueError("Times must be of the form `HH:MM:SS`.")
+    digits = digits.reshape(-1, 8).astype(np.int64) - ord("0")
+    h = 10 * digits[:, 0] + digits[:, 1]
+    m = 10 * digits[:, 3] + digits[:, 4]
+    s = 10 * digits[:, 6] + digits[:, 7]
+    return 3600 * h + 60 * m + s
 
-    def parse_time(x):
-        return datetime.datetime.strptime(x, "%Y-%m-%dT%H:%M:%S")
 
-    series = res["minutes"]
-    series = [(parse_time(x["minute"]), x["value"]) for x in series]
-    series = pd.DataFrame(series, columns=["date", "spo2"]).set_index("date")
+def _parse_timestamps(timestamps):
+    """Parse ISO 8601 time stamps, like `2021-10-25T09:10:00.000`.
 
-    return series
+    Args:
+        timestamps (list[str]): Time stamps.
+
+    Returns:
+        :class:`numpy.ndarray`: Parsed time stamps.
+    """
+    return np.array(timestamps, dtype="datetime64[ms]")
 
 
-def br(token, day):
-    """Get your breathing rate information at day `day`.
+def _frame(dates, columns):
+    """Construct a data frame indexed by date.
 
     Args:
-        token (str): Authentication token.
-        day (:class:`datetime.datetime`): Day in your local time zero.
+        dates (:class:`numpy.ndarray`): Dates.
+        columns (dict[str, :class:`numpy.ndarray`]): Columns.
+
+    Returns:
+        :class:`pandas.DataFrame`: Data frame.
+    """
+    index = pd.DatetimeIndex(np.asarray(dates, dtype="datetime64[ns]"), name="date")
+    return pd.DataFrame(columns, index=index)
+
+
+def _parse_hrv(res):
+    """Parse the response of a heart rate variability request.
+
+    Args:
+        res (dict): Response.
+
+    Returns:
+        :class:`pandas.DataFrame`: Heart rate variability time series.
+    """
+    minutes = [x for entry in res["hrv"] for x in entry["minutes"]]
+    return _frame(
+        _parse_timestamps(list(map(itemgetter("minute"), minutes))),
+        {"hrv": np.array([x["value"]["rmssd"] for x in minutes], dtype=float)},
+    )
+
+
+def _parse_spo2(res):
+    """Parse the response of an SpO2 request.
+
+    Args:
+        res (dict or list[dict]): Response. For a range of days, this is a list with
+            one element per day.
+
+    Returns:
+        :class:`pandas.DataFrame`: SpO2 time series.
+    """
+    if isinstance(res, dict):
+        res = [res]
+    minutes = [x for entry in res for x in entry["minutes"]]
+    return _frame(
+        _parse_timestamps(list(map(itemgetter("minute"), minutes))),
+        {"spo2": np.array(list(map(itemgetter("value"), minutes)), dtype=float)},
+    )
+
+
+def _parse_br(res):
+    """Parse the response of a breathing rate request.
+
+    Args:
+        res (dict): Response.
 
     Returns:
         :class:`pandas.DataFrame`: Breathing rate information.
     """
-    res = _fetch(token, "br/date/{date}/all.json", day)
-    return pd.DataFrame(
-        [
-            {
-                "date": datetime.datetime(day.year, day.month, day.day),
-                "br_full": res["br"][0]["value"]["fullSleepSummary"]["breathingRate"],
-                "br_deep": res["br"][0]["value"]["deepSleepSummary"]["breathingRate"],
-                "br_rem": res["br"][0]["value"]["remSleepSummary"]["breathingRate"],
-                "br_light": res["br"][0]["value"]["lightSleepSummary"]["breathingRate"],
-            }
-        ]
-    ).set_index("date")
+    entries = res["br"]
+    columns = {
+        "br_full": "fullSleepSummary",
+        "br_deep": "deepSleepSummary",
+        "br_rem": "remSleepSummary",
+        "br_light": "lightSleepSummary",
+    }
+    return _frame(
+        np.array(list(map(itemgetter("dateTime"), entries)), dtype="datetime64[D]"),
+        {
+            column: np.array(
+                [entry["value"][key]["breathingRate"] for entry in entries],
+                dtype=float,
+            )
+            for column, key in columns.items()
+        },
+    )
+
+
+_parsers = {"hrv": _parse_hrv, "spo2": _parse_spo2, "br": _parse_br}
+"""dict[str, function]: Parsers of the responses of the endpoints which are not
+intraday time series and not sleep."""
 
+for _endpoint in endpoints.values():
+    if _endpoint.intraday:
+        globals()[_endpoint.name] = _intraday_call(_endpoint)
+    elif _endpoint.name in _parsers:
+        _parse = _parsers[_endpoint.name]
+        globals()[_endpoint.name] = _day_call(_endpoint, _parse)
+        globals()[_endpoint.name + "_range"] = _range_call(_endpoint, _parse)
 
-def sleep(token, day):
+
+def sleep(token, day, since=None):
     """Get your sleep information at day `day`.
 
     Args:
-        token (str): Authentication token.
+        token (str or :class:`.users.User`): Authentication token or user.
         day (:class:`datetime.datetime`): Day in your local time zero.
+        since (float, optional): Only use responses from the cache or the store of
+            raw responses which were fetched at or after this time. Defaults to
+            using all stored responses.
+
+    Returns:
+        :class:`pandas.DataFrame`: Summary of your sleep.
+        :class:`pandas.DataFrame`: Sleep time series.
+    """
+    endpoint = endpoints["sleep_summary"]
+    res = _fetch(token, endpoint.url, day, endpoint.version, since=since)
+    with metrics.timer("build_seconds", endpoint=_resource(endpoint.url)):
+        return _parse_sleep(day, res["sleep"], res["summary"]["stages"])
+
+
+def sleep_range(token, start, end, since=None):
+    """Get your sleep information from day `start` up to and including day `end`.
+
+    Days without a main sleep are omitted.
+
+    Args:
+        token (str or :class:`.users.User`): Authentication token or user.
+        start (:class:`datetime.datetime`): First day in your local time zero.
+        end (:class:`datetime.datetime`): Last day in your local time zero.
+        since (float, optional): Only use responses from the cache or the store of
+            raw responses which were fetched at or after this time. Defaults to
+            using all stored responses.
+
+    Returns:
+        :class:`pandas.DataFrame`: Summary of your sleep.
+        :class:`pandas.DataFrame`: Sleep time series.
+    """
+    endpoint = endpoints["sleep_summary"]
+    responses = [
+        _fetch(token, endpoint.range_url, first, endpoint.version, last, since=since)
+        for first, last in _windows(start, end, endpoint.max_days)
+    ]
+    with metrics.timer("build_seconds", endpoint=_resource(endpoint.url)):
+        return _parse_sleep_range(responses)
+
+
+def _parse_sleep_range(responses):
+    """Parse the responses of sleep requests for ranges of days.
+
+    Args:
+        responses (list[dict]): Responses.
+
+    Returns:
+        :class:`pandas.DataFrame`: Summary of your sleep.
+        :class:`pandas.DataFrame`: Sleep time series.
+    """
+    days = _parse_sleep_days(responses)
+    if not days:
+        raise ValueError("No main sleep found in the range.")
+    summaries, series = zip(*(days[date] for date in sorted(days)))
+    return pd.concat(summaries), pd.concat(series)
+
+
+def _parse_sleep_days(responses):
+    """Parse the responses of sleep requests for ranges of days per day.
+
+    Args:
+        responses (list[dict]): Responses.
+
+    Returns:
+        dict[str, tuple[:class:`pandas.DataFrame`, :class:`pandas.DataFrame`]]: For
+            every day with a main sleep, the summary of your sleep and the sleep time
+            series. The keys are dates of the form `YYYY-MM-DD`.
+    """
+    # Group the sleep logs by the day on which the sleep ended.
+    logs_by_day = {}
+    for res in responses:
+        for log in res["sleep"]:
+            logs_by_day.setdefault(log["dateOfSleep"], []).append(log)
+
+    days = {}
+    for date, logs in logs_by_day.items():
+        if not any(log["isMainSleep"] for log in logs):
+            continue
+        # The range endpoint does not return a summary, so total the stages of all
+        # logs like the summary for a single day does.
+        stages = {
+            stage: sum(
+                log["levels"]["summary"].get(stage, {}).get("minutes", 0)
+                for log in logs
+            )
+            for stage in ["deep", "rem", "light", "wake"]
+        }
+        day = datetime.datetime.strptime(date, "%Y-%m-%d")
+        days[date] = _parse_sleep(day, logs, stages)
+    return days
+
+
+def _parse_sleep(day, logs, stages):
+    """Parse the sleep logs of one day.
+
+    Args:
+        day (:class:`datetime.datetime`): Day in your local time zero.
+        logs (list[dict]): Sleep logs of `day`.
+        stages (dict[str, int]): Total number of minutes in every sleep stage.
 
     Returns:
         :class:`pandas.DataFrame`: Summary of your sleep.
         :class:`pandas.DataFrame`: Sleep time series.
     """
-    res = _fetch(token, "sleep/date/{date}.json", day, version=1.2)
 
     def parse_time(x):
         return datetime.datetime.strptime(x, "%Y-%m-%dT%H:%M:%S.000")
 
     # Find the main sleep.
-    i = [d["isMainSleep"] for d in res["sleep"]].index(True)
+    i = [d["isMainSleep"] for d in logs].index(True)
 
     summary = pd.DataFrame(
         [
             {
                 "date": datetime.datetime(day.year, day.month, day.day),
-                "sleep_start": parse_time(res["sleep"][i]["startTime"]),
-                "sleep_end": parse_time(res["sleep"][i]["endTime"]),
-                "sleep_deep_mins": res["summary"]["stages"]["deep"],
-                "sleep_rem_mins": res["summary"]["stages"]["rem"],
-                "sleep_light_mins": res["summary"]["stages"]["light"],
-                "sleep_wake_mins": res["summary"]["stages"]["wake"],
+                "sleep_start": parse_time(logs[i]["startTime"]),
+                "sleep_end": parse_time(logs[i]["endTime"]),
+                "sleep_deep_mins": stages["deep"],
+                "sleep_rem_mins": stages["rem"],
+                "sleep_light_mins": stages["light"],
+                "sleep_wake_mins": stages["wake"],
             }
         ]
     ).set_index("date")
@@ -255,53 +624,316 @@ def sleep(token, day):
                 "sleep_stage_level": entry["level"],
                 "sleep_stage_dur_mins": entry["seconds"] / 60,
             }
-            for entry in res["sleep"][i]["levels"]["data"]
+            for entry in logs[i]["levels"]["data"]
         ]
     ).set_index("date")
     return summary, series
 
 
-def sleep_summary(token, day):
+def sleep_summary(token, day, since=None):
     """Get a summary of your sleep information at day `day`.
 
     Args:
-        token (str): Authentication token.
+        token (str or :class:`.users.User`): Authentication token or user.
         day (:class:`datetime.datetime`): Day in your local time zero.
+        since (float, optional): Only use responses from the cache or the store of
+            raw responses which were fetched at or after this time. Defaults to
+            using all stored responses.
 
     Returns:
         :class:`pandas.DataFrame`: Summary of your sleep.
     """
-    return sleep(token, day)[0]
+    return sleep(token, day, since)[0]
 
 
-def sleep_series(token, day):
+def sleep_series(token, day, since=None):
     """Get your sleep time series at day `day`.
 
     Args:
-        token (str): Authentication token.
+        token (str or :class:`.users.User`): Authentication token or user.
         day (:class:`datetime.datetime`): Day in your local time zero.
+        since (float, optional): Only use responses from the cache or the store of
+            raw responses which were fetched at or after this time. Defaults to
+            using all stored responses.
 
     Returns:
         :class:`pandas.DataFrame`: Sleep time series.
     """
-    return sleep(token, day)[1]
+    return sleep(token, day, since)[1]
 
 
-def _fetch(token, url, day, version=1):
-    with rate_limiter:
-        date = f"{day.year}-{day.month:02d}-{day.day:02d}"
-        res = requests.get(
-            f"https://api.fitbit.com/{version}/user/-/" + url.format(date=date),
-            headers={
-                "Accept": "application/json",
-                "Authorization": f"Bearer {token}",
-            },
-        )
-    try:
-        res.raise_for_status()
-    except requests.HTTPError as e:
-        print("Full response:")
-        pprint.pprint(res.json())
-        raise e
-
-    return res.json()
+def fetch_days(call, token, start, end, since=None):
+    """Fetch the data of a call for every day from day `start` up to and including
+    day `end` with as few requests as possible.
+
+    Calls which support ranges fetch windows of days with one request and split the
+    responses by day. Other calls fetch one day at a time. For the calls of sleep,
+    days without a main sleep are omitted.
+
+    Args:
+        call (str): Name of the call, e.g. `"hrv"`.
+        token (str or :class:`.users.User`): Authentication token or user.
+        start (:class:`datetime.datetime`): First day in your local time zero.
+        end (:class:`datetime.datetime`): Last day in your local time zero.
+        since (float, optional): Only use responses from the cache or the store of
+            raw responses which were fetched at or after this time. Defaults to
+            using all stored responses.
+
+    Returns:
+        dict[:class:`datetime.datetime`, :class:`pandas.DataFrame`]: Data of every
+            day. The days are `start`, `start` plus one day, et cetera.
+    """
+    endpoint = endpoints[call]
+    days = util.days(start, end)
+    if not endpoint.supports_range:
+        fn = globals()[call]
+        return {day: fn(token, day, since=since) for day in days}
+
+    responses = [
+        _fetch(token, endpoint.range_url, first, endpoint.version, last, since=since)
+        for first, last in _windows(start, end, endpoint.max_days)
+    ]
+    if call in _parsers:
+        # Group the entries by day and parse them like the response for one day.
+        entries = {format_date(day): [] for day in days}
+        for res in responses:
+            for entry in res if endpoint.response is None else res[endpoint.response]:
+                entries.setdefault(entry["dateTime"], []).append(entry)
+        parse = _parsers[call]
+        if endpoint.response is not None:
+            entries = {k: {endpoint.response: v} for k, v in entries.items()}
+        return {day: parse(entries[format_date(day)]) for day in days}
+    else:
+        parsed = _parse_sleep_days(responses)
+        i = 0 if call == "sleep_summary" else 1
+        return {
+            day: parsed[format_date(day)][i]
+            for day in days
+            if format_date(day) in parsed
+        }
+
+
+def iter_days(call, token, start, end, prefetch=1, compact=False):
+    """Iterate over the data of a call, one day at a time, from day `start` up to and
+    including day `end`.
+
+    While you process a day, the next `prefetch` days are fetched in the background.
+    Days which are in :data:`fitbit.store.store` are read from the store rather than
+    fetched. These days have the compact data types of the store. Only the days which
+    are being prefetched are kept in memory.
+
+    Args:
+        call (str): Name of the call, e.g. `"hr"`.
+        token (str or :class:`.users.User`): Authentication token or user.
+        start (:class:`datetime.datetime`): First day in your local time zero.
+        end (:class:`datetime.datetime`): Last day in your local time zero.
+        prefetch (int, optional): Number of days to fetch ahead. Defaults to one.
+        compact (bool, optional): Yield :class:`.compact.CompactSeries` instead of
+            data frames. Only possible for intraday calls. Defaults to `False`.
+
+    Yields:
+        tuple[:class:`datetime.datetime`, object]: Day and data of that day.
+    """
+    from .store import store
+
+    if compact and not endpoints[call].intraday:
+        raise ValueError(f"Call `{call}` is not an intraday time series.")
+    fn = globals()[call]
+
+    def load(day):
+        if store.is_open and store.has(call, day):
+            df = store.read_day(call, day)
+            return CompactSeries.from_frame(df, _day_start(day)) if compact else df
+        elif compact:
+            return fn(token, day, compact=True)
+        else:
+            return fn(token, day)
+
+    days = util.days(start, end)
+
+    with ThreadPoolExecutor(max_workers=max(prefetch, 1)) as executor:
+        pending = deque()
+        try:
+            for i, day in enumerate(days):
+                # Fetch this day and the next `prefetch` days.
+                while len(pending) <= prefetch and i + len(pending) < len(days):
+                    pending.append(executor.submit(load, days[i + len(pending)]))
+                yield day, pending.popleft().result()
+        finally:
+            # The caller may stop early. Do not fetch days which are not needed.
+            for future in pending:
+                future.cancel()
+
+
+def _windows(start, end, max_days):
+    """Split a range of days into consecutive windows of at most `max_days` days.
+
+    Args:
+        start (:class:`datetime.datetime`): First day.
+        end (:class:`datetime.datetime`): Last day.
+        max_days (int): Maximum number of days in a window.
+
+    Returns:
+        list[tuple[:class:`datetime.datetime`, :class:`datetime.datetime`]]: First
+            and last day of every window.
+    """
+    if end.date() < start.date():
+        raise ValueError("The last day must not come before the first day.")
+    windows = []
+    first = start
+    while first.date() <= end.date():
+        last = min(first + datetime.timedelta(days=max_days - 1), end)
+        windows.append((first, last))
+        first = last + datetime.timedelta(days=1)
+    return windows
+
+
+def _path(url, day, version=1, end=None, user_id="-"):
+    """Construct the path of a request.
+
+    Args:
+        url (str): URL relative to the user. `{date}` and `{end}` are replaced by
+            `day` and `end`.
+        day (:class:`datetime.datetime`): Day in your local time zero.
+        version (float, optional): Version of the API. Defaults to 1.
+        end (:class:`datetime.datetime`, optional): Last day of a range of days.
+        user_id (str, optional): ID of the user. Defaults to `"-"`, which is the
+            user to whom the token belongs.
+
+    Returns:
+        str: Path.
+    """
+    if end is None:
+        url = url.format(date=format_date(day))
+    else:
+        url = url.format(date=format_date(day), end=format_date(end))
+    return f"/{version}/user/{user_id}/" + url
+
+
+def _resource(url):
+    """Get the resource of a URL, which is used to label metrics.
+
+    Args:
+        url (str): URL relative to the user, e.g.
+            `"activities/heart/date/{date}/1d/1sec.json"`.
+
+    Returns:
+        str: Resource, e.g. `"activities/heart"`.
+    """
+    return url.split("/date/", 1)[0]
+
+
+def _observe_request(resource, status, start, size):
+    """Record the metrics of a request to the API.
+
+    Args:
+        resource (str): Resource of the request.
+        status (int): HTTP status of the response.
+        start (float): Time at which the request started according to
+            :func:`time.perf_counter`.
+        size (int): Size of the response in bytes.
+    """
+    metrics.observe(
+        "request_seconds",
+        time.perf_counter() - start,
+        endpoint=resource,
+        status=str(status),
+    )
+    metrics.observe("request_bytes", size, endpoint=resource)
+
+
+@_dispatch
+def _credentials(token: str):
+    """Get the credentials to make a request with.
+
+    Args:
+        token (str or :class:`.users.User`): Authentication token or user.
+
+    Returns:
+        str: Token.
+        :class:`.rate.RateLimiter`: Rate limiter.
+        str: ID of the user.
+    """
+    return token, rate_limiter, "-"
+
+
+@_dispatch
+def _credentials(user: User):
+    return user.token, user.rate_limiter, user.id
+
+
+def _fetch(token, url, day, version=1, end=None, max_retries=3, since=None):
+    """Fetch from the API and decode the response. See :func:`_fetch_raw`.
+
+    Returns:
+        object: Decoded response.
+    """
+    content = _fetch_raw(token, url, day, version, end, max_retries, since)
+    with metrics.timer("decode_seconds", endpoint=_resource(url)):
+        return _loads(content)
+
+
+def _fetch_raw(token, url, day, version=1, end=None, max_retries=3, since=None):
+    """Fetch from the API. The response is taken from the cache or the store of raw
+    responses if possible.
+
+    Args:
+        token (str or :class:`.users.User`): Authentication token or user.
+        url (str): URL relative to the user. `{date}` and `{end}` are replaced by
+            `day` and `end`.
+        day (:class:`datetime.datetime`): Day in your local time zero.
+        version (float, optional): Version of the API. Defaults to 1.
+        end (:class:`datetime.datetime`, optional): Last day of a range of days.
+        max_retries (int, optional): Number of times to retry if the rate limit is
+            exceeded. Defaults to three.
+        since (float, optional): Only use responses from the cache or the store of
+            raw responses which were fetched at or after this time. Defaults to
+            using all stored responses.
+
+    Returns:
+        bytes: Response.
+    """
+    token, limiter, user_id = _credentials(token)
+    path = _path(url, day, version, end, user_id)
+    resource = _resource(url)
+    with cache.lock(path):
+        content = cache.get(path, since)
+        source = "cache"
+        if content is None:
+            content = raw_store.get(path, since)
+            source = "raw"
+            if content is not None:
+                cache.set(path, content)
+        if content is None:
+            source = "api"
+            for _ in range(max_retries + 1):
+                with limiter:
+                    start = time.perf_counter()
+                    res = transport.get(
+                        path,
+                        headers={
+                            "Accept": "application/json",
+                            "Authorization": f"Bearer {token}",
+                        },
+                    )
+                _observe_request(resource, res.status_code, start, len(res.content))
+                limiter.update(res.headers)
+                if res.status_code != 429:
+                    break
+                # We exceeded the rate limit. Wait until the quota resets and try again.
+                limiter.backoff(_retry_after(res.headers))
+            try:
+                res.raise_for_status()
+            except requests.HTTPError as e:
+                print("Full response:")
+                try:
+                    pprint.pprint(_loads(res.content))
+                except ValueError:
+                    print(res.text)
+                raise e
+            content = res.content
+            cache.set(path, content)
+            raw_store.put(path, day if end is None else end, content)
+        metrics.increment("responses_total", endpoint=resource, source=source)
+
+    return content
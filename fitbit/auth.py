@@ -1,16 +1,15 @@
 import hashlib
 import os
 import random
-import ssl
 import string
+import threading
 from base64 import urlsafe_b64encode
-from http.server import BaseHTTPRequestHandler, HTTPServer
-
-import requests
 
 from . import _path_key
 from .config import config
+from .metrics import metrics
 from .rate import rate_limiter
+from .transport import transport
 from .util import timestamp
 
 __all__ = ["authenticate"]
@@ -33,6 +32,10 @@ _activities = [
 ]
 """list[str]: Activities to request permission for."""
 
+_lock = threading.Lock()
+"""threading.Lock: Lock which ensures that only one thread authenticates at a
+time. A refresh token can only be used once."""
+
 
 def _parse_url_args(url: str) -> dict:
     if "?" in url:
@@ -42,25 +45,35 @@ def _parse_url_args(url: str) -> dict:
         return {}
 
 
-def authenticate() -> str:
+def authenticate(section: str = "session", limiter=rate_limiter) -> str:
     """Perform API authentication.
 
+    Args:
+        section (str, optional): Section of the configuration which holds the
+            credentials. Defaults to `"session"`.
+        limiter (:class:`.rate.RateLimiter`, optional): Rate limiter to refresh the
+            token with. Defaults to the global rate limiter.
+
     Returns:
         str: Token.
     """
+    with _lock:
+        return _authenticate(section, limiter)
 
-    if not config["session", "token"]:
+
+def _authenticate(section, limiter=rate_limiter):
+    if not config[section, "token"]:
         # There is no token. Perform full authentication.
-        return _full_authentication()
+        return _full_authentication(section=section)
     elif (
-        config["session", "token"]
-        and timestamp() >= config["session", "token_expiry_timestamp_utc"] - 1
+        config[section, "token"]
+        and timestamp() >= config[section, "token_expiry_timestamp_utc"] - 1
     ):
         # There is a token, but it expired. Use the refresh token.
-        return _refresh_token()
+        return _refresh_token(section, limiter)
     else:
         # There is a token, and it has not yet expired. Use it.
-        return config["session", "token"]
+        return config[section, "token"]
 
 
 def _basic_auth() -> str:
@@ -68,7 +81,10 @@ def _basic_auth() -> str:
     return urlsafe_b64encode(basic_auth.encode()).decode()
 
 
-def _full_authentication(verifier_length=60, port=4444):
+def _full_authentication(verifier_length=60, port=4444, section="session"):
+    import ssl
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+
     # Generate a verifier and a challenge.
     verifier = "".join(random.choice(string.digits) for _ in range(verifier_length))
     verifier_hashed = hashlib.sha256(verifier.encode("utf-8")).digest()
@@ -115,7 +131,7 @@ def _full_authentication(verifier_length=60, port=4444):
     # Fetch authentication code.
     httpd = HTTPServer(("", port), Handler)
     # Run with a self-signed certificate: the FitBit API requires HTTPS.
-    httpd.socket = ssl.wrap_socket(httpd.socket, certfile=_path_key, server_side=True)
+    httpd.socket = ssl.wrap_socket(httpd.socket, certfile=_path_key(), server_side=True)
     # The server has started. Launch browser.
     with rate_limiter:
         os.system(f'open "{auth_url}"')
@@ -136,8 +152,8 @@ def _full_authentication(verifier_length=60, port=4444):
 
     # Swap authentication code for token.
     with rate_limiter:
-        res = requests.post(
-            "https://api.fitbit.com/oauth2/token",
+        res = transport.post(
+            "/oauth2/token",
             data={
                 "grant_type": "authorization_code",
                 "client_id": config["app", "client_id"],
@@ -150,29 +166,40 @@ def _full_authentication(verifier_length=60, port=4444):
             },
         )
     res.raise_for_status()
-    return _store_token(res.json())
-
-
-def _refresh_token():
-    with rate_limiter:
-        res = requests.post(
-            "https://api.fitbit.com/oauth2/token",
-            data={
-                "grant_type": "refresh_token",
-                "client_id": config["app", "client_id"],
-                "refresh_token": config["session", "refresh_token"],
-            },
-            headers={
-                "Content-Type": "application/x-www-form-urlencoded",
-                "Authorization": f"Basic {_basic_auth()}",
-            },
-        )
-    res.raise_for_status()
-    return _store_token(res.json())
+    return _store_token(res.json(), section)
 
 
-def _store_token(res):
-    config["session", "token"] = res["access_token"]
-    config["session", "token_expiry_timestamp_utc"] = timestamp() + res["expires_in"]
-    config["session", "refresh_token"] = res["refresh_token"]
-    return config["session", "token"]
+def _refresh_token(section="session", limiter=rate_limiter):
+    try:
+        with limiter:
+            res = transport.post(
+                "/oauth2/token",
+                data={
+                    "grant_type": "refresh_token",
+                    "client_id": config["app", "client_id"],
+                    "refresh_token": config[section, "refresh_token"],
+                },
+                headers={
+                    "Content-Type": "application/x-www-form-urlencoded",
+                    "Authorization": f"Basic {_basic_auth()}",
+                },
+            )
+        res.raise_for_status()
+    except Exception:
+        metrics.increment("token_refreshes_total", status="failed")
+        raise
+    metrics.increment("token_refreshes_total", status="ok")
+    return _store_token(res.json(), section)
+
+
+def _store_token(res, section="session"):
+    if section is None:
+        # Store the credentials of a new user in a section of their own.
+        section = f"user_{res['user_id']}"
+    config[section, "user_id"] = res["user_id"]
+    config[section, "token"] = res["access_token"]
+    config[section, "token_expiry_timestamp_utc"] = timestamp() + res["expires_in"]
+    config[section, "refresh_token"] = res["refresh_token"]
+    # A refresh token can only be used once, so never lose the new one.
+    config.flush()
+    return config[section, "token"]
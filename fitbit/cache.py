@@ -0,0 +1,242 @@
+import gzip
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+
+from .util import timestamp
+
+__all__ = ["MemoryBackend", "DiskBackend", "Cache", "cache"]
+
+
+class MemoryBackend:
+    """Cache backend which keeps entries in memory and evicts the least recently
+    used entries once their total size exceeds `max_bytes`.
+
+    Args:
+        max_bytes (int, optional): Maximum total size of the contents of the entries
+            in bytes. Defaults to 128 MiB, which holds about fifty days of heart rate
+            at a resolution of one second.
+    """
+
+    def __init__(self, max_bytes=128 * 2**20):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+
+    def get(self, key):
+        """Get an entry.
+
+        Args:
+            key (str): Key.
+
+        Returns:
+            tuple[float, bytes] or None: Time stamp at which the entry was stored and
+                the content of the entry, or `None` if there is no entry for `key`.
+        """
+        try:
+            self._entries.move_to_end(key)
+        except KeyError:
+            return None
+        return self._entries[key]
+
+    def set(self, key, time, content):
+        """Store an entry.
+
+        Args:
+            key (str): Key.
+            time (float): Time stamp at which the entry is stored.
+            content (bytes): Content.
+        """
+        self.delete(key)
+        self._entries[key] = (time, content)
+        self._bytes += len(content)
+        # An entry which is larger than the cache evicts itself too.
+        while self._bytes > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+
+    def delete(self, key):
+        """Delete an entry, if it exists.
+
+        Args:
+            key (str): Key.
+        """
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry[1])
+
+    def clear(self):
+        """Delete all entries."""
+        self._entries.clear()
+        self._bytes = 0
+
+
+class DiskBackend:
+    """Cache backend which keeps entries in compressed files in a directory, so
+    entries persist across runs. Once the directory contains more than `max_size`
+    entries, the least recently used entries are evicted until a tenth of the space
+    is free again.
+
+    Args:
+        path (str): Directory.
+        max_size (int, optional): Maximum number of entries. Defaults to 10000.
+    """
+
+    def __init__(self, path, max_size=10_000):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.max_size = max_size
+        # Count the entries once and keep track of the count afterwards, so the
+        # directory is only listed again when entries must be evicted.
+        self._count = sum(1 for _ in self.path.glob("*.gz"))
+
+    def _file(self, key):
+        return self.path / (hashlib.sha256(key.encode()).hexdigest() + ".gz")
+
+    def get(self, key):
+        """See :meth:`.MemoryBackend.get`."""
+        path = self._file(key)
+        try:
+            with gzip.open(path, "rb") as f:
+                time, content = f.read().split(b"\n", 1)
+        except FileNotFoundError:
+            return None
+        # The modification time tracks when the entry was last used.
+        os.utime(path)
+        return float(time), content
+
+    def set(self, key, time, content):
+        """See :meth:`.MemoryBackend.set`."""
+        path = self._file(key)
+        # Write to a temporary file first, so a partially written entry is never read.
+        temp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with gzip.open(temp, "wb") as f:
+            f.write(repr(time).encode() + b"\n" + content)
+        new = not path.exists()
+        os.replace(temp, path)
+        self._count += new
+        if self._count > self.max_size:
+            self._evict()
+
+    def _evict(self):
+        # Other processes may share the directory, so count the entries again.
+        files = list(self.path.glob("*.gz"))
+        keep = self.max_size - self.max_size // 10
+        if len(files) > keep:
+            files.sort(key=lambda f: f.stat().st_mtime)
+            for f in files[: len(files) - keep]:
+                f.unlink(missing_ok=True)
+        self._count = min(len(files), keep)
+
+    def delete(self, key):
+        """See :meth:`.MemoryBackend.delete`."""
+        path = self._file(key)
+        if path.exists():
+            path.unlink(missing_ok=True)
+            self._count -= 1
+
+    def clear(self):
+        """See :meth:`.MemoryBackend.clear`."""
+        for f in self.path.glob("*.gz"):
+            f.unlink(missing_ok=True)
+        self._count = 0
+
+
+class Cache:
+    """Cache for responses of the API.
+
+    Entries are keyed by the path of the request, which includes the endpoint, the
+    date and the version of the API. Entries expire `ttl` seconds after they were
+    stored. To persist the cache across runs, use a :class:`.DiskBackend`::
+
+        cache.backend = DiskBackend("output/cache")
+
+    Args:
+        backend (object, optional): Backend. Defaults to a :class:`.MemoryBackend`.
+        ttl (float, optional): Time to live of entries in seconds. Defaults to one
+            hour.
+
+    Attributes:
+        backend (object): Backend.
+        ttl (float): Time to live of entries in seconds.
+        enabled (bool): Whether the cache is used.
+    """
+
+    def __init__(self, backend=None, ttl=3600):
+        self.backend = MemoryBackend() if backend is None else backend
+        self.ttl = ttl
+        self.enabled = True
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    def get(self, key, since=None):
+        """Get the content of an entry.
+
+        Args:
+            key (str): Key.
+            since (float, optional): Only return the entry if it was stored at or
+                after this time.
+
+        Returns:
+            bytes or None: Content, or `None` if there is no entry for `key`, the
+                entry expired, or the entry was stored before `since`.
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self.backend.get(key)
+            if entry is None:
+                return None
+            time, content = entry
+            if timestamp() > time + self.ttl:
+                self.backend.delete(key)
+                return None
+            if since is not None and time < since:
+                return None
+            return content
+
+    def set(self, key, content):
+        """Store the content of an entry.
+
+        Args:
+            key (str): Key.
+            content (bytes): Content.
+        """
+        if self.enabled:
+            with self._lock:
+                self.backend.set(key, timestamp(), content)
+
+    @contextmanager
+    def lock(self, key):
+        """Lock a key. Use this to ensure that threads which need the same entry at
+        the same time fetch it only once: the first thread fetches it and the other
+        threads then find it in the cache.
+
+        Args:
+            key (str): Key.
+        """
+        with self._lock:
+            lock, users = self._key_locks.get(key, (threading.Lock(), 0))
+            self._key_locks[key] = (lock, users + 1)
+        try:
+            with lock:
+                yield
+        finally:
+            with self._lock:
+                lock, users = self._key_locks[key]
+                if users == 1:
+                    del self._key_locks[key]
+                else:
+                    self._key_locks[key] = (lock, users - 1)
+
+    def clear(self):
+        """Delete all entries."""
+        with self._lock:
+            self.backend.clear()
+
+
+cache = Cache()
+""":class:`Cache`: Cache for responses of the API."""
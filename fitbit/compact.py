@@ -0,0 +1,133 @@
+import numpy as np
+import pandas as pd
+
+from .endpoints import endpoints
+
+__all__ = ["CompactSeries"]
+
+_dtypes = {
+    column: dtype
+    for endpoint in endpoints.values()
+    for column, dtype in endpoint.columns.items()
+    if dtype is not None
+}
+"""dict[str, str]: Compact data types of columns."""
+
+
+def _narrow(values, dtype):
+    """Convert values to a narrower data type, but only if the values survive the
+    conversion exactly, so converting back gives the original values.
+
+    Args:
+        values (:class:`numpy.ndarray`): Values.
+        dtype (str): Narrower data type.
+
+    Returns:
+        :class:`numpy.ndarray`: Converted values, or the original values if they would
+            not survive the conversion.
+    """
+    try:
+        narrow = values.astype(dtype)
+    except (TypeError, ValueError):
+        return values
+    survives = np.array_equal(
+        narrow.astype(values.dtype),
+        values,
+        equal_nan=np.issubdtype(values.dtype, np.floating),
+    )
+    return narrow if survives else values
+
+
+class CompactSeries:
+    """Compact representation of an intraday time series of one day.
+
+    Instead of a date time index, the series stores the start of the day and the
+    offset of every sample in seconds as an unsigned 32-bit integer. The values are
+    stored with the narrowest data type which holds them exactly, e.g. heart rate as
+    an unsigned 8-bit integer. A day of heart rate at a resolution of one second
+    then takes 5 bytes per sample rather than 16.
+
+    Args:
+        day (:class:`numpy.datetime64`): Start of the day.
+        offsets (:class:`numpy.ndarray`): Offsets of the samples in seconds.
+        values (:class:`numpy.ndarray`): Values.
+        name (str): Name of the series.
+        dtype (:class:`numpy.dtype`, optional): Data type to convert the values back
+            to. Defaults to the data type of `values`.
+
+    Attributes:
+        day (:class:`numpy.datetime64`): Start of the day.
+        offsets (:class:`numpy.ndarray`): Offsets of the samples in seconds.
+        values (:class:`numpy.ndarray`): Values.
+        name (str): Name of the series.
+        dtype (:class:`numpy.dtype`): Data type to convert the values back to.
+    """
+
+    def __init__(self, day, offsets, values, name, dtype=None):
+        self.day = np.datetime64(day, "s")
+        self.offsets = np.asarray(offsets, dtype=np.uint32)
+        self.values = np.asarray(values)
+        self.name = name
+        self.dtype = self.values.dtype if dtype is None else np.dtype(dtype)
+
+    @classmethod
+    def from_values(cls, day, offsets, values, name):
+        """Construct a compact series and narrow the data type of the values.
+
+        Args:
+            day (:class:`numpy.datetime64`): Start of the day.
+            offsets (:class:`numpy.ndarray`): Offsets of the samples in seconds.
+            values (:class:`numpy.ndarray`): Values.
+            name (str): Name of the series.
+
+        Returns:
+            :class:`.CompactSeries`: Compact series.
+        """
+        values = np.asarray(values)
+        narrow = _narrow(values, _dtypes[name]) if name in _dtypes else values
+        return cls(day, offsets, narrow, name, dtype=values.dtype)
+
+    @classmethod
+    def from_frame(cls, df, day):
+        """Convert a data frame with one column to a compact series.
+
+        Args:
+            df (:class:`pandas.DataFrame`): Time series of one day.
+            day (:class:`numpy.datetime64`): Start of the day.
+
+        Returns:
+            :class:`.CompactSeries`: Compact series.
+        """
+        (name,) = df.columns
+        dates = df.index.to_numpy().astype("datetime64[s]")
+        offsets = (dates - np.datetime64(day, "s")).astype(np.int64)
+        return cls.from_values(day, offsets, df[name].to_numpy(), name)
+
+    def __len__(self):
+        return len(self.values)
+
+    @property
+    def nbytes(self):
+        """int: Number of bytes taken by the offsets and values."""
+        return self.offsets.nbytes + self.values.nbytes
+
+    @property
+    def dates(self):
+        """:class:`numpy.ndarray`: Dates of the samples."""
+        return self.day + self.offsets.astype("timedelta64[s]")
+
+    def to_frame(self):
+        """Convert to the data frame which the calls in :mod:`fitbit.api` return
+        by default.
+
+        Returns:
+            :class:`pandas.DataFrame`: Time series.
+        """
+        index = pd.DatetimeIndex(self.dates.astype("datetime64[ns]"), name="date")
+        return pd.DataFrame({self.name: self.values.astype(self.dtype)}, index=index)
+
+    def __repr__(self):
+        return (
+            f"CompactSeries({self.name!r}, day={self.day}, "
+            f"n={len(self)}, dtype={self.values.dtype})"
+        )
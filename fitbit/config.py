@@ -1,8 +1,12 @@
+import atexit
+import os
+import tempfile
+import threading
 from typing import Tuple
 
 import toml
 
-from . import _dispatch, _path_config
+from . import _path_config
 
 __all__ = ["config"]
 
@@ -17,30 +21,116 @@ class Config:
         value = config["section", "entry"]  # Read a value.
         config["section", "entry"] = value   # Write a value.
 
+    The configuration is kept in memory. Changes are written to the file in one go
+    `delay` seconds after the first unwritten change, when :meth:`.Config.flush` is
+    called, or when Python exits. The file is written to a temporary file first and
+    then moved into place, so a crash while writing cannot corrupt it. The file is
+    only read when the configuration is first used.
+
+    :meth:`.Config.get` and :meth:`.Config.set` are faster alternatives to indexing.
+
     Args:
-        path (str): Path to the TOML file.
+        path (str, optional): Path to the TOML file. Defaults to the path given by
+            the environment variable `FITBIT_CONFIG` or, if that is not set, to
+            `config.toml` in the root of the repository.
+        delay (float, optional): Number of seconds to wait before writing changes.
+            Defaults to one second.
+
+    Attributes:
+        path (str): Path to the TOML file. Can be changed until the configuration is
+            first used.
     """
 
-    def __init__(self, path):
-        self.path = path
-        with open(self.path, "r") as f:
-            self.data = toml.loads(f.read())
+    def __init__(self, path=None, delay=1.0):
+        self._path = path
+        self.delay = delay
+        self._data = None
+        self._lock = threading.RLock()
+        self._timer = None
+        self._dirty = False
+
+    @property
+    def path(self):
+        return _path_config() if self._path is None else self._path
+
+    @path.setter
+    def path(self, path):
+        self._path = path
+
+    @property
+    def data(self):
+        """dict: Content of the configuration. It is read when first used."""
+        if self._data is None:
+            with self._lock:
+                if self._data is None:
+                    if not os.path.exists(self.path):
+                        raise FileNotFoundError(
+                            "Cannot find your `config.toml`. "
+                            "Please carefully follow the instructions from the "
+                            "repository."
+                        )
+                    with open(self.path, "r") as f:
+                        self._data = toml.loads(f.read())
+                    atexit.register(self.flush)
+        return self._data
 
     def _write(self):
-        with open(self.path, "w") as f:
-            f.write(toml.dumps(self.data))
+        directory, name = os.path.split(os.path.abspath(self.path))
+        fd, temp = tempfile.mkstemp(prefix=name + ".", dir=directory)
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(toml.dumps(self.data))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp, self.path)
+        except BaseException:
+            os.unlink(temp)
+            raise
 
-    @_dispatch
-    def __getitem__(self, section_item: Tuple[str, str]):
-        section, item = section_item
+    def flush(self):
+        """Write all changes to the file now."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._dirty:
+                self._write()
+                self._dirty = False
+
+    def get(self, section, item):
+        """Get a value.
+
+        Args:
+            section (str): Section.
+            item (str): Entry.
+
+        Returns:
+            object: Value.
+        """
         return self.data[section][item]
 
-    @_dispatch
+    def set(self, section, item, value):
+        """Set a value.
+
+        Args:
+            section (str): Section.
+            item (str): Entry.
+            value (object): Value.
+        """
+        with self._lock:
+            self.data.setdefault(section, {})[item] = value
+            self._dirty = True
+            if self._timer is None:
+                self._timer = threading.Timer(self.delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def __getitem__(self, section_item: Tuple[str, str]):
+        return self.get(*section_item)
+
     def __setitem__(self, section_item: Tuple[str, str], value):
-        section, item = section_item
-        self.data[section][item] = value
-        self._write()
+        self.set(*section_item, value)
 
 
-config = Config(_path_config)
+config = Config()
 """:class:`Config`: Configuration."""
@@ -0,0 +1,231 @@
+__all__ = ["Endpoint", "endpoints"]
+
+
+class Endpoint:
+    """An endpoint of the API and the data which it returns.
+
+    The calls in :mod:`fitbit.api` and :mod:`fitbit.aio` are generated from these
+    descriptions, and the scheduler uses them to plan requests.
+
+    Args:
+        name (str): Name of the call, e.g. `"hr"`.
+        description (str): Description of the data, e.g.
+            `"heart rate time series"`.
+        url (str): URL relative to the user. `{date}` is replaced by the day.
+        response (str or None): Key of the response which holds the data. `None` if
+            the response itself holds the data.
+        columns (dict[str, str or None]): Columns of the data and their compact data
+            types. A data type of `None` means that the column is not converted.
+        version (float, optional): Version of the API. Defaults to 1.
+        resolution (str, optional): Resolution of an intraday time series, e.g.
+            `"1sec"`. Defaults to `None`, which means that the data is not an
+            intraday time series.
+        range_url (str, optional): URL to fetch a range of days with. `{date}` and
+            `{end}` are replaced by the first and last day. Defaults to `None`, which
+            means that the endpoint does not support ranges.
+        max_days (int, optional): Maximum number of days of one request for a range.
+            Defaults to one.
+        cost (float, optional): Relative cost of parsing and storing the data of one
+            day. Defaults to one.
+        warning (str, optional): Warning to give on every call. Calls with a warning
+            are not in :data:`fitbit.api.daily_calls`.
+        collection (str, optional): Collection of the Subscriptions API which notifies
+            of changes to the data. Defaults to `"activities"`.
+        aggregation (str, optional): How the columns are aggregated when the data is
+            resampled: `"sum"` for counts and `"mean"` for measurements. Defaults to
+            `None`, which means that the columns hold daily values or sleep stages,
+            which are carried forward.
+
+    Attributes:
+        name (str): Name of the call.
+        description (str): Description of the data.
+        url (str): URL relative to the user.
+        response (str or None): Key of the response which holds the data.
+        columns (dict[str, str or None]): Columns and their compact data types.
+        version (float): Version of the API.
+        resolution (str or None): Resolution of an intraday time series.
+        range_url (str or None): URL to fetch a range of days with.
+        max_days (int): Maximum number of days of one request for a range.
+        cost (float): Relative cost of parsing and storing the data of one day.
+        warning (str or None): Warning to give on every call.
+        collection (str): Collection of the Subscriptions API which notifies of
+            changes to the data.
+        aggregation (str or None): How the columns are aggregated when the data is
+            resampled.
+    """
+
+    def __init__(
+        self,
+        name,
+        description,
+        url,
+        response,
+        columns,
+        version=1,
+        resolution=None,
+        range_url=None,
+        max_days=1,
+        cost=1,
+        warning=None,
+        collection="activities",
+        aggregation=None,
+    ):
+        self.name = name
+        self.description = description
+        self.url = url
+        self.response = response
+        self.columns = columns
+        self.version = version
+        self.resolution = resolution
+        self.range_url = range_url
+        self.max_days = max_days
+        self.cost = cost
+        self.warning = warning
+        self.collection = collection
+        self.aggregation = aggregation
+
+    @property
+    def intraday(self):
+        """bool: The data is an intraday time series."""
+        return self.resolution is not None
+
+    @property
+    def supports_range(self):
+        """bool: A range of days can be fetched with one request."""
+        return self.range_url is not None
+
+    @property
+    def request(self):
+        """tuple[str, float]: URL and version of the request. Endpoints with the same
+        request share their responses."""
+        return self.url, self.version
+
+    def __repr__(self):
+        return f"Endpoint({self.name!r})"
+
+
+def _intraday(
+    name,
+    description,
+    activity,
+    column,
+    dtype,
+    resolution="1min",
+    aggregation="sum",
+    **kw_args,
+):
+    return Endpoint(
+        name,
+        description,
+        f"activities/{activity}/date/{{date}}/1d/{resolution}.json",
+        f"activities-{activity}-intraday",
+        {column: dtype},
+        resolution=resolution,
+        aggregation=aggregation,
+        **kw_args,
+    )
+
+
+_sleep = {
+    "url": "sleep/date/{date}.json",
+    "response": "sleep",
+    "version": 1.2,
+    "range_url": "sleep/date/{date}/{end}.json",
+    "max_days": 100,
+    "collection": "sleep",
+}
+
+endpoints = {
+    endpoint.name: endpoint
+    for endpoint in [
+        _intraday(
+            "zone",
+            "active zone minutes time series",
+            "active-zone-minutes",
+            "zone",
+            "uint16",
+            warning=(
+                "The API endpoint for intraday active zone minutes appears to be "
+                "broken. For example, see the following thread: "
+                "https://community.fitbit.com/t5/Web-API-Development"
+                "/active-zone-minutes-endpoint-throwing-error/td-p/5438823"
+            ),
+        ),
+        _intraday("cal", "calories time series", "calories", "cal", "float32"),
+        _intraday("dist", "distance time series", "distance", "dist", "float32"),
+        _intraday("elev", "elevation time series", "elevation", "elev", "float32"),
+        _intraday("floors", "floors time series", "floors", "floors", "uint16"),
+        _intraday("steps", "steps time series", "steps", "steps", "uint16"),
+        _intraday(
+            "hr",
+            "heart rate time series",
+            "heart",
+            "hr",
+            "uint8",
+            "1sec",
+            aggregation="mean",
+            cost=10,
+        ),
+        Endpoint(
+            "hrv",
+            "heart rate variability time series",
+            "hrv/date/{date}/all.json",
+            "hrv",
+            {"hrv": "float32"},
+            range_url="hrv/date/{date}/{end}/all.json",
+            max_days=30,
+            aggregation="mean",
+            # HRV, SpO2 and breathing rate are computed from the main sleep.
+            collection="sleep",
+        ),
+        Endpoint(
+            "spo2",
+            "SpO2 time series",
+            "spo2/date/{date}/all.json",
+            None,
+            {"spo2": "float32"},
+            range_url="spo2/date/{date}/{end}/all.json",
+            max_days=30,
+            aggregation="mean",
+            collection="sleep",
+        ),
+        Endpoint(
+            "br",
+            "breathing rate information",
+            "br/date/{date}/all.json",
+            "br",
+            {
+                "br_full": "float32",
+                "br_deep": "float32",
+                "br_rem": "float32",
+                "br_light": "float32",
+            },
+            range_url="br/date/{date}/{end}/all.json",
+            max_days=30,
+            collection="sleep",
+        ),
+        Endpoint(
+            "sleep_summary",
+            "summary of your sleep",
+            columns={
+                "sleep_start": None,
+                "sleep_end": None,
+                "sleep_deep_mins": "uint16",
+                "sleep_rem_mins": "uint16",
+                "sleep_light_mins": "uint16",
+                "sleep_wake_mins": "uint16",
+            },
+            **_sleep,
+        ),
+        Endpoint(
+            "sleep_series",
+            "sleep time series",
+            columns={
+                "sleep_stage_level": None,
+                "sleep_stage_dur_mins": "float32",
+            },
+            **_sleep,
+        ),
+    ]
+}
+"""dict[str, :class:`.Endpoint`]: All endpoints by name of the call."""
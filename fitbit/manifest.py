@@ -0,0 +1,193 @@
+import datetime
+import sqlite3
+import threading
+from collections import namedtuple
+from pathlib import Path
+
+from .util import days, format_date, timestamp
+
+__all__ = ["Entry", "Manifest", "manifest"]
+
+Entry = namedtuple("Entry", ["status", "rows", "fetched_timestamp_utc", "error"])
+Entry.__doc__ = """State of the data of a call at a day.
+
+Args:
+    status (str): `"fetched"` if data was fetched, `"empty"` if there was no data,
+        and `"failed"` if fetching failed.
+    rows (int): Number of rows of the data.
+    fetched_timestamp_utc (float): Time of the last attempt to fetch.
+    error (str or None): Error of the last failed attempt.
+"""
+
+
+class Manifest:
+    """Index of which days of which calls have been fetched.
+
+    For every call and day, the manifest records whether the data was fetched, was
+    empty or failed to fetch, together with the number of rows and the time of
+    fetching. Deciding which days still have to be fetched then takes one query
+    rather than opening the data of every day.
+
+    The manifest is closed until :meth:`.Manifest.open` is called::
+
+        manifest.open("output/manifest.sqlite")
+
+    Args:
+        path (str, optional): Path of the database. If given, the manifest is
+            opened.
+    """
+
+    def __init__(self, path=None):
+        self.path = None
+        self._db = None
+        self._lock = threading.Lock()
+        if path is not None:
+            self.open(path)
+
+    def open(self, path):
+        """Open the manifest.
+
+        Args:
+            path (str): Path of the database.
+        """
+        self.close()
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        with self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS days ("
+                "call TEXT NOT NULL, "
+                "day TEXT NOT NULL, "
+                "status TEXT NOT NULL, "
+                "rows INTEGER NOT NULL, "
+                "fetched_timestamp_utc REAL NOT NULL, "
+                "error TEXT, "
+                "PRIMARY KEY (call, day)"
+                ")"
+            )
+
+    def close(self):
+        """Close the manifest."""
+        if self._db is not None:
+            self._db.close()
+        self.path = None
+        self._db = None
+
+    @property
+    def is_open(self):
+        """bool: Whether the manifest is open."""
+        return self._db is not None
+
+    def _check_open(self):
+        if not self.is_open:
+            raise RuntimeError(
+                "The manifest is not open. Call `manifest.open(path)` first."
+            )
+
+    def _put(self, call, day, status, rows, error=None, fetched=None):
+        self._check_open()
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO days VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    call,
+                    format_date(day),
+                    status,
+                    rows,
+                    timestamp() if fetched is None else fetched,
+                    error,
+                ),
+            )
+
+    def record(self, call, day, rows):
+        """Record that the data of a call at a day was fetched.
+
+        Args:
+            call (str): Name of the call.
+            day (:class:`datetime.datetime`): Day.
+            rows (int): Number of rows of the data. If zero, the day is recorded as
+                empty.
+        """
+        self._put(call, day, "fetched" if rows > 0 else "empty", rows)
+
+    def record_failure(self, call, day, error):
+        """Record that fetching the data of a call at a day failed.
+
+        Args:
+            call (str): Name of the call.
+            day (:class:`datetime.datetime`): Day.
+            error (Exception or str): Error.
+        """
+        self._put(call, day, "failed", 0, error=repr(error))
+
+    def entries(self, call, start, end):
+        """Get the entries of a call from day `start` up to and including day `end`.
+
+        Args:
+            call (str): Name of the call.
+            start (:class:`datetime.datetime`): First day.
+            end (:class:`datetime.datetime`): Last day.
+
+        Returns:
+            dict[:class:`datetime.datetime`, :class:`.Entry`]: Entry of every day
+                which is in the manifest. The days are `start`, `start` plus one
+                day, et cetera.
+        """
+        self._check_open()
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT day, status, rows, fetched_timestamp_utc, error FROM days "
+                "WHERE call = ? AND day BETWEEN ? AND ?",
+                (call, format_date(start), format_date(end)),
+            ).fetchall()
+        by_date = {row[0]: Entry(*row[1:]) for row in rows}
+        return {
+            day: by_date[format_date(day)]
+            for day in days(start, end)
+            if format_date(day) in by_date
+        }
+
+    def missing_days(self, call, start, end, retry_failed=True):
+        """Get the days of a call which still have to be fetched from day `start` up
+        to and including day `end`.
+
+        Args:
+            call (str): Name of the call.
+            start (:class:`datetime.datetime`): First day.
+            end (:class:`datetime.datetime`): Last day.
+            retry_failed (bool, optional): Also return the days which failed to
+                fetch. Defaults to `True`.
+
+        Returns:
+            list[:class:`datetime.datetime`]: Missing days. The days are `start`,
+                `start` plus one day, et cetera.
+        """
+        entries = self.entries(call, start, end)
+        return [
+            day
+            for day in days(start, end)
+            if day not in entries or (retry_failed and entries[day].status == "failed")
+        ]
+
+    def scan(self, store, calls):
+        """Record all days which are in a store of parsed data. Use this to start a
+        manifest for an existing store.
+
+        Args:
+            store (:class:`.store.Store`): Store.
+            calls (list[str]): Names of the calls.
+        """
+        for call in calls:
+            for day in store.days(call):
+                rows = store.num_rows(call, day)
+                # Use the time of writing the day as the time of fetching, in the same
+                # convention as :func:`.util.timestamp`.
+                mtime = store._file(call, day).stat().st_mtime
+                fetched = datetime.datetime.utcfromtimestamp(mtime).timestamp()
+                status = "fetched" if rows > 0 else "empty"
+                self._put(call, day, status, rows, fetched=fetched)
+
+
+manifest = Manifest()
+""":class:`Manifest`: Index of which days of which calls have been fetched."""
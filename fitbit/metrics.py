@@ -0,0 +1,229 @@
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from .util import timestamp
+
+__all__ = ["Metrics", "metrics", "LogSink"]
+
+_help = {
+    "request_seconds": "Latency of requests to the API.",
+    "request_bytes": "Size of the responses of the API.",
+    "responses_total": "Responses by source: the cache, the raw store or the API.",
+    "rate_limit_wait_seconds": "Time spent waiting for the rate limiter.",
+    "rate_limit_backoffs_total": "Times that the API responded with status 429.",
+    "token_refreshes_total": "Refreshes of access tokens.",
+    "decode_seconds": "Time spent decoding responses.",
+    "build_seconds": "Time spent building data frames from decoded responses.",
+    "notifications_total": "Notifications received from the Subscriptions API.",
+}
+"""dict[str, str]: Descriptions of the metrics which the package records."""
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (
+        (k, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for k, v in labels
+    )
+    return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+
+class Metrics:
+    """Registry of metrics.
+
+    There are two kinds of metrics. Counters count events, like token refreshes, and
+    summaries observe values, like the latency of requests, and keep track of the
+    number of observations and their sum. Every metric can have labels, e.g. the
+    endpoint of a request.
+
+    Besides keeping totals, every observation is passed to the sinks as an event.
+    A sink is a function which takes in a dictionary with keys `timestamp_utc`,
+    `metric`, `type`, `value` and `labels`. See :class:`.LogSink`.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._summaries = {}
+        self._sinks = []
+
+    def _emit(self, kind, name, value, labels):
+        for sink in list(self._sinks):
+            sink(
+                {
+                    "timestamp_utc": timestamp(),
+                    "metric": name,
+                    "type": kind,
+                    "value": value,
+                    "labels": labels,
+                }
+            )
+
+    def increment(self, name, value=1, **labels):
+        """Increment a counter.
+
+        Args:
+            name (str): Name of the counter. By convention, it ends in `_total`.
+            value (float, optional): Increment. Defaults to one.
+            **labels: Labels.
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+        self._emit("counter", name, value, labels)
+
+    def observe(self, name, value, **labels):
+        """Observe a value of a summary.
+
+        Args:
+            name (str): Name of the summary. By convention, it ends in the unit,
+                e.g. `_seconds`.
+            value (float): Value.
+            **labels: Labels.
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            count, total = self._summaries.get(key, (0, 0))
+            self._summaries[key] = (count + 1, total + value)
+        self._emit("summary", name, value, labels)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Observe the duration of the body of a `with` statement in seconds.
+
+        Args:
+            name (str): Name of the summary.
+            **labels: Labels.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def add_sink(self, sink):
+        """Add a sink.
+
+        Args:
+            sink (function): Sink.
+        """
+        self._sinks.append(sink)
+
+    def remove_sink(self, sink):
+        """Remove a sink.
+
+        Args:
+            sink (function): Sink.
+        """
+        self._sinks.remove(sink)
+
+    def counter(self, name, **labels):
+        """Get the value of a counter.
+
+        Args:
+            name (str): Name of the counter.
+            **labels: Labels.
+
+        Returns:
+            float: Value.
+        """
+        with self._lock:
+            return self._counters.get((name, tuple(sorted(labels.items()))), 0)
+
+    def summary(self, name, **labels):
+        """Get the number of observations and the sum of a summary.
+
+        Args:
+            name (str): Name of the summary.
+            **labels: Labels.
+
+        Returns:
+            tuple[int, float]: Number of observations and sum.
+        """
+        with self._lock:
+            return self._summaries.get((name, tuple(sorted(labels.items()))), (0, 0))
+
+    def reset(self):
+        """Reset all metrics. The sinks are kept."""
+        with self._lock:
+            self._counters.clear()
+            self._summaries.clear()
+
+    def to_prometheus(self, prefix="fitbit_"):
+        """Export all metrics in the text format of Prometheus.
+
+        Args:
+            prefix (str, optional): Prefix of the names of the metrics. Defaults to
+                `"fitbit_"`.
+
+        Returns:
+            str: Metrics in the text format of Prometheus.
+        """
+        with self._lock:
+            counters = sorted(self._counters.items())
+            summaries = sorted(self._summaries.items())
+        lines = []
+        names = set()
+
+        def header(name, kind):
+            if name not in names:
+                names.add(name)
+                if name in _help:
+                    lines.append(f"# HELP {prefix}{name} {_help[name]}")
+                lines.append(f"# TYPE {prefix}{name} {kind}")
+
+        for (name, labels), value in counters:
+            header(name, "counter")
+            lines.append(f"{prefix}{name}{_format_labels(labels)} {value}")
+        for (name, labels), (count, total) in summaries:
+            header(name, "summary")
+            lines.append(f"{prefix}{name}_count{_format_labels(labels)} {count}")
+            lines.append(f"{prefix}{name}_sum{_format_labels(labels)} {total}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path, prefix="fitbit_"):
+        """Write all metrics in the text format of Prometheus to a file, e.g. for
+        the text file collector of the node exporter. The file is replaced
+        atomically.
+
+        Args:
+            path (str): Path of the file.
+            prefix (str, optional): Prefix of the names of the metrics. Defaults to
+                `"fitbit_"`.
+        """
+        path = str(path)
+        temp = f"{path}.{os.getpid()}.tmp"
+        with open(temp, "w") as f:
+            f.write(self.to_prometheus(prefix))
+        os.replace(temp, path)
+
+
+class LogSink:
+    """Sink which writes every event as a line of JSON.
+
+    Args:
+        path (str, optional): File to append the events to. Defaults to writing to
+            standard error.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        line = json.dumps(event) + "\n"
+        with self._lock:
+            if self.path is None:
+                sys.stderr.write(line)
+            else:
+                with open(self.path, "a") as f:
+                    f.write(line)
+
+
+metrics = Metrics()
+""":class:`Metrics`: Registry of the metrics of the package."""
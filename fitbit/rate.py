@@ -1,40 +1,196 @@
+import json
+import os
+import threading
 import time
+from contextlib import contextmanager
+from pathlib import Path
 
 from .config import config
+from .metrics import metrics
 from .util import timestamp
 
-__all__ = ["rate_limiter"]
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    # `fcntl` is not available on Windows. There, only threads are synchronised.
+    fcntl = None
+
+__all__ = ["RateLimiter", "rate_limiter"]
 
 
 class RateLimiter:
-    """Rate limiter.
+    """Rate limiter which models the hourly quota of the API as a token bucket.
+
+    The bucket holds at most `capacity` requests and refills at `capacity / period`
+    requests per second, so bursts up to the full quota are allowed. The remaining
+    quota and the time of its reset reported by the API can be fed back with
+    :meth:`.RateLimiter.update`, after which the bucket holds at most the remaining
+    quota and only refills when the quota resets.
+
+    The state of the bucket is kept in a JSON file which is locked whenever it is
+    accessed, so all threads and processes on the same host which use the same file
+    share one quota.
 
     Args:
-        frequency (float, optional): Frequency of allowed requests. Defaults to
-            `150 / 3600` Hz.
+        capacity (int, optional): Number of allowed requests per period. Defaults
+            to 150.
+        period (float, optional): Period in seconds. Defaults to one hour.
+        path (str or function, optional): Path to the file with the state of the
+            bucket, or a function which returns the path when the bucket is first
+            used. If not given, the state is only shared between threads.
     """
 
-    def __init__(self, frequency: float = 150 / 3600):
-        self.frequency = frequency
-        self.last = config["session", "last_api_request_timestamp_utc"]
+    def __init__(self, capacity: int = 150, period: float = 3600, path=None):
+        self.capacity = capacity
+        self.period = period
+        self.path = path
+        self._lock = threading.Lock()
+        # State of the bucket, which is only valid within :meth:`_state`.
+        self.tokens = capacity
+        self.last = timestamp()
+        self.reset = None
 
-    def __enter__(self):
-        now = timestamp()
-        # Sleep to ensure that we don't exceed the rate limit.
-        while self.last + 1 / self.frequency > now:
-            to_sleep = self.last + 1 / self.frequency - now
-            print(f"Waiting {to_sleep:.1f} seconds to not exceed API rate limit.")
-            # Add 10 milliseconds to ensure that we _really_ slept enough.
-            time.sleep(to_sleep + 0.01)
-            now = timestamp()
+    @property
+    def frequency(self) -> float:
+        """float: Frequency at which the bucket refills."""
+        return self.capacity / self.period
+
+    @contextmanager
+    def _state(self):
+        """Lock the state of the bucket, load it, and save it afterwards."""
+        with self._lock:
+            path = self.path() if callable(self.path) else self.path
+            if path is None:
+                yield
+                return
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                if fcntl:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                with os.fdopen(os.dup(fd), "r+") as f:
+                    try:
+                        state = json.loads(f.read())
+                        self.tokens = state["tokens"]
+                        self.last = state["last_timestamp_utc"]
+                        self.reset = state["reset_timestamp_utc"]
+                    except (ValueError, KeyError):
+                        # The file is new or corrupted. Assume that the full quota is
+                        # available. The API will tell us otherwise after the first
+                        # request.
+                        self.tokens = self.capacity
+                        self.last = timestamp()
+                        self.reset = None
+                    yield
+                    f.seek(0)
+                    f.truncate()
+                    f.write(
+                        json.dumps(
+                            {
+                                "tokens": self.tokens,
+                                "last_timestamp_utc": self.last,
+                                "reset_timestamp_utc": self.reset,
+                            }
+                        )
+                    )
+            finally:
+                # Closing the file releases the lock.
+                os.close(fd)
 
-        # We're good now.
+    def _refill(self, now):
+        if self.reset is not None:
+            # The API told us when the quota resets. Until then, only the API can
+            # tell us that more requests are available.
+            if now >= self.reset:
+                self.tokens = self.capacity
+                self.reset = None
+        else:
+            elapsed = max(now - self.last, 0)
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.frequency)
         self.last = now
-        config["session", "last_api_request_timestamp_utc"] = now
+
+    def _acquire(self):
+        """Attempt to take a token from the bucket.
+
+        Returns:
+            float: Zero if a token was taken, otherwise the number of seconds to wait
+                before trying again.
+        """
+        with self._state():
+            now = timestamp()
+            self._refill(now)
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            elif self.reset is not None:
+                return self.reset - now
+            else:
+                return (1 - self.tokens) / self.frequency
+
+    def __enter__(self):
+        # Sleep to ensure that we don't exceed the rate limit.
+        with metrics.timer("rate_limit_wait_seconds"):
+            while True:
+                to_sleep = self._acquire()
+                if to_sleep <= 0:
+                    break
+                print(f"Waiting {to_sleep:.1f} seconds to not exceed API rate limit.")
+                # Add 10 milliseconds to ensure that we _really_ slept enough.
+                time.sleep(to_sleep + 0.01)
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         pass
 
+    def update(self, headers):
+        """Synchronise with the rate limit reported by the API.
+
+        The remaining quota can only lower the number of tokens: the response may
+        have been sent before other threads or processes took tokens for requests
+        which are still in flight.
+
+        Args:
+            headers (dict[str, str]): Headers of a response of the API.
+        """
+        with self._state():
+            now = timestamp()
+            self._refill(now)
+            if "Fitbit-Rate-Limit-Remaining" in headers:
+                remaining = int(headers["Fitbit-Rate-Limit-Remaining"])
+                self.tokens = min(self.tokens, remaining)
+            if "Fitbit-Rate-Limit-Reset" in headers:
+                self.reset = now + int(headers["Fitbit-Rate-Limit-Reset"])
+
+    def backoff(self, retry_after):
+        """Stop making requests until the quota resets. Call this when the API
+        responds with HTTP status 429.
+
+        Args:
+            retry_after (float): Number of seconds until the quota resets.
+        """
+        metrics.increment("rate_limit_backoffs_total")
+        with self._state():
+            self.tokens = 0
+            self.reset = timestamp() + retry_after
+
+
+def _retry_after(headers):
+    """Get the number of seconds until the quota resets from a response with HTTP
+    status 429.
+
+    Args:
+        headers (dict[str, str]): Headers of the response.
+
+    Returns:
+        float: Value of `Retry-After` or, if that is missing, of
+            `Fitbit-Rate-Limit-Reset`. Defaults to one minute.
+    """
+    for header in ["Retry-After", "Fitbit-Rate-Limit-Reset"]:
+        if header in headers:
+            return float(headers[header])
+    return 60
+
 
-rate_limiter = RateLimiter()
-""":class:`RateLimiter`: Rate limiter."""
+rate_limiter = RateLimiter(
+    path=lambda: str(Path(config.path).parent / "rate_limit.json"),
+)
+""":class:`RateLimiter`: Rate limiter shared by all processes using the same
+configuration."""
@@ -0,0 +1,176 @@
+import datetime
+import gzip
+import hashlib
+import os
+import sqlite3
+import threading
+from pathlib import Path
+
+from .util import timestamp
+
+__all__ = ["RawStore", "raw_store"]
+
+
+class RawStore:
+    """Persistent store of the raw responses of the API.
+
+    Responses are stored compressed and content-addressed: a response is saved in a
+    file named after the SHA-256 hash of its content, and an index maps the path of
+    the request to that hash. Identical responses are therefore stored once.
+
+    A response for a day is only complete once the day is long enough in the past
+    that all data has been synced. Responses fetched at least `immutable_after` days
+    after the day they cover are considered final and are always served from the
+    store. Responses fetched earlier are fetched again.
+
+    The store is closed until :meth:`.RawStore.open` is called::
+
+        raw_store.open("output/raw")
+
+    Args:
+        path (str, optional): Directory of the store. If given, the store is opened.
+        immutable_after (int, optional): Number of days after which the data of a
+            day is considered final. Defaults to three.
+
+    Attributes:
+        immutable_after (int): Number of days after which the data of a day is
+            considered final.
+    """
+
+    def __init__(self, path=None, immutable_after=3):
+        self.immutable_after = immutable_after
+        self.path = None
+        self._db = None
+        self._lock = threading.Lock()
+        if path is not None:
+            self.open(path)
+
+    def open(self, path):
+        """Open the store.
+
+        Args:
+            path (str): Directory of the store.
+        """
+        self.close()
+        self.path = Path(path)
+        (self.path / "objects").mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(
+            str(self.path / "index.sqlite"),
+            check_same_thread=False,
+        )
+        with self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "path TEXT PRIMARY KEY, "
+                "day TEXT NOT NULL, "
+                "digest TEXT NOT NULL, "
+                "fetched_timestamp_utc REAL NOT NULL"
+                ")"
+            )
+
+    def close(self):
+        """Close the store."""
+        if self._db is not None:
+            self._db.close()
+        self.path = None
+        self._db = None
+
+    @property
+    def is_open(self):
+        """bool: Whether the store is open."""
+        return self._db is not None
+
+    def _object(self, digest):
+        return self.path / "objects" / digest[:2] / (digest + ".json.gz")
+
+    def _lookup(self, path):
+        with self._lock:
+            return self._db.execute(
+                "SELECT day, digest, fetched_timestamp_utc FROM responses "
+                "WHERE path = ?",
+                (path,),
+            ).fetchone()
+
+    def load(self, path):
+        """Load a stored response, regardless of whether it is final.
+
+        Args:
+            path (str): Path of the request.
+
+        Returns:
+            bytes or None: Response, or `None` if it is not in the store.
+        """
+        if not self.is_open:
+            return None
+        row = self._lookup(path)
+        if row is None:
+            return None
+        with gzip.open(self._object(row[1]), "rb") as f:
+            return f.read()
+
+    def get(self, path, since=None):
+        """Get a stored response, but only if it is final.
+
+        Args:
+            path (str): Path of the request.
+            since (float, optional): Only return the response if it was fetched at
+                or after this time, in which case it is returned even if it is not
+                final.
+
+        Returns:
+            bytes or None: Response, or `None` if it is not in the store or should
+                be fetched again.
+        """
+        if not self.is_open:
+            return None
+        row = self._lookup(path)
+        if row is None:
+            return None
+        day, _, fetched = row
+        if since is not None:
+            return self.load(path) if fetched >= since else None
+        day = datetime.datetime.strptime(day, "%Y-%m-%d")
+        fetched = datetime.datetime.utcfromtimestamp(fetched)
+        if fetched - day < datetime.timedelta(days=self.immutable_after + 1):
+            return None
+        return self.load(path)
+
+    def put(self, path, day, content):
+        """Store a response.
+
+        Args:
+            path (str): Path of the request.
+            day (:class:`datetime.datetime`): Last day covered by the response.
+            content (bytes): Response.
+        """
+        if not self.is_open:
+            return
+        digest = hashlib.sha256(content).hexdigest()
+        target = self._object(digest)
+        if not target.exists():
+            target.parent.mkdir(exist_ok=True)
+            temp = target.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            with gzip.open(temp, "wb") as f:
+                f.write(content)
+            os.replace(temp, target)
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+                (path, day.strftime("%Y-%m-%d"), digest, timestamp()),
+            )
+
+    def paths(self):
+        """Get the paths of all stored responses.
+
+        Returns:
+            list[str]: Paths.
+        """
+        if not self.is_open:
+            return []
+        with self._lock:
+            rows = self._db.execute("SELECT path FROM responses ORDER BY path")
+            return [path for path, in rows]
+
+
+raw_store = RawStore()
+""":class:`RawStore`: Store of the raw responses of the API."""
@@ -0,0 +1,182 @@
+"""Record responses of the API and replay them from a local server.
+
+Record the responses of real requests to a directory of fixtures::
+
+    with record("fixtures"):
+        hr(authenticate(), day)
+
+and later replay them, without an account or network access::
+
+    with replay("fixtures"):
+        hr("token", day)
+
+Every fixture is a JSON file which holds the status, the relevant headers and the
+body of one response.
+"""
+
+import base64
+import json
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from .transport import transport
+from .util import _BackgroundServer
+
+__all__ = ["save_fixture", "record", "ReplayServer", "replay"]
+
+_headers = [
+    "Content-Type",
+    "Retry-After",
+    "Fitbit-Rate-Limit-Limit",
+    "Fitbit-Rate-Limit-Remaining",
+    "Fitbit-Rate-Limit-Reset",
+]
+"""list[str]: Headers of responses which are recorded."""
+
+
+def _fixture(directory, method, path):
+    path = path.strip("/")
+    if path.endswith(".json"):
+        path = path[: -len(".json")]
+    return Path(directory) / (method + "_" + path.replace("/", "_") + ".json")
+
+
+def save_fixture(directory, method, path, body, status=200, headers=None):
+    """Save a response as a fixture.
+
+    Args:
+        directory (str): Directory of the fixtures.
+        method (str): HTTP method of the request.
+        path (str): Path of the request, without the query.
+        body (bytes or object): Body of the response. If it is not bytes, it is
+            encoded as JSON.
+        status (int, optional): Status. Defaults to 200.
+        headers (dict[str, str], optional): Headers of the response.
+    """
+    if not isinstance(body, bytes):
+        # Encode compactly, like the API does.
+        body = json.dumps(body, separators=(",", ":")).encode()
+    headers = {"Content-Type": "application/json", **(headers or {})}
+    fixture = _fixture(directory, method, path)
+    fixture.parent.mkdir(parents=True, exist_ok=True)
+    with open(fixture, "w") as f:
+        json.dump(
+            {
+                "status": status,
+                "headers": {k: v for k, v in headers.items() if k in _headers},
+                "body": base64.b64encode(body).decode(),
+            },
+            f,
+        )
+
+
+@contextmanager
+def record(directory):
+    """Record every response received through :data:`fitbit.transport.transport`.
+
+    Responses of the authentication endpoints are not recorded, because they hold
+    tokens. Only the headers of responses in :data:`_headers` are recorded, so
+    headers of requests, like `Authorization`, never end up in fixtures.
+
+    Args:
+        directory (str): Directory to save the fixtures in.
+    """
+    session = transport.session
+    original = session.request
+
+    def request(method, url, *args, **kw_args):
+        res = original(method, url, *args, **kw_args)
+        path = url[len(transport.base_url) :].split("?", 1)[0]
+        if path.startswith("/oauth2/"):
+            return res
+        save_fixture(
+            directory,
+            method,
+            path,
+            res.content,
+            status=res.status_code,
+            headers=res.headers,
+        )
+        return res
+
+    session.request = request
+    try:
+        yield
+    finally:
+        del session.request
+
+
+class ReplayServer(_BackgroundServer):
+    """A local server which replays fixtures.
+
+    Requests for which there is no fixture get status 404. All requests are
+    recorded in :attr:`.ReplayServer.requests`.
+
+    Args:
+        directory (str): Directory of the fixtures.
+
+    Attributes:
+        requests (list[tuple[str, str]]): Method and path of every request.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.requests = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _replay(self):
+                # Consume the body of the request, so the connection can be reused.
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                path = self.path.split("?", 1)[0]
+                server.requests.append((self.command, path))
+                fixture = _fixture(server.directory, self.command, path)
+                if fixture.exists():
+                    with open(fixture) as f:
+                        fixture = json.load(f)
+                    status = fixture["status"]
+                    headers = fixture["headers"]
+                    body = base64.b64decode(fixture["body"])
+                else:
+                    status = 404
+                    headers = {"Content-Type": "application/json"}
+                    body = json.dumps(
+                        {"errors": [{"message": f"No fixture for {path}."}]}
+                    ).encode()
+                self.send_response(status)
+                for k, v in headers.items():
+                    self.send_header(k, v)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = _replay
+            do_POST = _replay
+
+            def log_message(self, fmt, *args):
+                pass  # Do nothing to hide the output.
+
+        super().__init__(ThreadingHTTPServer(("localhost", 0), Handler))
+
+
+@contextmanager
+def replay(directory):
+    """Direct all requests through :data:`fitbit.transport.transport` to a
+    :class:`.ReplayServer`.
+
+    Args:
+        directory (str): Directory of the fixtures.
+
+    Returns:
+        :class:`.ReplayServer`: Server.
+    """
+    base_url = transport.base_url
+    with ReplayServer(directory) as server:
+        transport.base_url = server.url
+        try:
+            yield server
+        finally:
+            transport.base_url = base_url
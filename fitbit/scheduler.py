@@ -0,0 +1,227 @@
+import datetime
+import heapq
+import threading
+import time
+
+from .endpoints import endpoints
+
+__all__ = ["Job", "plan", "Scheduler"]
+
+
+class Job:
+    """A call of the API for one day or for a range of days.
+
+    Args:
+        call (str): Name of the call.
+        day (:class:`datetime.datetime`): Day in your local time zero. For a range
+            of days, this is the first day.
+        end (:class:`datetime.datetime`, optional): Last day of a range of days.
+
+    Attributes:
+        call (str): Name of the call.
+        day (:class:`datetime.datetime`): Day in your local time zero.
+        end (:class:`datetime.datetime` or None): Last day of a range of days.
+        attempts (int): Number of times that the job has been attempted.
+    """
+
+    def __init__(self, call, day, end=None):
+        self.call = call
+        self.day = day
+        self.end = end
+        self.attempts = 0
+
+    @property
+    def priority(self):
+        """tuple: Priority of the job. Lower comes first: newer days come first and,
+        for the same day, cheaper calls come first. Calls which share a request come
+        right after each other, so the second call is served by the cache."""
+        endpoint = endpoints[self.call]
+        last = self.day if self.end is None else self.end
+        return -last.toordinal(), endpoint.cost, endpoint.request, self.call
+
+    def __repr__(self):
+        if self.end is None:
+            return f"Job({self.call!r}, {self.day.strftime('%Y-%m-%d')!r})"
+        return (
+            f"Job({self.call!r}, {self.day.strftime('%Y-%m-%d')!r}, "
+            f"end={self.end.strftime('%Y-%m-%d')!r})"
+        )
+
+
+def plan(calls, days):
+    """Plan the jobs to fetch calls at days.
+
+    Calls which support ranges fetch runs of consecutive days in jobs for ranges of
+    at most :attr:`.endpoints.Endpoint.max_days` days. Other calls get one job per
+    day.
+
+    Args:
+        calls (iterable[str]): Names of the calls.
+        days (iterable[:class:`datetime.datetime`]): Days.
+
+    Returns:
+        list[:class:`.Job`]: Jobs.
+    """
+    days = sorted(days)
+    jobs = []
+    for call in calls:
+        endpoint = endpoints[call]
+        if not endpoint.supports_range:
+            jobs.extend(Job(call, day) for day in days)
+            continue
+        first = None
+        for i, day in enumerate(days):
+            if first is None:
+                first = day
+            last_of_run = i + 1 == len(days) or days[
+                i + 1
+            ].date() != day.date() + datetime.timedelta(days=1)
+            full = (day.date() - first.date()).days + 1 == endpoint.max_days
+            if last_of_run or full:
+                jobs.append(Job(call, first) if first is day else Job(call, first, day))
+                first = None
+    return jobs
+
+
+def _should_retry(e):
+    """Check whether a failed job should be retried.
+
+    Args:
+        e (Exception): Exception raised by the job.
+
+    Returns:
+        bool: `True` for connection errors, time-outs and server errors, and `False`
+            otherwise.
+    """
+    import requests
+
+    if isinstance(e, (requests.ConnectionError, requests.Timeout)):
+        return True
+    if isinstance(e, requests.HTTPError) and e.response is not None:
+        return e.response.status_code >= 500
+    return False
+
+
+def _print_progress(done, total, job, result):
+    status = "failed: " + repr(result) if isinstance(result, Exception) else "done"
+    days = job.day.strftime("%Y-%m-%d")
+    if job.end is not None:
+        days += " to " + job.end.strftime("%Y-%m-%d")
+    print(f"[{done}/{total}] {job.call} {days}: {status}")
+
+
+class Scheduler:
+    """Run jobs concurrently on a pool of threads.
+
+    Jobs are run in order of :attr:`.Job.priority`. Every job should go through the
+    rate limiter, which all threads share, so the threads together use up the quota
+    while other threads parse and store data. Jobs which fail with an error that
+    might be temporary are retried after an exponentially increasing delay.
+
+    Args:
+        workers (int, optional): Number of threads. Defaults to four.
+        max_retries (int, optional): Maximum number of retries of a job. Defaults
+            to three.
+        backoff (float, optional): Delay in seconds before the first retry. Every
+            next retry waits twice as long. Defaults to ten seconds.
+        should_retry (function, optional): Function which takes in the exception
+            raised by a job and decides whether the job should be retried.
+        progress (function, optional): Function called as
+            `progress(done, total, job, result)` whenever a job completes. Defaults
+            to printing a line.
+    """
+
+    def __init__(
+        self,
+        workers=4,
+        max_retries=3,
+        backoff=10,
+        should_retry=_should_retry,
+        progress=_print_progress,
+    ):
+        self.workers = workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.should_retry = should_retry
+        self.progress = progress
+
+    def run(self, jobs, fn):
+        """Run jobs.
+
+        Args:
+            jobs (iterable[:class:`.Job`]): Jobs.
+            fn (function): Function which runs a job. It is called as
+                `fn(job.call, job.day)` or, for a job for a range of days, as
+                `fn(job.call, job.day, job.end)`.
+
+        Returns:
+            dict[:class:`.Job`, object]: For every job, the result of `fn` or, if the
+                job failed, the exception.
+        """
+        jobs = list(jobs)
+        results = {}
+        # Heap of `(ready_timestamp, priority, index, job)`.
+        queue = [(0, job.priority, i, job) for i, job in enumerate(jobs)]
+        heapq.heapify(queue)
+        in_flight = [0]
+        cond = threading.Condition()
+
+        def next_job():
+            with cond:
+                while True:
+                    if not queue and in_flight[0] == 0:
+                        # All work is done.
+                        cond.notify_all()
+                        return None
+                    if queue:
+                        ready, priority, i, job = queue[0]
+                        wait = ready - time.monotonic()
+                        if wait <= 0:
+                            heapq.heappop(queue)
+                            in_flight[0] += 1
+                            return i, job
+                        cond.wait(wait)
+                    else:
+                        cond.wait()
+
+        def worker():
+            while True:
+                popped = next_job()
+                if popped is None:
+                    return
+                i, job = popped
+                job.attempts += 1
+                try:
+                    try:
+                        if job.end is None:
+                            result = fn(job.call, job.day)
+                        else:
+                            result = fn(job.call, job.day, job.end)
+                    except Exception as e:
+                        result = e
+                    with cond:
+                        if (
+                            isinstance(result, Exception)
+                            and job.attempts <= self.max_retries
+                            and self.should_retry(result)
+                        ):
+                            delay = self.backoff * 2 ** (job.attempts - 1)
+                            ready = time.monotonic() + delay
+                            heapq.heappush(queue, (ready, job.priority, i, job))
+                        else:
+                            results[job] = result
+                            if self.progress:
+                                self.progress(len(results), len(jobs), job, result)
+                finally:
+                    # Also if the job raised e.g. `KeyboardInterrupt`, which ends this
+                    # worker, so the other workers do not wait for it forever.
+                    with cond:
+                        in_flight[0] -= 1
+                        cond.notify_all()
+
+        threads = [threading.Thread(target=worker) for _ in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
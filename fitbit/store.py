@@ -0,0 +1,531 @@
+import datetime
+import json
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+from .endpoints import endpoints
+from .util import format_date
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    # `fcntl` is not available on Windows. There, only threads are synchronised.
+    fcntl = None
+
+__all__ = ["Store", "store"]
+
+_rollups = ["1min", "1h", "1D"]
+"""list[str]: Resolutions of the rollups of intraday time series, from fine to
+coarse."""
+
+_statistics = ["count", "min", "max", "mean", "sum"]
+"""list[str]: Statistics of the rollups."""
+
+
+def _compact(df):
+    """Convert the columns of a data frame to compact data types where the values
+    survive the conversion.
+
+    Args:
+        df (:class:`pandas.DataFrame`): Data frame.
+
+    Returns:
+        :class:`pandas.DataFrame`: Data frame with compact data types.
+    """
+    from .compact import _dtypes, _narrow
+
+    df = df.copy()
+    for column, dtype in _dtypes.items():
+        if column in df.columns:
+            df[column] = _narrow(df[column].to_numpy(), dtype)
+    return df
+
+
+def _rollup(series, resolution):
+    """Compute the rollup of an intraday time series.
+
+    Args:
+        series (:class:`pandas.Series`): Time series indexed by date.
+        resolution (str): Resolution of the rollup, e.g. `"1h"`.
+
+    Returns:
+        :class:`pandas.DataFrame`: For every interval with data, the number of
+            values, the minimum, the maximum, the mean and the sum, indexed by the
+            start of the interval.
+    """
+    # Compute in double precision. The minimum and maximum are converted back below.
+    df = series.astype("float64").resample(resolution).agg(_statistics)
+    df = df[df["count"] > 0].copy()
+    df["count"] = df["count"].astype("uint32")
+    df["min"] = df["min"].astype(series.dtype)
+    df["max"] = df["max"].astype(series.dtype)
+    df.index.name = "date"
+    return df
+
+
+def _rollup_resolution(resample, start, end):
+    """Find the coarsest rollup from which a resampling can be computed.
+
+    Args:
+        resample (str): Frequency of the resampling.
+        start (:class:`pandas.Timestamp` or None): Start of the range.
+        end (:class:`pandas.Timestamp` or None): End of the range.
+
+    Returns:
+        str or None: Resolution of the rollup, or `None` if no rollup can be used.
+    """
+    import pandas as pd
+    from pandas.tseries.frequencies import to_offset
+    from pandas.tseries.offsets import Tick
+
+    try:
+        offset = to_offset(resample)
+    except ValueError:
+        return None
+    for resolution in reversed(_rollups):
+        step = pd.Timedelta(resolution)
+        if isinstance(offset, Tick):
+            # Fixed frequencies are binned from midnight, so the bins consist of
+            # whole intervals of the rollup if the frequency is a multiple.
+            if pd.Timedelta(offset) % step != pd.Timedelta(0):
+                continue
+        elif step != pd.Timedelta("1D"):
+            # Other frequencies, like weeks and months, are binned by days.
+            continue
+        # Intervals cut by the range cannot be computed from the rollup.
+        if all(t is None or t == t.floor(step) for t in (start, end)):
+            return resolution
+    return None
+
+
+class Store:
+    """Store of parsed data as a Parquet dataset.
+
+    Every call has a dataset of its own, which is partitioned by month and holds one
+    file per day::
+
+        <path>/hr/month=2023-03/2023-03-05.parquet
+
+    Writing a day again replaces the file of that day, so writes are idempotent. The
+    days together form a dataset which can be read directly, so data never needs to
+    be collated into a single file. Columns are stored with compact data types, e.g.
+    heart rate as an unsigned 8-bit integer.
+
+    For intraday time series, writing a day also updates rollups: the number of
+    values, the minimum, the maximum, the mean and the sum per minute, hour and day.
+    A rollup holds one file per month, which records the days that it covers::
+
+        <path>/_rollups/hr/1h/month=2023-03/2023-03.parquet
+
+    :meth:`.Store.load` computes resamplings from these rollups whenever it can, so
+    hourly or daily aggregates over long ranges read a few small files rather than
+    all data.
+
+    The store is closed until :meth:`.Store.open` is called. This requires
+    `pyarrow`.
+
+    Args:
+        path (str, optional): Directory of the store. If given, the store is opened.
+    """
+
+    def __init__(self, path=None):
+        self.path = None
+        self._lock = threading.Lock()
+        if path is not None:
+            self.open(path)
+
+    def open(self, path):
+        """Open the store.
+
+        Args:
+            path (str): Directory of the store.
+        """
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    def close(self):
+        """Close the store."""
+        self.path = None
+
+    @property
+    def is_open(self):
+        """bool: Whether the store is open."""
+        return self.path is not None
+
+    def _check_open(self):
+        if not self.is_open:
+            raise RuntimeError("The store is not open. Call `store.open(path)` first.")
+
+    def _file(self, call, day):
+        return (
+            self.path
+            / call
+            / day.strftime("month=%Y-%m")
+            / day.strftime("%Y-%m-%d.parquet")
+        )
+
+    def _rollup_root(self, call, resolution):
+        # The directory starts with an underscore, so it is never picked up as a
+        # dataset of a call.
+        return self.path / "_rollups" / call / resolution
+
+    def _rollup_file(self, call, resolution, day):
+        return (
+            self._rollup_root(call, resolution)
+            / day.strftime("month=%Y-%m")
+            / day.strftime("%Y-%m.parquet")
+        )
+
+    @staticmethod
+    def _write_table(path, df, days=None):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        df = df.reset_index()
+        df["date"] = df["date"].astype("datetime64[ns]")
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if days is not None:
+            metadata = dict(table.schema.metadata)
+            metadata[b"fitbit_days"] = json.dumps(sorted(days)).encode()
+            table = table.replace_schema_metadata(metadata)
+        # Write to a temporary file first, so a partially written day is never read.
+        # Its name starts with a dot, so it is not picked up as part of the dataset.
+        temp = path.parent / f".{path.name}.{os.getpid()}.{threading.get_ident()}"
+        pq.write_table(table, str(temp))
+        os.replace(temp, path)
+
+    def write(self, call, day, df):
+        """Write the data of a call at a day, replacing any data of that day.
+
+        For intraday time series, also replaces the rollups of that day.
+
+        Args:
+            call (str): Name of the call.
+            day (:class:`datetime.datetime`): Day.
+            df (:class:`pandas.DataFrame`): Data indexed by date.
+        """
+        self._check_open()
+        df = _compact(df)
+        # Write the rollups first. Then a day which is in the store always has
+        # rollups, even if writing is interrupted.
+        self._write_rollups(call, day, df)
+        self._write_table(self._file(call, day), df)
+
+    def _write_rollups(self, call, day, df):
+        endpoint = endpoints.get(call)
+        if endpoint is None or not endpoint.intraday:
+            return
+        (column,) = endpoint.columns
+        for resolution in _rollups:
+            self._update_rollup(
+                self._rollup_file(call, resolution, day),
+                day,
+                _rollup(df[column], resolution),
+            )
+
+    @contextmanager
+    def _locked(self, path):
+        """Lock a file for all threads and processes."""
+        with self._lock:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # The name of the lock starts with a dot, so it is not picked up as part
+            # of the dataset.
+            fd = os.open(path.parent / f".{path.name}.lock", os.O_RDWR | os.O_CREAT)
+            try:
+                if fcntl:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                yield
+            finally:
+                # Closing the file releases the lock.
+                os.close(fd)
+
+    @staticmethod
+    def _rollup_days(path):
+        """Get the days which a file of a rollup covers."""
+        import pyarrow.parquet as pq
+
+        if not path.exists():
+            return set()
+        metadata = pq.read_schema(str(path)).metadata or {}
+        return set(json.loads(metadata.get(b"fitbit_days", b"[]")))
+
+    def _update_rollup(self, path, day, rollup):
+        """Replace the rollup of a day in the file of its month."""
+        import pandas as pd
+        import pyarrow.parquet as pq
+
+        with self._locked(path):
+            days = self._rollup_days(path)
+            if path.exists():
+                df = pq.read_table(str(path)).to_pandas().set_index("date")
+                df = df[df.index.normalize() != pd.Timestamp(day).normalize()]
+                if len(df) > 0:
+                    rollup = pd.concat([df, rollup]).sort_index()
+            days.add(format_date(day))
+            self._write_table(path, rollup, days=days)
+
+    def rebuild_rollups(self, call):
+        """Compute the rollups of all days of an intraday time series again. Use this
+        for a store which was written before rollups existed.
+
+        Args:
+            call (str): Name of the call.
+        """
+        self._check_open()
+        for day in self.days(call):
+            self._write_rollups(call, day, self.read_day(call, day))
+
+    def has(self, call, day):
+        """Check whether the data of a call at a day is in the store.
+
+        Args:
+            call (str): Name of the call.
+            day (:class:`datetime.datetime`): Day.
+
+        Returns:
+            bool: `True` if the data is in the store, otherwise `False`.
+        """
+        self._check_open()
+        return self._file(call, day).exists()
+
+    def days(self, call):
+        """Get all days of a call which are in the store.
+
+        Args:
+            call (str): Name of the call.
+
+        Returns:
+            list[:class:`datetime.datetime`]: Days.
+        """
+        self._check_open()
+        return sorted(
+            datetime.datetime.strptime(f.stem, "%Y-%m-%d")
+            for f in (self.path / call).glob("month=*/*.parquet")
+        )
+
+    def num_rows(self, call, day):
+        """Get the number of rows of the data of a call at a day without reading the
+        data.
+
+        Args:
+            call (str): Name of the call.
+            day (:class:`datetime.datetime`): Day.
+
+        Returns:
+            int: Number of rows.
+        """
+        import pyarrow.parquet as pq
+
+        self._check_open()
+        return pq.ParquetFile(str(self._file(call, day))).metadata.num_rows
+
+    def read_day(self, call, day):
+        """Read the data of a call at a day.
+
+        Args:
+            call (str): Name of the call.
+            day (:class:`datetime.datetime`): Day.
+
+        Returns:
+            :class:`pandas.DataFrame`: Data indexed by date.
+        """
+        import pyarrow.parquet as pq
+
+        self._check_open()
+        return pq.read_table(str(self._file(call, day))).to_pandas().set_index("date")
+
+    def dataset(self, call):
+        """Get the dataset of a call.
+
+        Args:
+            call (str): Name of the call.
+
+        Returns:
+            :class:`pyarrow.dataset.Dataset`: Dataset with all days of the call.
+        """
+        self._check_open()
+        return self._dataset(self.path / call)
+
+    def rollup_dataset(self, call, resolution):
+        """Get the dataset of a rollup of an intraday time series.
+
+        Args:
+            call (str): Name of the call.
+            resolution (str): Resolution of the rollup: `"1min"`, `"1h"` or `"1D"`.
+
+        Returns:
+            :class:`pyarrow.dataset.Dataset`: Dataset with the rollup of all days of
+                the call.
+        """
+        self._check_open()
+        if resolution not in _rollups:
+            raise ValueError(
+                f"Invalid resolution `{resolution}`. "
+                f"Must be one of {', '.join(_rollups)}."
+            )
+        return self._dataset(self._rollup_root(call, resolution))
+
+    @staticmethod
+    def _dataset(path):
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        def dataset(schema=None):
+            return ds.dataset(
+                str(path),
+                schema=schema,
+                format="parquet",
+                partitioning="hive",
+                exclude_invalid_files=False,
+            )
+
+        # Columns are narrowed per day, so files can have different types, e.g. a day
+        # of which the values are exact in `float32`. A dataset takes its schema from
+        # the first file and casts the others to it, so unify the schemas of all
+        # files instead, promoting e.g. `float32` to `float64`.
+        result = dataset()
+        schemas = [fragment.physical_schema for fragment in result.get_fragments()]
+        if len(schemas) > 1:
+            schema = pa.unify_schemas(schemas, promote_options="permissive")
+            month = result.schema.field("month")
+            result = dataset(schema.append(month))
+        return result
+
+    def _has_rollups(self, call, resolution, start, end):
+        """Check whether a rollup covers all days of a call in a range of time."""
+        first = None if start is None else format_date(start)
+        last = None if end is None else format_date(end)
+        days = {
+            f.stem
+            for f in (self.path / call).glob("month=*/*.parquet")
+            if (first is None or f.stem >= first) and (last is None or f.stem <= last)
+        }
+        covered = set()
+        for month in {day[:7] for day in days}:
+            month = datetime.datetime.strptime(month, "%Y-%m")
+            covered |= self._rollup_days(self._rollup_file(call, resolution, month))
+        return days <= covered
+
+    def load(
+        self,
+        call,
+        start=None,
+        end=None,
+        columns=None,
+        resample=None,
+        how="mean",
+        rollup=None,
+    ):
+        """Load the data of a call in a range of time.
+
+        Only the files and row groups which overlap with the range are read. For
+        intraday time series, resampling with `how` one of `"count"`, `"min"`,
+        `"max"`, `"mean"` or `"sum"` is computed from the rollups if the frequency is
+        a multiple of a minute, an hour or a day and the range starts and ends on
+        the intervals of that rollup. The result is the same as resampling the raw
+        data, up to the precision of sums.
+
+        Args:
+            call (str): Name of the call.
+            start (:class:`datetime.datetime`, optional): Start of the range. Defaults
+                to the start of the data.
+            end (:class:`datetime.datetime`, optional): End of the range, which is
+                excluded. Defaults to the end of the data.
+            columns (list[str], optional): Columns to load. Defaults to all columns.
+            resample (str, optional): Resample the data to this frequency, e.g.
+                `"1h"`. Defaults to no resampling.
+            how (str, optional): Aggregation to use for resampling. Defaults to
+                `"mean"`.
+            rollup (str, optional): Load the rollup with this resolution instead of
+                the data: `"1min"`, `"1h"` or `"1D"`. The columns are then `"count"`,
+                `"min"`, `"max"`, `"mean"` and `"sum"`. Defaults to loading the data.
+
+        Returns:
+            :class:`pandas.DataFrame`: Data indexed by date.
+        """
+        import pandas as pd
+
+        start = None if start is None else pd.Timestamp(start)
+        end = None if end is None else pd.Timestamp(end)
+
+        if rollup is not None:
+            return self._load(self.rollup_dataset(call, rollup), start, end, columns)
+        if resample is not None:
+            df = self._load_from_rollup(call, start, end, columns, resample, how)
+            if df is not None:
+                return df
+        df = self._load(self.dataset(call), start, end, columns)
+        if resample is not None:
+            df = df.resample(resample).agg(how)
+        return df
+
+    def _load_from_rollup(self, call, start, end, columns, resample, how):
+        """Resample an intraday time series from a rollup.
+
+        Returns:
+            :class:`pandas.DataFrame` or None: Resampled data, or `None` if no rollup
+                can be used.
+        """
+        import pandas as pd
+
+        endpoint = endpoints.get(call)
+        if endpoint is None or not endpoint.intraday or how not in _statistics:
+            return None
+        (column,) = endpoint.columns
+        if columns is not None and set(columns) - {"date"} != {column}:
+            return None
+        resolution = _rollup_resolution(resample, start, end)
+        if resolution is None:
+            return None
+        # A rollup which is not coarser than the data has no fewer rows.
+        if pd.Timedelta(resolution) <= pd.Timedelta(endpoint.resolution):
+            return None
+        if not self._has_rollups(call, resolution, start, end):
+            return None
+
+        # Counts and sums of intervals add up. Minima and maxima are taken again.
+        if how == "mean":
+            stats = self._load(
+                self.rollup_dataset(call, resolution), start, end, ["count", "sum"]
+            )
+            stats = stats.resample(resample).sum()
+            # Intervals without data have a count of zero and give NaN.
+            result = stats["sum"] / stats["count"]
+        else:
+            stats = self._load(self.rollup_dataset(call, resolution), start, end, [how])
+            resampled = stats[how].resample(resample)
+            result = resampled.sum() if how in {"count", "sum"} else resampled.agg(how)
+        return result.to_frame(column)
+
+    def _load(self, dataset, start, end, columns):
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        date_type = dataset.schema.field("date").type
+
+        condition = None
+
+        def add(c):
+            return c if condition is None else condition & c
+
+        if start is not None:
+            # Skip whole months by the partitioning before looking at the data.
+            condition = add(ds.field("month") >= start.strftime("%Y-%m"))
+            condition = add(ds.field("date") >= pa.scalar(start, type=date_type))
+        if end is not None:
+            condition = add(ds.field("month") <= end.strftime("%Y-%m"))
+            condition = add(ds.field("date") < pa.scalar(end, type=date_type))
+
+        if columns is not None:
+            columns = ["date"] + [c for c in columns if c != "date"]
+        else:
+            columns = [c for c in dataset.schema.names if c != "month"]
+        df = dataset.to_table(columns=columns, filter=condition).to_pandas()
+        return df.set_index("date").sort_index()
+
+
+store = Store()
+""":class:`Store`: Store of parsed data."""
@@ -0,0 +1,399 @@
+import base64
+import datetime
+import hashlib
+import hmac
+import json
+import sqlite3
+import threading
+from collections import namedtuple
+from pathlib import Path
+
+from .auth import _parse_url_args
+from .endpoints import endpoints
+from .metrics import metrics
+from .transport import transport
+from .util import _BackgroundServer, days, format_date, timestamp
+
+__all__ = [
+    "Notification",
+    "Notifications",
+    "notifications",
+    "Receiver",
+    "subscribe",
+    "sync",
+]
+
+Notification = namedtuple(
+    "Notification", ["collection", "day", "owner_id", "received_timestamp_utc"]
+)
+Notification.__doc__ = """Notification that data of a user changed.
+
+Args:
+    collection (str): Collection of the Subscriptions API, e.g. `"activities"` or
+        `"sleep"`.
+    day (:class:`datetime.datetime`): Day of the data which changed.
+    owner_id (str): ID of the user.
+    received_timestamp_utc (float): Time of the last notification for this
+        collection, day and user.
+"""
+
+
+def _calls(collection):
+    """Get the calls of which the data is in a collection.
+
+    Args:
+        collection (str): Collection.
+
+    Returns:
+        list[str]: Names of the calls. Calls with a warning are left out.
+    """
+    return [
+        name
+        for name, endpoint in endpoints.items()
+        if endpoint.collection == collection and not endpoint.warning
+    ]
+
+
+class Notifications:
+    """Queue of notifications of the Subscriptions API.
+
+    The queue is kept in a database, so notifications survive restarts. Repeated
+    notifications for the same collection, day and user are merged.
+
+    The queue is closed until :meth:`.Notifications.open` is called::
+
+        notifications.open("output/notifications.sqlite")
+
+    Args:
+        path (str, optional): Path of the database. If given, the queue is opened.
+    """
+
+    def __init__(self, path=None):
+        self.path = None
+        self._db = None
+        self._lock = threading.Lock()
+        if path is not None:
+            self.open(path)
+
+    def open(self, path):
+        """Open the queue.
+
+        Args:
+            path (str): Path of the database.
+        """
+        self.close()
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        with self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS notifications ("
+                "collection TEXT NOT NULL, "
+                "day TEXT NOT NULL, "
+                "owner_id TEXT NOT NULL, "
+                "received_timestamp_utc REAL NOT NULL, "
+                "PRIMARY KEY (collection, day, owner_id)"
+                ")"
+            )
+
+    def close(self):
+        """Close the queue."""
+        if self._db is not None:
+            self._db.close()
+        self.path = None
+        self._db = None
+
+    @property
+    def is_open(self):
+        """bool: Whether the queue is open."""
+        return self._db is not None
+
+    def _check_open(self):
+        if not self.is_open:
+            raise RuntimeError(
+                "The queue is not open. Call `notifications.open(path)` first."
+            )
+
+    def put(self, collection, day, owner_id):
+        """Put a notification in the queue.
+
+        Args:
+            collection (str): Collection.
+            day (:class:`datetime.datetime`): Day.
+            owner_id (str): ID of the user.
+        """
+        self._check_open()
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO notifications VALUES (?, ?, ?, ?)",
+                (collection, format_date(day), owner_id, timestamp()),
+            )
+
+    def pending(self):
+        """Get all notifications in the queue.
+
+        Returns:
+            list[:class:`.Notification`]: Notifications, ordered by day.
+        """
+        self._check_open()
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT collection, day, owner_id, received_timestamp_utc "
+                "FROM notifications ORDER BY day, collection, owner_id"
+            ).fetchall()
+        return [
+            Notification(c, datetime.datetime.strptime(d, "%Y-%m-%d"), o, t)
+            for c, d, o, t in rows
+        ]
+
+    def done(self, notification):
+        """Remove a notification from the queue. If the same notification was
+        received again in the meantime, it is kept.
+
+        Args:
+            notification (:class:`.Notification`): Notification.
+        """
+        self._check_open()
+        with self._lock, self._db:
+            self._db.execute(
+                "DELETE FROM notifications "
+                "WHERE collection = ? AND day = ? AND owner_id = ? "
+                "AND received_timestamp_utc <= ?",
+                (
+                    notification.collection,
+                    format_date(notification.day),
+                    notification.owner_id,
+                    notification.received_timestamp_utc,
+                ),
+            )
+
+
+notifications = Notifications()
+""":class:`Notifications`: Queue of notifications of the Subscriptions API."""
+
+
+def _signature(body, client_secret):
+    """Compute the signature of a notification.
+
+    Args:
+        body (bytes): Body of the request.
+        client_secret (str): Client secret of the app.
+
+    Returns:
+        str: Signature.
+    """
+    key = (client_secret + "&").encode()
+    return base64.b64encode(hmac.new(key, body, hashlib.sha1).digest()).decode()
+
+
+class Receiver(_BackgroundServer):
+    """Server which receives the notifications of the Subscriptions API and puts
+    them in a queue.
+
+    The server answers the verification requests of the API and puts every
+    notification in the queue without fetching any data, so the API gets its
+    response in time. Use :func:`.sync` to fetch the data.
+
+    Args:
+        verification_code (str): Verification code of the subscriber, as shown in the
+            settings of the app.
+        queue (:class:`.Notifications`, optional): Queue. Defaults to
+            :data:`.notifications`.
+        client_secret (str, optional): Client secret of the app. If given,
+            notifications without a valid signature are rejected.
+        host (str, optional): Host to listen on. Defaults to all interfaces.
+        port (int, optional): Port to listen on. Defaults to a free port.
+        certfile (str, optional): SSL certificate. If given, the server uses HTTPS.
+            The API only delivers notifications over HTTPS, so leave this out only
+            behind a proxy which terminates HTTPS.
+
+    Attributes:
+        verification_code (str): Verification code of the subscriber.
+        queue (:class:`.Notifications`): Queue.
+        client_secret (str or None): Client secret of the app.
+    """
+
+    def __init__(
+        self,
+        verification_code,
+        queue=None,
+        client_secret=None,
+        host="",
+        port=0,
+        certfile=None,
+    ):
+        import ssl
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        self.verification_code = verification_code
+        self.queue = notifications if queue is None else queue
+        self.client_secret = client_secret
+        receiver = self
+
+        class Handler(BaseHTTPRequestHandler):
+            """A server that puts notifications in the queue."""
+
+            protocol_version = "HTTP/1.1"
+
+            def _respond(self, status):
+                self.send_response(status)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def do_GET(self):
+                # The API verifies the subscriber by sending the correct code, which
+                # must get status 204, and an incorrect code, which must get 404.
+                args = _parse_url_args(self.path)
+                if args.get("verify") == receiver.verification_code:
+                    self._respond(204)
+                else:
+                    self._respond(404)
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                if receiver.client_secret is not None:
+                    expected = _signature(body, receiver.client_secret)
+                    signature = self.headers.get("X-Fitbit-Signature", "")
+                    if not hmac.compare_digest(signature, expected):
+                        # The API expects 404 for notifications which are rejected.
+                        self._respond(404)
+                        return
+                try:
+                    entries = [
+                        (
+                            entry["collectionType"],
+                            datetime.datetime.strptime(entry["date"], "%Y-%m-%d"),
+                            entry["ownerId"],
+                        )
+                        for entry in json.loads(body)
+                    ]
+                except (ValueError, KeyError, TypeError):
+                    self._respond(400)
+                    return
+                for collection, day, owner_id in entries:
+                    receiver.queue.put(collection, day, owner_id)
+                    metrics.increment("notifications_total", collection=collection)
+                self._respond(204)
+
+            def log_message(self, fmt, *args):
+                pass  # Do nothing to hide the output.
+
+        httpd = ThreadingHTTPServer((host, port), Handler)
+        if certfile is not None:
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            context.load_cert_chain(certfile)
+            httpd.socket = context.wrap_socket(httpd.socket, server_side=True)
+        super().__init__(httpd, "http" if certfile is None else "https")
+
+
+def subscribe(token, subscription_id, collection=None, subscriber_id=None):
+    """Subscribe to notifications of changes to the data of a user.
+
+    Args:
+        token (str or :class:`.users.User`): Authentication token or user.
+        subscription_id (str): ID of the subscription, which must be unique for the
+            app, e.g. the ID of the user.
+        collection (str, optional): Collection, e.g. `"activities"` or `"sleep"`.
+            Defaults to all collections.
+        subscriber_id (str, optional): ID of the subscriber, as shown in the
+            settings of the app. Defaults to the default subscriber.
+
+    Returns:
+        dict: Subscription.
+    """
+    from .api import _credentials
+
+    token, limiter, user_id = _credentials(token)
+    collection = "" if collection is None else collection + "/"
+    headers = {"Accept": "application/json", "Authorization": f"Bearer {token}"}
+    if subscriber_id is not None:
+        headers["X-Fitbit-Subscriber-Id"] = subscriber_id
+    with limiter:
+        res = transport.post(
+            f"/1/user/{user_id}/{collection}apiSubscriptions/{subscription_id}.json",
+            headers=headers,
+        )
+    limiter.update(res.headers)
+    res.raise_for_status()
+    return res.json()
+
+
+def sync(users=None, queue=None, scheduler=None):
+    """Fetch the data of every collection, day and user in the queue of
+    notifications, write it to :data:`.store.store`, and record it in
+    :data:`.manifest.manifest` if the manifest is open.
+
+    Only the calls of the notified collections are fetched. Responses which were
+    stored before the sync started are not used, because the data changed. A
+    notification is removed from the queue once all its calls were fetched.
+    Notifications of users who are not known stay in the queue.
+
+    Args:
+        users (dict[str, str or :class:`.users.User`], optional): Token or user by ID
+            of the user. Defaults to all enrolled users.
+        queue (:class:`.Notifications`, optional): Queue. Defaults to
+            :data:`.notifications`.
+        scheduler (:class:`.scheduler.Scheduler`, optional): Scheduler to run the
+            requests with. Defaults to a new scheduler.
+
+    Returns:
+        list[:class:`.Notification`]: Notifications which were handled.
+    """
+    from . import api
+    from .manifest import manifest
+    from .scheduler import Scheduler, plan
+    from .store import store
+    from .users import enrolled_users
+
+    if users is None:
+        users = {user.id: user for user in enrolled_users()}
+    queue = notifications if queue is None else queue
+    scheduler = Scheduler() if scheduler is None else scheduler
+
+    # Responses fetched from now on are up to date, so calls which share a request
+    # still make the request only once.
+    since = timestamp()
+    by_owner = {}
+    for notification in queue.pending():
+        by_owner.setdefault(notification.owner_id, []).append(notification)
+
+    handled = []
+    for owner_id, owner_notifications in by_owner.items():
+        if owner_id not in users:
+            print(f'Skipping notifications of unknown user "{owner_id}".')
+            continue
+        user = users[owner_id]
+
+        def fetch_and_store(call, day, end=None):
+            end = day if end is None else end
+            data = api.fetch_days(call, user, day, end, since=since)
+            for d, df in data.items():
+                store.write(call, d, df)
+                if manifest.is_open:
+                    manifest.record(call, d, len(df))
+            # Days which are left out have no data.
+            if manifest.is_open:
+                for d in days(day, end):
+                    if d not in data:
+                        manifest.record(call, d, 0)
+
+        notified = {}
+        for notification in owner_notifications:
+            for call in _calls(notification.collection):
+                notified.setdefault(call, set()).add(notification.day)
+        jobs = [job for call, d in notified.items() for job in plan([call], d)]
+
+        failed = set()
+        for job, result in scheduler.run(jobs, fetch_and_store).items():
+            if isinstance(result, Exception):
+                for day in days(job.day, job.day if job.end is None else job.end):
+                    failed.add((job.call, day))
+                    if manifest.is_open:
+                        manifest.record_failure(job.call, day, result)
+
+        for notification in owner_notifications:
+            calls = _calls(notification.collection)
+            if all((call, notification.day) not in failed for call in calls):
+                queue.done(notification)
+                handled.append(notification)
+    return handled
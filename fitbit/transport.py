@@ -0,0 +1,93 @@
+__all__ = ["Transport", "transport"]
+
+
+class Transport:
+    """HTTP transport which keeps connections to the API alive.
+
+    All requests go through one :class:`requests.Session`, so connections are pooled
+    and reused instead of performing a TCP and TLS handshake for every request.
+
+    To direct all requests to a different server, e.g. a local stand-in server for
+    testing, set :attr:`base_url` or replace :attr:`session`::
+
+        transport.base_url = "http://localhost:8000"
+
+    Args:
+        base_url (str, optional): Base URL of the API. Defaults to
+            `https://api.fitbit.com`.
+        timeout (float or tuple[float, float], optional): Connect and read timeout in
+            seconds. Defaults to `(10, 60)`.
+        pool_size (int, optional): Maximum number of connections to keep alive.
+            Defaults to 10.
+        session (:class:`requests.Session`, optional): Session to use. Defaults to a
+            new session, which is created when first used.
+
+    Attributes:
+        base_url (str): Base URL of the API.
+        timeout (float or tuple[float, float]): Connect and read timeout in seconds.
+    """
+
+    def __init__(
+        self,
+        base_url="https://api.fitbit.com",
+        timeout=(10, 60),
+        pool_size=10,
+        session=None,
+    ):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self._session = session
+
+    @property
+    def session(self):
+        """:class:`requests.Session`: Session."""
+        if self._session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=self.pool_size,
+                pool_maxsize=self.pool_size,
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers["Accept-Encoding"] = "gzip, deflate"
+            self._session = session
+        return self._session
+
+    @session.setter
+    def session(self, session):
+        self._session = session
+
+    def request(self, method, path, **kw_args):
+        """Perform a request.
+
+        Args:
+            method (str): HTTP method.
+            path (str): Path relative to :attr:`base_url`.
+            **kw_args: Further keyword arguments for :meth:`requests.Session.request`.
+
+        Returns:
+            :class:`requests.Response`: Response.
+        """
+        kw_args.setdefault("timeout", self.timeout)
+        return self.session.request(method, self.base_url + path, **kw_args)
+
+    def get(self, path, **kw_args):
+        """Perform a GET request. See :meth:`.Transport.request`."""
+        return self.request("GET", path, **kw_args)
+
+    def post(self, path, **kw_args):
+        """Perform a POST request. See :meth:`.Transport.request`."""
+        return self.request("POST", path, **kw_args)
+
+    def close(self):
+        """Close all pooled connections."""
+        if self._session is not None:
+            self._session.close()
+
+
+transport = Transport()
+""":class:`Transport`: Transport used for all requests to the API."""
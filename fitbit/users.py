@@ -0,0 +1,172 @@
+import threading
+from pathlib import Path
+
+from . import auth
+from .config import config
+from .rate import RateLimiter, rate_limiter
+from .util import timestamp
+
+__all__ = ["User", "get_user", "enroll", "enrolled_users", "TokenRefresher"]
+
+
+class User:
+    """A user whose data can be fetched. Pass a user instead of a token to any call
+    in :mod:`fitbit.api` to fetch that user's data with that user's quota.
+
+    The credentials of a user are kept in a section of the configuration. The user
+    you authenticated with first lives in the section `session` and uses the global
+    rate limiter. Users enrolled with :func:`.enroll` live in a section
+    `user_<user ID>` and have a rate limiter of their own, because the quota of the
+    API is per user.
+
+    Use :func:`.get_user` rather than creating users directly.
+
+    Args:
+        section (str, optional): Section of the configuration with the credentials.
+            Defaults to `"session"`.
+        rate_limiter (:class:`.rate.RateLimiter`, optional): Rate limiter for the
+            user.
+    """
+
+    def __init__(self, section="session", rate_limiter=rate_limiter):
+        self.section = section
+        self.rate_limiter = rate_limiter
+
+    @property
+    def id(self):
+        """str: ID of the user, or `"-"` if it is not known."""
+        return config.data.get(self.section, {}).get("user_id", "-")
+
+    @property
+    def token(self):
+        """str: Token. The token is refreshed if it expired."""
+        return auth.authenticate(self.section, self.rate_limiter)
+
+    @property
+    def expires_in(self):
+        """float: Number of seconds until the token expires."""
+        return config.get(self.section, "token_expiry_timestamp_utc") - timestamp()
+
+    def refresh(self):
+        """Refresh the token.
+
+        Returns:
+            str: New token.
+        """
+        with auth._lock:
+            return auth._refresh_token(self.section, self.rate_limiter)
+
+    def __repr__(self):
+        return f"User({self.id!r})"
+
+
+_users = {"session": User()}
+"""dict[str, :class:`.User`]: Every user by the section of its credentials."""
+_users_lock = threading.Lock()
+
+
+def _section(user_id):
+    return "session" if user_id is None else f"user_{user_id}"
+
+
+def get_user(user_id=None):
+    """Get a user.
+
+    Args:
+        user_id (str, optional): ID of the user. Defaults to the user in the section
+            `session`.
+
+    Returns:
+        :class:`.User`: User.
+    """
+    section = _section(user_id)
+    if section not in config.data:
+        raise KeyError(f'User "{user_id}" is not enrolled.')
+    with _users_lock:
+        if section not in _users:
+            path = Path(config.path).parent / f"rate_limit_{user_id}.json"
+            _users[section] = User(section, RateLimiter(path=str(path)))
+        return _users[section]
+
+
+def enroll():
+    """Enroll a new user by performing full authentication for that user.
+
+    Returns:
+        :class:`.User`: Newly enrolled user.
+    """
+    with auth._lock:
+        token = auth._full_authentication(section=None)
+    for section in config.data:
+        if section.startswith("user_") and config[section, "token"] == token:
+            return get_user(section[len("user_") :])
+
+
+def enrolled_users():
+    """Get all enrolled users.
+
+    Returns:
+        list[:class:`.User`]: All users who have a token, including the user in the
+            section `session`.
+    """
+    users = []
+    if config.data.get("session", {}).get("token"):
+        users.append(get_user())
+    for section in config.data:
+        if section.startswith("user_"):
+            users.append(get_user(section[len("user_") :]))
+    return users
+
+
+class TokenRefresher:
+    """Refresh tokens in the background before they expire.
+
+    Args:
+        users (function, optional): Function which returns the users whose tokens
+            should be refreshed. Defaults to :func:`.enrolled_users`.
+        margin (float, optional): Refresh tokens which expire within this many
+            seconds. Defaults to ten minutes.
+        interval (float, optional): Check the tokens every this many seconds.
+            Defaults to one minute.
+    """
+
+    def __init__(self, users=enrolled_users, margin=600, interval=60):
+        self.users = users
+        self.margin = margin
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def refresh(self):
+        """Refresh all tokens which expire within the margin."""
+        for user in self.users():
+            if user.expires_in < self.margin:
+                try:
+                    user.refresh()
+                except Exception as e:
+                    print(f"Failed to refresh the token of {user}:", type(e), str(e))
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.refresh()
+            self._stop.wait(self.interval)
+
+    def start(self):
+        """Start refreshing in the background."""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop refreshing."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
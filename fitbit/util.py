@@ -1,6 +1,7 @@
 import datetime
+import threading
 
-__all__ = ["timestamp"]
+__all__ = ["timestamp", "format_date", "days"]
 
 
 def timestamp() -> float:
@@ -10,3 +11,69 @@ def timestamp() -> float:
         float: Timestamp.
     """
     return datetime.datetime.utcnow().timestamp()
+
+
+def format_date(day):
+    """Format a day as `YYYY-MM-DD`.
+
+    Args:
+        day (:class:`datetime.datetime`): Day.
+
+    Returns:
+        str: Formatted day.
+    """
+    return f"{day.year}-{day.month:02d}-{day.day:02d}"
+
+
+def days(start, end):
+    """Get all days from day `start` up to and including day `end`.
+
+    Args:
+        start (:class:`datetime.datetime`): First day.
+        end (:class:`datetime.datetime`): Last day.
+
+    Returns:
+        list[:class:`datetime.datetime`]: Days.
+    """
+    result = [start]
+    while result[-1].date() < end.date():
+        result.append(result[-1] + datetime.timedelta(days=1))
+    return result
+
+
+class _BackgroundServer:
+    """Base class of servers which serve requests in a background thread.
+
+    Args:
+        httpd (:class:`http.server.HTTPServer`): Server.
+        scheme (str, optional): Scheme of the URL of the server. Defaults to
+            `"http"`.
+    """
+
+    def __init__(self, httpd, scheme="http"):
+        self._httpd = httpd
+        self._scheme = scheme
+        self._thread = None
+
+    @property
+    def url(self):
+        """str: Base URL of the server."""
+        return f"{self._scheme}://localhost:{self._httpd.server_port}"
+
+    def start(self):
+        """Start the server in the background."""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the server."""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        self._thread.join()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
@@ -2,56 +2,90 @@ import datetime
 from pathlib import Path
 
 import fitbit.api as api
-import pandas as pd
-from fitbit import authenticate
+import fitbit.util as util
+from fitbit import Scheduler, authenticate, manifest, plan, raw_store, store
 
 # Get all API calls.
-api_calls = api.__all__
+api_calls = api.daily_calls
 
-# Ensure that the output directories exist.
 out_dir = Path("output")
-for call in api_calls:
-    (out_dir / call).mkdir(parents=True, exist_ok=True)
+
+# Keep all raw responses, so the data can be parsed again without using the API.
+raw_store.open(out_dir / "raw")
+# Store the parsed data in a Parquet dataset per call.
+store.open(out_dir / "store")
+# Keep track of which days were fetched, so scraping can resume without reading the
+# store. Start the manifest from the store if the store predates it.
+manifest_path = out_dir / "manifest.sqlite"
+new_manifest = not manifest_path.exists()
+manifest.open(manifest_path)
+if new_manifest:
+    manifest.scan(store, api_calls)
 
 # Start at yesterday, because today's data might not yet be complete.
 current = datetime.datetime.now() - datetime.timedelta(days=1)
 
 
-def fetch_and_dump(path, api_call, day):
-    """Fetch data and dump it to a CSV. Will only fetch data if it was not already
-    fetched.
+def fetch_and_store(call, day, end=None):
+    """Fetch data, write it to the store and record it in the manifest.
 
     Args:
-        path (str): Directory to dump the CSV into.
-        api_call (function): API function to call.
-        day (:class:`datetime.datetime`): Day to fetch data for.
+        call (str): Name of the API call.
+        day (:class:`datetime.datetime`): Day to fetch data for. For a range of days,
+            the first day.
+        end (:class:`datetime.datetime`, optional): Last day of a range of days.
 
     Returns:
-        bool: `True` if any data was available, otherwise `False`.
+        dict[:class:`datetime.datetime`, bool]: For every fetched day, `True` if any
+            data was available, otherwise `False`.
     """
-    out = path / day.strftime("%Y-%m-%d.csv")
-    if not out.exists():
-        try:
-            df = api_call(authenticate(), day)
-            df.to_csv(str(out))
-        except Exception as e:
-            print(f'Failed "{out}" with the following exception:', type(e), str(e))
-            return False
-    else:
-        df = pd.read_csv(out)
-    return len(df) > 0
+    end = day if end is None else end
+    data = api.fetch_days(call, authenticate(), day, end)
+    for d, df in data.items():
+        store.write(call, d, df)
+        manifest.record(call, d, len(df))
+    # Days which are left out have no data.
+    for d in manifest.missing_days(call, day, end):
+        manifest.record(call, d, 0)
+    return {d: len(df) > 0 for d, df in data.items()}
 
 
 # How many days without any data before stopping scraping?
 allowance = 10
+# How many days to schedule at once?
+window = 10
+
+scheduler = Scheduler()
+
+while allowance > 0:
+    days = [current - datetime.timedelta(days=i) for i in range(window)]
+    print(
+        "Current days:",
+        days[-1].strftime("%Y-%m-%d"),
+        "to",
+        days[0].strftime("%Y-%m-%d"),
+    )
 
-while True:
-    print("Current day:", current.strftime("%Y-%m-%d"))
-    any_available = False
+    # Only fetch data which was not already fetched.
+    available = {day: False for day in days}
+    jobs = []
     for call in api_calls:
-        any_available |= fetch_and_dump(out_dir / call, getattr(api, call), current)
-    if not any_available:
-        allowance -= 1
-        if allowance == 0:
-            break
-    current -= datetime.timedelta(days=1)
+        for day, entry in manifest.entries(call, days[-1], days[0]).items():
+            available[day] |= entry.rows > 0
+        # Fetch consecutive days with one request where the call allows it.
+        jobs.extend(plan([call], manifest.missing_days(call, days[-1], days[0])))
+
+    for job, result in scheduler.run(jobs, fetch_and_store).items():
+        if isinstance(result, Exception):
+            for day in util.days(job.day, job.day if job.end is None else job.end):
+                manifest.record_failure(job.call, day, result)
+        else:
+            for day, any_data in result.items():
+                available[day] |= any_data
+
+    for day in days:
+        if not available[day]:
+            allowance -= 1
+            if allowance == 0:
+                break
+    current -= datetime.timedelta(days=window)
@@ -1,17 +1,88 @@
+import argparse
+import datetime
+import json
+import os
 from pathlib import Path
 
 import fitbit.api as api
 import pandas as pd
+from fitbit import manifest, store
 
-api_calls = api.__all__
+# `scrape.py` writes straight into the store, where the days of every call together
+# form one dataset. This script only imports daily CSVs from older scrapes. Days
+# which `scrape.py` already wrote are newer than the CSVs and are left alone.
+#
+# The script is incremental: `collated.json` records the modification time and size
+# of every CSV that was imported, and only new or changed CSVs are imported. Every CSV
+# is one day, which is read and written on its own, so memory usage does not grow
+# with the length of the history. Imported days are recorded in the manifest of
+# `scrape.py`, so scraping does not fetch them again.
+
+parser = argparse.ArgumentParser()
+parser.add_argument(
+    "--full",
+    action="store_true",
+    help="Import all CSVs again, even if they did not change.",
+)
+args = parser.parse_args()
+
+# Older scrapes wrote the elevation to the CSVs of floors, so do not import those.
+api_calls = [call for call in api.daily_calls if call != "floors"]
+
+# Columns other than the index which hold times. CSVs keep them as text.
+datetime_columns = {"sleep_summary": ["sleep_start", "sleep_end"]}
 
 out_dir = Path("output")
+store.open(out_dir / "store")
+# Start the manifest from the store if the store predates it, like `scrape.py` does.
+manifest_path = out_dir / "manifest.sqlite"
+new_manifest = not manifest_path.exists()
+manifest.open(manifest_path)
+if new_manifest:
+    manifest.scan(store, api.daily_calls)
+
+collated_path = out_dir / "collated.json"
+if collated_path.exists():
+    with open(collated_path) as f:
+        collated = json.load(f)
+else:
+    collated = {}
+
+
+def save_collated():
+    """Save `collated.json`. Write to a temporary file first, so a crash cannot
+    corrupt it."""
+    temp = collated_path.with_suffix(".json.tmp")
+    with open(temp, "w") as f:
+        json.dump(collated, f)
+    os.replace(temp, collated_path)
+
+
+# Save `collated.json` after this many imported CSVs, so an interrupted run does not
+# have to start over.
+save_every = 100
 
 for call in api_calls:
-    folder = out_dir / call
-    dfs = [
-        pd.read_csv(str(f), date_parser=["date"]).set_index("date")
-        for f in sorted(folder.glob("*.csv"))
-    ]
-    df = pd.concat(dfs)
-    df.to_parquet(str(folder / call) + ".parquet")
+    imported = collated.setdefault(call, {})
+    count = 0
+    for f in sorted((out_dir / call).glob("*.csv")):
+        stat = f.stat()
+        signature = [stat.st_mtime_ns, stat.st_size]
+        if imported.get(f.name) == signature and not args.full:
+            continue
+        day = datetime.datetime.strptime(f.stem, "%Y-%m-%d")
+        # A day which is in the store but was not imported by this script was
+        # scraped from the API.
+        if f.name not in imported and store.has(call, day):
+            continue
+        df = pd.read_csv(
+            str(f), parse_dates=["date"] + datetime_columns.get(call, [])
+        ).set_index("date")
+        store.write(call, day, df)
+        manifest.record(call, day, len(df))
+        imported[f.name] = signature
+        count += 1
+        if count % save_every == 0:
+            save_collated()
+    save_collated()
+    print(f"{call}: imported {count} new or changed days")
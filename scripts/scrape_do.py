@@ -1,14 +1,11 @@
-import pandas as pd
+from fitbit import store
 
-hr = pd.read_parquet("output/hr/hr.parquet")
-hrv = pd.read_parquet("output/hrv/hrv.parquet")
-spo2 = pd.read_parquet("output/spo2/spo2.parquet")
-br = pd.read_parquet("output/br/br.parquet")
+store.open("output/store")
 
-hr.index = pd.to_datetime(hr.index)
-hrv.index = pd.to_datetime(hrv.index)
-spo2.index = pd.to_datetime(spo2.index)
-br.index = pd.to_datetime(br.index)
+hr = store.load("hr")
+hrv = store.load("hrv")
+spo2 = store.load("spo2")
+br = store.load("br")
 
 print(hr)
 print(hrv)
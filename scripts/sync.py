@@ -0,0 +1,42 @@
+import time
+from pathlib import Path
+
+from fitbit import (
+    Receiver,
+    _path_key,
+    config,
+    manifest,
+    notifications,
+    raw_store,
+    store,
+    sync,
+)
+
+out_dir = Path("output")
+
+# Use the same outputs as `scripts/scrape.py`, so both can be used together.
+raw_store.open(out_dir / "raw")
+store.open(out_dir / "store")
+manifest.open(out_dir / "manifest.sqlite")
+# Notifications are kept until their data is fetched, so none are lost on restarts.
+notifications.open(out_dir / "notifications.sqlite")
+
+# How many seconds to wait between syncs? Notifications for the same collection and
+# day which arrive in the meantime are merged into one.
+interval = 300
+
+receiver = Receiver(
+    config["subscriptions", "verification_code"],
+    client_secret=config["app", "client_secret"],
+    port=config.data.get("subscriptions", {}).get("port", 4445),
+    # The API only delivers notifications over HTTPS.
+    certfile=_path_key(),
+)
+
+with receiver:
+    print(f"Receiving notifications at {receiver.url}.")
+    while True:
+        handled = sync()
+        if handled:
+            print(f"Synced {len(handled)} notification(s).")
+        time.sleep(interval)
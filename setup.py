@@ -6,5 +6,10 @@ setup(
     packages=find_packages(exclude=["docs"]),
     python_requires=">=3.8",
     install_requires=requirements,
+    extras_require={
+        "aio": ["aiohttp"],
+        "fast": ["orjson"],
+        "store": ["pandas", "pyarrow>=14"],
+    },
     include_package_data=True,
 )
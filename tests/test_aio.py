@@ -0,0 +1,46 @@
+import asyncio
+import datetime
+
+from fitbit import aio
+from fitbit.util import timestamp
+
+day = datetime.datetime(2023, 3, 5)
+path = "/1/user/-/activities/steps/date/2023-03-05/1d/1min.json"
+
+
+def test_client(steps_server):
+    async def run():
+        async with aio.Client() as client:
+            # Simultaneous calls for the same data make one request.
+            first, second = await asyncio.gather(
+                client.steps("token", day), client.steps("token", day)
+            )
+            assert list(first["steps"][:2]) == [0, 12]
+            assert first.equals(second)
+            assert len(steps_server.requests) == 1
+            assert client._in_flight == {}
+
+            # Later calls are served from the cache, unless it is too old.
+            await client.steps("token", day)
+            assert len(steps_server.requests) == 1
+            await client.steps("token", day, since=timestamp())
+            assert len(steps_server.requests) == 2
+
+    asyncio.run(run())
+
+
+def test_cancel(steps_server):
+    async def run():
+        async with aio.Client() as client:
+            cancelled = asyncio.ensure_future(client.steps("token", day))
+            waiting = asyncio.ensure_future(client.steps("token", day))
+            while not client._in_flight:
+                await asyncio.sleep(0.001)
+            cancelled.cancel()
+            # Cancelling one caller does not cancel the request of the other.
+            df = await waiting
+            assert list(df["steps"][:2]) == [0, 12]
+            assert cancelled.cancelled()
+            assert len(steps_server.requests) == 1
+
+    asyncio.run(run())
@@ -0,0 +1,147 @@
+import datetime
+
+import numpy as np
+import pytest
+
+from fitbit import align
+from fitbit.replay import save_fixture
+
+day = datetime.datetime(2023, 3, 5)
+next_day = datetime.datetime(2023, 3, 6)
+
+
+def _intraday(activity, dataset):
+    return {f"activities-{activity}-intraday": {"dataset": dataset}}
+
+
+@pytest.fixture()
+def server(replay_server):
+    fixtures = {
+        "/1/user/-/activities/steps/date/2023-03-05/1d/1min.json": _intraday(
+            "steps",
+            [
+                {"time": "00:00:00", "value": 5},
+                {"time": "00:30:00", "value": 7},
+                {"time": "01:00:00", "value": 1},
+            ],
+        ),
+        # There are no steps on the second day.
+        "/1/user/-/activities/steps/date/2023-03-06/1d/1min.json": _intraday(
+            "steps", []
+        ),
+        "/1/user/-/activities/heart/date/2023-03-05/1d/1sec.json": _intraday(
+            "heart",
+            [
+                {"time": "00:00:00", "value": 60},
+                {"time": "00:00:01", "value": 70},
+            ],
+        ),
+        "/1/user/-/activities/heart/date/2023-03-06/1d/1sec.json": _intraday(
+            "heart", [{"time": "02:00:00", "value": 50}]
+        ),
+        # There is no HRV on the first day.
+        "/1/user/-/hrv/date/2023-03-05/2023-03-06/all.json": {
+            "hrv": [
+                {
+                    "dateTime": "2023-03-06",
+                    "minutes": [
+                        {"minute": "2023-03-06T01:00:00.000", "value": {"rmssd": 40}}
+                    ],
+                }
+            ]
+        },
+        "/1/user/-/br/date/2023-03-05/2023-03-06/all.json": {
+            "br": [
+                {
+                    "dateTime": "2023-03-05",
+                    "value": {
+                        f"{k}SleepSummary": {"breathingRate": 15}
+                        for k in ["full", "deep", "rem", "light"]
+                    },
+                }
+            ]
+        },
+        "/1.2/user/-/sleep/date/2023-03-05/2023-03-06.json": {
+            "sleep": [
+                {
+                    "dateOfSleep": "2023-03-06",
+                    "isMainSleep": True,
+                    "startTime": "2023-03-06T01:00:00.000",
+                    "endTime": "2023-03-06T03:00:00.000",
+                    "levels": {
+                        "data": [
+                            {
+                                "dateTime": "2023-03-06T01:00:00.000",
+                                "level": "light",
+                                "seconds": 3600,
+                            },
+                            {
+                                "dateTime": "2023-03-06T02:00:00.000",
+                                "level": "deep",
+                                "seconds": 3600,
+                            },
+                        ],
+                        "summary": {
+                            "light": {"minutes": 60},
+                            "deep": {"minutes": 60},
+                        },
+                    },
+                }
+            ]
+        },
+    }
+    for path, res in fixtures.items():
+        save_fixture(replay_server.directory, "GET", path, res)
+    return replay_server
+
+
+def test_aligned(server):
+    calls = ["steps", "hr", "hrv", "br", "sleep_summary", "sleep_series"]
+    df = align.aligned("token", calls, day, next_day, resolution="1h")
+
+    # One grid for both days.
+    assert len(df) == 48
+    assert df.index[0] == day
+    assert df.index.freq == "1h"
+    assert list(df.columns) == [
+        "steps",
+        "hr",
+        "hrv",
+        "br_full",
+        "br_deep",
+        "br_rem",
+        "br_light",
+        "sleep_start",
+        "sleep_end",
+        "sleep_deep_mins",
+        "sleep_rem_mins",
+        "sleep_light_mins",
+        "sleep_wake_mins",
+        "sleep_stage_level",
+    ]
+
+    # Counts are summed and measurements are averaged.
+    first = df.loc[day]
+    assert first["steps"] == 12
+    assert first["hr"] == 65
+    assert df.loc[day + datetime.timedelta(hours=1), "steps"] == 1
+    # Missing data is missing rather than zero.
+    assert np.isnan(df.loc[next_day, "steps"])
+    assert np.isnan(df.loc[day, "hrv"])
+    assert df.loc[next_day + datetime.timedelta(hours=1), "hrv"] == 40
+
+    # Daily values are carried forward within their day.
+    assert (df.loc[: day + datetime.timedelta(hours=23), "br_full"] == 15).all()
+    assert df.loc[next_day:, "br_full"].isna().all()
+    assert df.loc[next_day, "sleep_deep_mins"] == 60
+    assert df.loc[next_day + datetime.timedelta(hours=23), "sleep_deep_mins"] == 60
+
+    # Sleep stages last for their duration.
+    stages = df.loc[next_day:, "sleep_stage_level"]
+    assert list(stages[:4].isna()) == [True, False, False, True]
+    assert list(stages[1:3]) == ["light", "deep"]
+
+    # The calls of sleep share one request.
+    paths = [path for _, path in server.requests]
+    assert paths.count("/1.2/user/-/sleep/date/2023-03-05/2023-03-06.json") == 1
+    assert len(paths) == 7
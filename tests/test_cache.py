@@ -0,0 +1,87 @@
+import importlib
+import os
+import threading
+import time
+
+from fitbit.cache import Cache, DiskBackend, MemoryBackend
+
+# The package exports the global cache under the name of the module.
+cache_module = importlib.import_module("fitbit.cache")
+
+
+def test_memory_backend():
+    backend = MemoryBackend(max_bytes=10)
+    backend.set("a", 0.0, b"aaaa")
+    backend.set("b", 0.0, b"bbbb")
+    backend.get("a")
+    # The least recently used entry is evicted once the size exceeds the maximum.
+    backend.set("c", 0.0, b"cccc")
+    assert backend.get("b") is None
+    assert backend.get("a") == (0.0, b"aaaa")
+    # Replacing an entry does not count its old content.
+    backend.set("c", 1.0, b"cc")
+    assert backend.get("a") is not None
+    assert backend._bytes == 6
+    # An entry which is larger than the cache is not kept.
+    backend.set("d", 0.0, b"d" * 11)
+    assert backend.get("d") is None
+    assert backend._bytes == 0
+
+
+def test_disk_backend(tmp_path):
+    backend = DiskBackend(tmp_path, max_size=10)
+    for i in range(10):
+        backend.set(str(i), float(i), b"x" * i)
+        os.utime(backend._file(str(i)), (i, i))
+    assert backend.get("3") == (3.0, b"xxx")
+    # Entries persist across instances.
+    backend = DiskBackend(tmp_path, max_size=10)
+    assert backend._count == 10
+    assert backend.get("9") == (9.0, b"x" * 9)
+    # Once over the limit, the least recently used entries are evicted.
+    backend.set("10", 10.0, b"")
+    assert len(list(tmp_path.glob("*.gz"))) == 9
+    assert backend._count == 9
+    for key in ["0", "1"]:
+        assert backend.get(key) is None
+    for key in ["3", "9", "10"]:
+        assert backend.get(key) is not None
+    backend.delete("10")
+    assert backend._count == 8
+    backend.clear()
+    assert backend._count == 0
+    assert backend.get("9") is None
+
+
+def test_cache(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module, "timestamp", lambda: now[0])
+    cache = Cache(ttl=60)
+    cache.set("key", b"content")
+    now[0] += 30
+    assert cache.get("key") == b"content"
+    assert cache.get("key", since=1000.0) == b"content"
+    assert cache.get("key", since=1001.0) is None
+    now[0] += 31
+    assert cache.get("key") is None
+    assert cache.backend.get("key") is None
+
+
+def test_lock():
+    cache = Cache()
+    fetched = []
+
+    def fetch():
+        with cache.lock("key"):
+            if cache.get("key") is None:
+                time.sleep(0.05)
+                fetched.append(1)
+                cache.set("key", b"content")
+
+    threads = [threading.Thread(target=fetch) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert fetched == [1]
+    assert cache._key_locks == {}
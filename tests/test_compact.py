@@ -0,0 +1,61 @@
+import datetime
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from fitbit import api
+from fitbit.compact import CompactSeries, _narrow
+from fitbit.store import _compact
+
+day = datetime.datetime(2023, 3, 5)
+
+
+def _content(key, values):
+    dataset = [
+        {"time": f"00:{i // 60:02d}:{i % 60:02d}", "value": value}
+        for i, value in enumerate(values)
+    ]
+    return json.dumps({key: {"dataset": dataset}}).encode()
+
+
+@pytest.mark.parametrize(
+    "call, values",
+    [
+        ("hr", [60, 61, 255]),
+        ("hr", [60, 61, 256]),
+        ("steps", [0, 12, 65535]),
+        ("cal", [1.25, 0.5, 2.0]),
+        # Values which float32 cannot hold exactly.
+        ("cal", [1.1, 0.1, 1.2345678]),
+        ("dist", [0.0, 0.001, 16777217.0]),
+    ],
+)
+def test_to_frame(call, values):
+    endpoint = api.endpoints[call]
+    (column,) = endpoint.columns
+    content = _content(endpoint.response, values)
+    seconds, parsed = api._decode_intraday(content, endpoint.response)
+    df = api._intraday(seconds, parsed, column, day, compact=False)
+    seconds, parsed = api._decode_intraday(content, endpoint.response)
+    series = api._intraday(seconds, parsed, column, day, compact=True)
+    assert isinstance(series, CompactSeries)
+    pd.testing.assert_frame_equal(series.to_frame(), df, check_exact=True)
+
+
+def test_narrow():
+    assert _narrow(np.array([1.5, np.nan]), "float32").dtype == np.float32
+    assert _narrow(np.array([0.1]), "float32").dtype == np.float64
+    assert _narrow(np.array([1, 300]), "uint8").dtype == np.int64
+    assert _narrow(np.array([-1, 3]), "uint8").dtype == np.int64
+    assert _narrow(np.array(["a"]), "uint8").dtype.kind == "U"
+
+
+def test_store_compact():
+    df = pd.DataFrame({"hr": [60, 61], "cal": [0.1, 1.5]})
+    compact = _compact(df)
+    assert compact["hr"].dtype == np.uint8
+    # Narrowing the calories would change them.
+    assert compact["cal"].dtype == np.float64
+    pd.testing.assert_frame_equal(compact.astype(df.dtypes), df, check_exact=True)
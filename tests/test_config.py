@@ -0,0 +1,65 @@
+import importlib
+import time
+
+import pytest
+import toml
+
+from fitbit.config import Config
+
+config_module = importlib.import_module("fitbit.config")
+
+
+@pytest.fixture()
+def path(tmp_path):
+    path = tmp_path / "config.toml"
+    with open(path, "w") as f:
+        toml.dump({"session": {"token": "old"}}, f)
+    return path
+
+
+def test_flush(path):
+    config = Config(str(path), delay=60)
+    assert config["session", "token"] == "old"
+    config["session", "token"] = "new"
+    config["app", "client_id"] = "ID"
+    # Changes are kept in memory until they are written.
+    assert config["session", "token"] == "new"
+    assert toml.load(path)["session"]["token"] == "old"
+    config.flush()
+    assert toml.load(path) == {"session": {"token": "new"}, "app": {"client_id": "ID"}}
+    assert [p.name for p in path.parent.iterdir()] == ["config.toml"]
+
+
+def test_delay(path):
+    config = Config(str(path), delay=0.05)
+    config["session", "token"] = "new"
+    deadline = time.monotonic() + 5
+    while toml.load(path)["session"]["token"] == "old":
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    assert config._timer is None
+
+
+def test_failed_write(path, monkeypatch):
+    config = Config(str(path), delay=60)
+    config["session", "token"] = "new"
+
+    def fsync(fd):
+        raise OSError("Disk is full.")
+
+    monkeypatch.setattr(config_module.os, "fsync", fsync)
+    with pytest.raises(OSError):
+        config.flush()
+    # The file is intact and the temporary file is removed.
+    assert toml.load(path) == {"session": {"token": "old"}}
+    assert [p.name for p in path.parent.iterdir()] == ["config.toml"]
+
+    # The changes are written once writing works again.
+    monkeypatch.undo()
+    config.flush()
+    assert toml.load(path)["session"]["token"] == "new"
+
+
+def test_missing(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        Config(str(tmp_path / "config.toml")).data
@@ -0,0 +1,39 @@
+import datetime
+
+from fitbit import api, endpoints, plan
+from fitbit.replay import save_fixture
+
+
+def test_calls_are_generated():
+    for name, endpoint in endpoints.items():
+        assert getattr(api, name).__name__ == name
+        if endpoint.name in api._parsers:
+            assert getattr(api, name + "_range").__name__ == name + "_range"
+
+
+def test_floors(replay_server):
+    save_fixture(
+        replay_server.directory,
+        "GET",
+        "/1/user/-/activities/floors/date/2023-03-05/1d/1min.json",
+        {"activities-floors-intraday": {"dataset": [{"time": "00:00:00", "value": 1}]}},
+    )
+    df = api.floors("token", datetime.datetime(2023, 3, 5))
+    assert list(df.columns) == ["floors"]
+
+
+def test_plan():
+    day = datetime.datetime(2023, 3, 5)
+    days = [day + datetime.timedelta(days=i) for i in [0, 1, 2, 4, 40]]
+    jobs = plan(["hr", "hrv"], days)
+    assert [(j.call, j.day, j.end) for j in jobs] == [("hr", d, None) for d in days] + [
+        ("hrv", days[0], days[2]),
+        ("hrv", days[3], None),
+        ("hrv", days[4], None),
+    ]
+    # Ranges do not exceed the maximum number of days of the endpoint.
+    days = [day + datetime.timedelta(days=i) for i in range(31)]
+    assert [(j.day, j.end) for j in plan(["hrv"], days)] == [
+        (days[0], days[29]),
+        (days[30], None),
+    ]
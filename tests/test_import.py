@@ -0,0 +1,44 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import fitbit
+from fitbit import api
+from fitbit.config import Config
+
+_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def _run(code, **env):
+    return subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=_root,
+        env=dict(os.environ, **env),
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+
+
+def test_import_is_cheap(tmp_path):
+    # Importing must neither require a configuration nor load heavy dependencies.
+    out = _run(
+        "import sys, fitbit; "
+        "print(sorted(m for m in ['numpy', 'pandas', 'plum', 'requests'] "
+        "if m in sys.modules))",
+        FITBIT_CONFIG=str(tmp_path / "missing.toml"),
+    )
+    assert out.strip() == "[]"
+
+
+def test_missing_config(tmp_path, monkeypatch):
+    monkeypatch.setenv("FITBIT_CONFIG", str(tmp_path / "missing.toml"))
+    with pytest.raises(FileNotFoundError):
+        Config()["session", "token"]
+
+
+def test_lazy_names():
+    assert {n for n, m in fitbit._lazy.items() if m == "api"} == set(api.__all__)
+    assert fitbit.hr is api.hr
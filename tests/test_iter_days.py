@@ -0,0 +1,56 @@
+import datetime
+import random
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from fitbit import api, store
+
+start = datetime.datetime(2023, 3, 1)
+end = datetime.datetime(2023, 3, 10)
+
+
+@pytest.fixture()
+def fetched(monkeypatch):
+    """Replace the call for steps by a stub which takes a random time.
+
+    Yields:
+        list[:class:`datetime.datetime`]: Days which the stub was called for.
+    """
+    fetched = []
+    lock = threading.Lock()
+
+    def steps(token, day):
+        with lock:
+            fetched.append(day)
+        time.sleep(random.uniform(0, 0.01))
+        return pd.DataFrame({"steps": [day.day]})
+
+    monkeypatch.setattr(api, "steps", steps)
+    assert not store.is_open
+    return fetched
+
+
+@pytest.mark.parametrize("prefetch", [0, 1, 3])
+def test_order(fetched, prefetch):
+    days = []
+    for day, df in api.iter_days("steps", "token", start, end, prefetch=prefetch):
+        assert list(df["steps"]) == [day.day]
+        # Only the next `prefetch` days are fetched ahead.
+        assert len(fetched) <= len(days) + 1 + prefetch
+        days.append(day)
+    assert days == [start + datetime.timedelta(days=i) for i in range(10)]
+    assert sorted(fetched) == days
+
+
+def test_stop_early(fetched):
+    days = api.iter_days("steps", "token", start, end, prefetch=2)
+    assert next(days)[0] == start
+    days.close()
+    # Closing waits for the days in flight and fetches no more days.
+    count = len(fetched)
+    assert count <= 3
+    time.sleep(0.05)
+    assert len(fetched) == count
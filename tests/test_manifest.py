@@ -0,0 +1,29 @@
+import datetime
+
+from fitbit.manifest import Manifest
+
+day = datetime.datetime(2023, 3, 5, 12)
+days = [day + datetime.timedelta(days=i) for i in range(5)]
+
+
+def test_manifest(tmp_path):
+    manifest = Manifest(tmp_path / "manifest.sqlite")
+    manifest.record("hr", days[0], 86400)
+    manifest.record("hr", days[1], 0)
+    manifest.record_failure("hr", days[2], ValueError("No data."))
+    manifest.record("hrv", days[3], 10)
+
+    entries = manifest.entries("hr", days[0], days[-1])
+    assert [entries[d].status for d in days[:3]] == ["fetched", "empty", "failed"]
+    assert entries[days[0]].rows == 86400
+    assert entries[days[2]].error == "ValueError('No data.')"
+
+    assert manifest.missing_days("hr", days[0], days[-1]) == days[2:]
+    assert manifest.missing_days("hr", days[0], days[-1], retry_failed=False) == (
+        days[3:]
+    )
+
+    # The manifest persists.
+    manifest.close()
+    manifest.open(tmp_path / "manifest.sqlite")
+    assert manifest.missing_days("hrv", days[0], days[-1]) == days[:3] + days[4:]
@@ -0,0 +1,49 @@
+import datetime
+import json
+
+from fitbit import api, cache
+from fitbit.metrics import LogSink, Metrics
+from fitbit.replay import save_fixture
+
+
+def test_prometheus():
+    metrics = Metrics()
+    metrics.increment("token_refreshes_total", status="ok")
+    metrics.increment("token_refreshes_total", status="ok")
+    metrics.observe("request_seconds", 0.5, endpoint="hrv", status="200")
+    metrics.observe("request_seconds", 1.5, endpoint="hrv", status="200")
+    assert metrics.to_prometheus().splitlines() == [
+        "# HELP fitbit_token_refreshes_total Refreshes of access tokens.",
+        "# TYPE fitbit_token_refreshes_total counter",
+        'fitbit_token_refreshes_total{status="ok"} 2',
+        "# HELP fitbit_request_seconds Latency of requests to the API.",
+        "# TYPE fitbit_request_seconds summary",
+        'fitbit_request_seconds_count{endpoint="hrv",status="200"} 2',
+        'fitbit_request_seconds_sum{endpoint="hrv",status="200"} 2.0',
+    ]
+
+
+def test_log_sink(tmp_path):
+    metrics = Metrics()
+    metrics.add_sink(LogSink(tmp_path / "events.jsonl"))
+    with metrics.timer("decode_seconds", endpoint="hrv"):
+        pass
+    (event,) = map(json.loads, (tmp_path / "events.jsonl").read_text().splitlines())
+    assert event["metric"] == "decode_seconds"
+    assert event["labels"] == {"endpoint": "hrv"}
+    assert metrics.summary("decode_seconds", endpoint="hrv")[0] == 1
+
+
+def test_fetch(replay_server):
+    from fitbit import metrics
+
+    metrics.reset()
+    path = "/1/user/-/br/date/2023-03-05/all.json"
+    save_fixture(replay_server.directory, "GET", path, {"br": []})
+    api.br("token", datetime.datetime(2023, 3, 5))
+    api.br("token", datetime.datetime(2023, 3, 5))
+    cache.clear()
+    assert metrics.summary("request_seconds", endpoint="br", status="200")[0] == 1
+    assert metrics.counter("responses_total", endpoint="br", source="api") == 1
+    assert metrics.counter("responses_total", endpoint="br", source="cache") == 1
+    assert metrics.summary("build_seconds", endpoint="br")[0] == 2
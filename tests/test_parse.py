@@ -0,0 +1,103 @@
+import datetime
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from fitbit import api
+
+day = datetime.datetime(2023, 3, 5)
+key = "activities-calories-intraday"
+
+
+def _response(values, separators=(",", ":")):
+    res = {
+        "activities-calories": [{"dateTime": "2023-03-05", "value": "2000"}],
+        key: {
+            "dataset": [
+                {"time": f"{i // 3600:02d}:{i // 60 % 60:02d}:{i % 60:02d}", "value": v}
+                for i, v in enumerate(values)
+            ],
+            "datasetInterval": 1,
+        },
+    }
+    return res, json.dumps(res, separators=separators).encode()
+
+
+@pytest.mark.parametrize(
+    "values, separators, extracted",
+    [
+        ([0, 12, 345], (",", ":"), True),
+        ([-1.25, 0, 3.5, 0.78, 1234.5], (",", ":"), True),
+        # Exponents and other formatting are not extracted, but still parsed.
+        ([1e-07, 2.0], (",", ":"), False),
+        ([0, 12, 345], (", ", ": "), False),
+        ([], (",", ":"), False),
+    ],
+)
+def test_parse_intraday_content(values, separators, extracted):
+    res, content = _response(values, separators)
+    assert (api._extract_dataset(content, key) is not None) == extracted
+    df = api._parse_intraday_content(content, key, "cal", day)
+    expected = api._parse_intraday(res, key, "cal", day)
+    assert df.equals(expected)
+    assert df["cal"].dtype == expected["cal"].dtype
+
+
+def _parse_per_row(res, key, column_name, day):
+    # The original parser, which parses every sample separately.
+    def parse_time(x, ref):
+        h, m, s = map(int, x.split(":"))
+        return datetime.datetime(ref.year, ref.month, ref.day, h, m, s)
+
+    series = [(parse_time(x["time"], day), x["value"]) for x in res[key]["dataset"]]
+    return pd.DataFrame(series, columns=["date", column_name]).set_index("date")
+
+
+@pytest.mark.parametrize("day", [day, datetime.datetime(2024, 2, 29, 13, 45)])
+def test_parse_intraday_per_row(day):
+    res = {
+        key: {
+            "dataset": [
+                {"time": t, "value": v}
+                for t, v in [
+                    ("00:00:00", 1.5),
+                    ("00:00:59", 0),
+                    ("09:10:11", 3.25),
+                    ("12:00:00", 7),
+                    ("23:59:59", 2.5),
+                ]
+            ]
+        }
+    }
+    df = api._parse_intraday(res, key, "cal", day)
+    expected = _parse_per_row(res, key, "cal", day)
+    # The time of day of `day` is ignored.
+    assert df.index[-1] == datetime.datetime(day.year, day.month, day.day, 23, 59, 59)
+    assert list(df.index) == list(expected.index)
+    assert list(df["cal"]) == list(expected["cal"])
+
+
+def test_parse_clock():
+    times = ["00:00:00", "00:00:01", "01:02:03", "23:59:59"]
+    expected = [3600 * int(t[:2]) + 60 * int(t[3:5]) + int(t[6:]) for t in times]
+    assert list(api._parse_clock(times)) == expected
+    with pytest.raises(ValueError):
+        api._parse_clock(["0:00:00"])
+
+
+@pytest.mark.parametrize(
+    "values",
+    [
+        # Values with more digits than the mantissa of a float holds.
+        [0.12345678901234567, 1234567.8901234567, -9007199254740993.5],
+        [0.1, 0.30000000000000004, 0.00012345678901234568, 123456789.12345679],
+        [1, 12345678901234567, 0.5],
+    ],
+)
+def test_extract_dataset_exact(values):
+    _, content = _response(values)
+    seconds, extracted = api._extract_dataset(content, key)
+    expected = np.array([x["value"] for x in json.loads(content)[key]["dataset"]])
+    assert extracted.tolist() == expected.tolist()
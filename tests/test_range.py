@@ -0,0 +1,158 @@
+import datetime
+
+import pytest
+
+from fitbit import api
+from fitbit.replay import save_fixture
+
+day = datetime.datetime(2023, 3, 5)
+
+
+def _day(i):
+    return day + datetime.timedelta(days=i)
+
+
+def _date(i):
+    return _day(i).strftime("%Y-%m-%d")
+
+
+def test_windows():
+    assert api._windows(_day(0), _day(6), 3) == [
+        (_day(0), _day(2)),
+        (_day(3), _day(5)),
+        (_day(6), _day(6)),
+    ]
+    assert api._windows(_day(0), _day(5), 3) == [(_day(0), _day(2)), (_day(3), _day(5))]
+    # Only the days matter, not the times.
+    noon = day.replace(hour=12)
+    assert api._windows(noon, day, 3) == [(noon, day)]
+    with pytest.raises(ValueError):
+        api._windows(_day(1), noon, 3)
+
+
+def _hrv(i):
+    minute = f"{_date(i)}T01:00:00.000"
+    return {
+        "dateTime": _date(i),
+        "minutes": [{"minute": minute, "value": {"rmssd": i}}],
+    }
+
+
+def test_hrv_range(replay_server):
+    # Thirty-one days take two requests.
+    path = "/1/user/-/hrv/date/{}/{}/all.json"
+    save_fixture(
+        replay_server.directory,
+        "GET",
+        path.format(_date(0), _date(29)),
+        {"hrv": [_hrv(0), _hrv(29)]},
+    )
+    save_fixture(
+        replay_server.directory,
+        "GET",
+        path.format(_date(30), _date(30)),
+        {"hrv": [_hrv(30)]},
+    )
+    df = api.hrv_range("token", _day(0), _day(30))
+    assert list(df["hrv"]) == [0, 29, 30]
+    assert list(df.index) == [
+        _day(i) + datetime.timedelta(hours=1) for i in [0, 29, 30]
+    ]
+    assert [path for _, path in replay_server.requests] == [
+        path.format(_date(0), _date(29)),
+        path.format(_date(30), _date(30)),
+    ]
+
+
+def test_spo2_range(replay_server):
+    save_fixture(
+        replay_server.directory,
+        "GET",
+        f"/1/user/-/spo2/date/{_date(0)}/{_date(1)}/all.json",
+        [
+            {
+                "dateTime": _date(i),
+                "minutes": [{"minute": f"{_date(i)}T02:00:00", "value": 95 + i}],
+            }
+            for i in range(2)
+        ],
+    )
+    df = api.spo2_range("token", _day(0), _day(1))
+    assert list(df["spo2"]) == [95, 96]
+
+
+def test_br_range(replay_server):
+    keys = ["full", "deep", "rem", "light"]
+    save_fixture(
+        replay_server.directory,
+        "GET",
+        f"/1/user/-/br/date/{_date(0)}/{_date(1)}/all.json",
+        {
+            "br": [
+                {
+                    "dateTime": _date(i),
+                    "value": {
+                        f"{k}SleepSummary": {"breathingRate": 10 * i + j}
+                        for j, k in enumerate(keys)
+                    },
+                }
+                for i in range(2)
+            ]
+        },
+    )
+    df = api.br_range("token", _day(0), _day(1))
+    assert list(df.index) == [_day(0), _day(1)]
+    assert list(df.columns) == ["br_" + k for k in keys]
+    assert list(df.iloc[1]) == [10, 11, 12, 13]
+
+
+def _sleep(i, main=True):
+    start = f"{_date(i)}T01:00:00.000"
+    return {
+        "dateOfSleep": _date(i),
+        "isMainSleep": main,
+        "startTime": start,
+        "endTime": f"{_date(i)}T07:00:00.000",
+        "levels": {
+            "data": [{"dateTime": start, "level": "light", "seconds": 21600}],
+            "summary": {"light": {"minutes": 360}},
+        },
+    }
+
+
+def test_sleep_range(replay_server):
+    save_fixture(
+        replay_server.directory,
+        "GET",
+        f"/1.2/user/-/sleep/date/{_date(0)}/{_date(2)}.json",
+        # The second day only has a nap, so it is omitted.
+        {"sleep": [_sleep(0), _sleep(1, main=False), _sleep(2)]},
+    )
+    summary, series = api.sleep_range("token", _day(0), _day(2))
+    assert list(summary.index) == [_day(0), _day(2)]
+    assert list(summary["sleep_light_mins"]) == [360, 360]
+    assert list(summary["sleep_deep_mins"]) == [0, 0]
+    assert list(series["sleep_stage_dur_mins"]) == [360, 360]
+
+
+def test_sleep_since(replay_server):
+    from fitbit.util import timestamp
+
+    save_fixture(
+        replay_server.directory,
+        "GET",
+        f"/1.2/user/-/sleep/date/{_date(0)}.json",
+        {
+            "sleep": [_sleep(0)],
+            "summary": {"stages": {"deep": 0, "rem": 0, "light": 360, "wake": 0}},
+        },
+    )
+    api.sleep_summary("token", _day(0))
+    api.sleep_series("token", _day(0))
+    assert len(replay_server.requests) == 1
+    # Responses stored before `since` are fetched again.
+    since = timestamp()
+    summary = api.sleep_summary("token", _day(0), since=since)
+    api.sleep_series("token", _day(0), since=since)
+    assert len(replay_server.requests) == 2
+    assert list(summary["sleep_light_mins"]) == [360]
@@ -0,0 +1,133 @@
+import importlib
+import json
+import multiprocessing
+
+import pytest
+
+from fitbit.rate import RateLimiter
+
+# The package exports the global rate limiter under the name of the module.
+rate_module = importlib.import_module("fitbit.rate")
+
+
+@pytest.fixture()
+def clock(monkeypatch):
+    """Replace the clock of the rate limiter by a fake clock which only advances
+    when the rate limiter sleeps.
+
+    Yields:
+        list[float]: Current time, which can be changed by the test.
+    """
+    now = [1000.0]
+
+    def sleep(seconds):
+        now[0] += seconds
+
+    monkeypatch.setattr(rate_module, "timestamp", lambda: now[0])
+    monkeypatch.setattr(rate_module.time, "sleep", sleep)
+    return now
+
+
+@pytest.fixture()
+def limiter(tmp_path, clock):
+    return RateLimiter(capacity=10, period=100, path=str(tmp_path / "rate.json"))
+
+
+def _state(limiter):
+    with open(limiter.path) as f:
+        return json.load(f)
+
+
+def test_bucket(limiter, clock):
+    # The full quota can be used at once.
+    for _ in range(10):
+        assert limiter._acquire() == 0
+    assert limiter._acquire() == pytest.approx(10)
+    # The bucket refills at one request per ten seconds.
+    clock[0] += 25
+    assert limiter._acquire() == 0
+    assert limiter._acquire() == 0
+    assert limiter._acquire() == pytest.approx(5)
+    # The bucket holds at most its capacity.
+    clock[0] += 1000
+    assert limiter._acquire() == 0
+    assert _state(limiter)["tokens"] == pytest.approx(9)
+
+
+def test_enter(limiter, clock):
+    for _ in range(10):
+        with limiter:
+            pass
+    assert clock[0] == 1000
+    with limiter:
+        pass
+    # Waited for one token and a margin.
+    assert clock[0] == pytest.approx(1010.01)
+
+
+def test_update(limiter, clock):
+    limiter.update(
+        {"Fitbit-Rate-Limit-Remaining": "2", "Fitbit-Rate-Limit-Reset": "300"}
+    )
+    # The API reporting more than is left does not add tokens.
+    limiter.update({"Fitbit-Rate-Limit-Remaining": "20"})
+    assert _state(limiter) == {
+        "tokens": 2,
+        "last_timestamp_utc": 1000,
+        "reset_timestamp_utc": 1300,
+    }
+    assert limiter._acquire() == 0
+    assert limiter._acquire() == 0
+    # Until the reset, the bucket does not refill.
+    clock[0] += 100
+    assert limiter._acquire() == pytest.approx(200)
+    # A response to a request made before the last tokens were taken does not give
+    # them back.
+    limiter.update({"Fitbit-Rate-Limit-Remaining": "1"})
+    assert limiter._acquire() == pytest.approx(200)
+    # After the reset, the full quota is available.
+    clock[0] += 200
+    for _ in range(10):
+        assert limiter._acquire() == 0
+    assert _state(limiter)["reset_timestamp_utc"] is None
+
+
+def test_backoff(limiter, clock):
+    limiter.backoff(60)
+    assert limiter._acquire() == pytest.approx(60)
+    with limiter:
+        pass
+    assert clock[0] == pytest.approx(1060.01)
+    assert _state(limiter)["tokens"] == 9
+
+
+def test_corrupted(limiter):
+    with open(limiter.path, "w") as f:
+        f.write("{")
+    assert limiter._acquire() == 0
+    assert _state(limiter)["tokens"] == 9
+
+
+def _take(path):
+    # Runs in a separate process, so uses the real clock.
+    limiter = RateLimiter(capacity=20, period=1e9, path=path)
+    return sum(limiter._acquire() == 0 for _ in range(20))
+
+
+def test_processes(tmp_path):
+    path = str(tmp_path / "rate.json")
+    with multiprocessing.get_context("spawn").Pool(4) as pool:
+        granted = pool.map(_take, [path] * 8)
+    # The processes share one quota.
+    assert sum(granted) == 20
+
+
+def test_retry_after(limiter, clock):
+    assert rate_module._retry_after({"Retry-After": "30"}) == 30
+    assert rate_module._retry_after({"Fitbit-Rate-Limit-Reset": "120"}) == 120
+    assert rate_module._retry_after({}) == 60
+    # Without `Retry-After`, back off until the reset which the API reported.
+    headers = {"Fitbit-Rate-Limit-Remaining": "0", "Fitbit-Rate-Limit-Reset": "600"}
+    limiter.update(headers)
+    limiter.backoff(rate_module._retry_after(headers))
+    assert _state(limiter)["reset_timestamp_utc"] == 1600
@@ -0,0 +1,73 @@
+import datetime
+import gzip
+import hashlib
+import importlib
+
+from fitbit.raw import RawStore
+
+# The package exports the global store under the name of the module.
+raw_module = importlib.import_module("fitbit.raw")
+
+day = datetime.datetime(2023, 3, 5)
+path = "/1/user/-/activities/steps/date/2023-03-05/1d/1min.json"
+
+
+def _at(monkeypatch, time):
+    utc = time.replace(tzinfo=datetime.timezone.utc)
+    monkeypatch.setattr(raw_module, "timestamp", lambda: utc.timestamp())
+    return utc.timestamp()
+
+
+def test_immutable(tmp_path, monkeypatch):
+    store = RawStore(tmp_path, immutable_after=3)
+    try:
+        # Data fetched less than three full days after the day may be incomplete.
+        _at(monkeypatch, datetime.datetime(2023, 3, 8, 23))
+        store.put(path, day, b"partial")
+        assert store.get(path) is None
+        assert store.load(path) == b"partial"
+
+        _at(monkeypatch, datetime.datetime(2023, 3, 9))
+        store.put(path, day, b"final")
+        assert store.get(path) == b"final"
+        assert store.paths() == [path]
+    finally:
+        store.close()
+
+
+def test_since(tmp_path, monkeypatch):
+    store = RawStore(tmp_path)
+    try:
+        fetched = _at(monkeypatch, datetime.datetime(2023, 3, 5, 12))
+        store.put(path, day, b"content")
+        # Responses fetched since are returned even though they are not final.
+        assert store.get(path, since=fetched) == b"content"
+        assert store.get(path, since=fetched + 1) is None
+        assert store.get("/other.json", since=fetched) is None
+    finally:
+        store.close()
+
+
+def test_objects(tmp_path):
+    store = RawStore(tmp_path)
+    try:
+        store.put(path, day, b"content")
+        store.put(path.replace("steps", "calories"), day, b"content")
+        # Identical responses are stored once, named after the hash of the content.
+        (obj,) = (tmp_path / "objects").glob("*/*.json.gz")
+        digest = hashlib.sha256(b"content").hexdigest()
+        assert obj.name == digest + ".json.gz"
+        assert obj.parent.name == digest[:2]
+        with gzip.open(obj, "rb") as f:
+            assert f.read() == b"content"
+        assert not list(tmp_path.glob("objects/*/*.tmp"))
+    finally:
+        store.close()
+
+    # The store persists across runs.
+    store = RawStore(tmp_path)
+    try:
+        assert store.load(path) == b"content"
+    finally:
+        store.close()
+    assert RawStore().get(path) is None
@@ -0,0 +1,30 @@
+import datetime
+
+from fitbit import api, transport
+from fitbit.replay import record, save_fixture
+
+day = datetime.datetime(2023, 3, 5)
+path = "/1/user/-/activities/steps/date/2023-03-05/1d/1min.json"
+
+
+def test_replay(steps_server):
+    df = api.steps("token", day)
+    assert list(df["steps"]) == [0, 12]
+    assert steps_server.requests == [("GET", path)]
+
+
+def test_record(steps_server, tmp_path):
+    save_fixture(
+        steps_server.directory,
+        "POST",
+        "/oauth2/token",
+        {"access_token": "secret", "refresh_token": "secret"},
+    )
+    with record(tmp_path / "recorded"):
+        api.steps("token", day)
+        transport.post("/oauth2/token", data={"grant_type": "refresh_token"})
+    # Responses with tokens are not recorded.
+    (recorded,) = (tmp_path / "recorded").iterdir()
+    (expected,) = steps_server.directory.glob("GET_*")
+    assert recorded.name == expected.name
+    assert recorded.read_text() == expected.read_text()
@@ -0,0 +1,118 @@
+import datetime
+import threading
+import time
+
+import pytest
+import requests
+
+from fitbit.scheduler import Job, Scheduler
+
+day = datetime.datetime(2023, 3, 5)
+
+
+def _http_error(status):
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(response=response)
+
+
+class _Fetch:
+    """Stub which fails for the first attempts at every job and records the
+    calls."""
+
+    def __init__(self, failures=None):
+        self.failures = dict(failures or {})
+        self.calls = []
+
+    def __call__(self, call, day, end=None):
+        self.calls.append((call, day))
+        errors = self.failures.get((call, day), [])
+        if errors:
+            raise errors.pop(0)
+        return call, day
+
+
+def test_priority():
+    fetch = _Fetch()
+    jobs = [
+        Job("hr", day),
+        Job("steps", day - datetime.timedelta(days=1)),
+        Job("steps", day),
+        Job("hrv", day - datetime.timedelta(days=2), day - datetime.timedelta(days=1)),
+    ]
+    results = Scheduler(workers=1, progress=None).run(jobs, fetch)
+    # Newer days come first and, for the same day, cheaper calls come first. A range
+    # is ordered by its last day.
+    assert fetch.calls == [
+        ("steps", day),
+        ("hr", day),
+        ("steps", day - datetime.timedelta(days=1)),
+        ("hrv", day - datetime.timedelta(days=2)),
+    ]
+    assert results[jobs[0]] == ("hr", day)
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        requests.ConnectionError(),
+        requests.Timeout(),
+        _http_error(503),
+    ],
+)
+def test_retry(error):
+    fetch = _Fetch({("steps", day): [error, error]})
+    job = Job("steps", day)
+    results = Scheduler(backoff=0, progress=None).run([job], fetch)
+    assert results == {job: ("steps", day)}
+    assert job.attempts == 3
+
+
+def test_give_up():
+    error = requests.ConnectionError()
+    fetch = _Fetch({("steps", day): [error] * 5})
+    job = Job("steps", day)
+    done = []
+    scheduler = Scheduler(
+        max_retries=3, backoff=0, progress=lambda *args: done.append(args)
+    )
+    results = scheduler.run([job, Job("hr", day)], fetch)
+    assert results[job] is error
+    assert job.attempts == 4
+    assert len(done) == 2
+
+
+@pytest.mark.parametrize("error", [_http_error(404), ValueError()])
+def test_no_retry(error):
+    fetch = _Fetch({("steps", day): [error]})
+    job = Job("steps", day)
+    results = Scheduler(backoff=0, progress=None).run([job], fetch)
+    assert results[job] is error
+    assert job.attempts == 1
+
+
+def test_backoff():
+    fetch = _Fetch({("steps", day): [requests.Timeout(), requests.Timeout()]})
+    start = time.monotonic()
+    Scheduler(workers=1, backoff=0.05, progress=None).run([Job("steps", day)], fetch)
+    # The delays double: 0.05 and 0.1 seconds.
+    assert time.monotonic() - start >= 0.15
+
+
+class _Interrupt(BaseException):
+    pass
+
+
+@pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+def test_interrupt():
+    fetch = _Fetch({("hr", day): [_Interrupt()]})
+    jobs = [Job("hr", day), Job("steps", day)]
+    done = {}
+    thread = threading.Thread(
+        target=lambda: done.update(Scheduler(progress=None).run(jobs, fetch))
+    )
+    thread.start()
+    # The job which was interrupted ends its worker, but does not block the others.
+    thread.join(5)
+    assert not thread.is_alive()
+    assert done == {jobs[1]: ("steps", day)}
@@ -0,0 +1,98 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from fitbit.api import _intraday
+from fitbit.store import Store
+
+pytest.importorskip("pyarrow")
+
+days = [datetime.datetime(2023, 3, 30) + datetime.timedelta(days=i) for i in range(4)]
+
+
+@pytest.fixture()
+def store(tmp_path):
+    store = Store(tmp_path / "store")
+    rng = np.random.default_rng(0)
+    for d in days:
+        seconds = np.sort(rng.choice(86400, 20000, replace=False))
+        values = rng.integers(50, 180, len(seconds))
+        store.write("hr", d, _intraday(seconds, values, "hr", d, False))
+    return store
+
+
+def _resample(store, start, end, resample, how):
+    # Resample the data directly, without the rollups.
+    df = pd.concat([store.read_day("hr", d) for d in days]).sort_index()
+    df = df[(df.index >= start) & (df.index < end)]
+    return df.resample(resample).agg(how)
+
+
+@pytest.mark.parametrize("resample", ["1h", "3h", "1D", "1W", "MS", "90min"])
+def test_load_resample(store, resample):
+    start, end = days[1], days[3]
+    for how in ["count", "min", "max", "mean", "sum"]:
+        pd.testing.assert_frame_equal(
+            store.load("hr", start, end, resample=resample, how=how),
+            _resample(store, start, end, resample, how),
+            check_dtype=False,
+            check_freq=False,
+        )
+
+
+def test_load_rollup(store):
+    df = store.load("hr", rollup="1D")
+    assert list(df.columns) == ["count", "min", "max", "mean", "sum"]
+    assert list(df.index) == days
+    assert (df["count"] == 20000).all()
+    day = store.read_day("hr", days[0])["hr"]
+    assert df["max"].iloc[0] == day.max()
+    assert df["mean"].iloc[0] == pytest.approx(day.mean())
+
+    # Rewriting a day replaces its rollups.
+    store.write("hr", days[0], store.read_day("hr", days[0]).iloc[:10])
+    assert store.load("hr", rollup="1D")["count"].iloc[0] == 10
+    hourly = store.load("hr", days[0], days[1], rollup="1h")
+    assert hourly["count"].sum() == 10
+
+    with pytest.raises(ValueError):
+        store.load("hr", rollup="2h")
+
+
+def test_rebuild_rollups(store):
+    # Write a day without rollups, like a store written before rollups existed.
+    day = days[-1] + datetime.timedelta(days=1)
+    df = store.read_day("hr", days[0]) + 1
+    df.index = df.index + datetime.timedelta(days=len(days))
+    store._write_table(store._file("hr", day), df)
+
+    start, end = days[0], day + datetime.timedelta(days=1)
+    assert not store._has_rollups("hr", "1h", pd.Timestamp(start), pd.Timestamp(end))
+    # The resampling falls back to the data.
+    assert store.load("hr", start, end, resample="1D").iloc[-1, 0] == pytest.approx(
+        df["hr"].mean()
+    )
+
+    store.rebuild_rollups("hr")
+    assert store._has_rollups("hr", "1h", pd.Timestamp(start), pd.Timestamp(end))
+    assert store.load("hr", rollup="1D")["mean"].iloc[-1] == pytest.approx(
+        df["hr"].mean()
+    )
+
+
+def test_load_types(tmp_path):
+    store = Store(tmp_path / "store")
+    # The values of the first day are exact in `float32`, but those of the second
+    # day are not.
+    for d, values in [(days[0], [0.5, 1.5]), (days[1], [1.1, 0.1])]:
+        store.write(
+            "cal", d, _intraday(np.array([0, 60]), np.array(values), "cal", d, False)
+        )
+    assert store.read_day("cal", days[0])["cal"].dtype == np.float32
+    df = store.load("cal")
+    assert df["cal"].dtype == np.float64
+    assert list(df["cal"]) == [0.5, 1.5, 1.1, 0.1]
+    rollup = store.load("cal", rollup="1min")
+    assert list(rollup["max"]) == [0.5, 1.5, 1.1, 0.1]
@@ -0,0 +1,105 @@
+import datetime
+import json
+
+import pytest
+import requests
+
+from fitbit import store
+from fitbit.replay import save_fixture
+from fitbit.subscriptions import Notifications, Receiver, _signature, sync
+
+day = datetime.datetime(2023, 3, 5)
+
+
+def _notify(url, entries, client_secret):
+    # Stand-in for the notifier of the Subscriptions API.
+    body = json.dumps(entries).encode()
+    return requests.post(
+        url,
+        data=body,
+        headers={
+            "Content-Type": "application/json",
+            "X-Fitbit-Signature": _signature(body, client_secret),
+        },
+    )
+
+
+def _notification(collection, date, owner_id="ABC"):
+    return {
+        "collectionType": collection,
+        "date": date,
+        "ownerId": owner_id,
+        "ownerType": "user",
+        "subscriptionId": owner_id,
+    }
+
+
+def test_receiver(tmp_path):
+    queue = Notifications(tmp_path / "notifications.sqlite")
+    with Receiver("code", queue, client_secret="secret") as receiver:
+        assert requests.get(receiver.url + "/?verify=code").status_code == 204
+        assert requests.get(receiver.url + "/?verify=wrong").status_code == 404
+
+        entries = [_notification("sleep", "2023-03-05")]
+        assert _notify(receiver.url, entries, "secret").status_code == 204
+        # Repeated notifications are merged.
+        assert _notify(receiver.url, entries, "secret").status_code == 204
+        # Notifications with an invalid signature are rejected.
+        entries = [_notification("sleep", "2023-03-06")]
+        assert _notify(receiver.url, entries, "wrong").status_code == 404
+
+    (notification,) = queue.pending()
+    assert notification[:3] == ("sleep", day, "ABC")
+
+
+def test_sync(tmp_path, replay_server):
+    pytest.importorskip("pyarrow")
+    hrv = {
+        "hrv": [
+            {
+                "dateTime": "2023-03-05",
+                "minutes": [
+                    {"minute": "2023-03-05T01:00:00.000", "value": {"rmssd": 40.0}}
+                ],
+            }
+        ]
+    }
+    for path, res in [
+        ("/1.2/user/-/sleep/date/2023-03-05/2023-03-05.json", {"sleep": []}),
+        ("/1/user/-/hrv/date/2023-03-05/2023-03-05/all.json", hrv),
+        ("/1/user/-/spo2/date/2023-03-05/2023-03-05/all.json", []),
+        ("/1/user/-/br/date/2023-03-05/2023-03-05/all.json", {"br": []}),
+    ]:
+        save_fixture(replay_server.directory, "GET", path, res)
+
+    store.open(tmp_path / "store")
+    queue = Notifications(tmp_path / "notifications.sqlite")
+    try:
+        with Receiver("code", queue, client_secret="secret") as receiver:
+            entries = [
+                _notification("sleep", "2023-03-05"),
+                _notification("activities", "2023-03-05", owner_id="XYZ"),
+            ]
+            _notify(receiver.url, entries, "secret")
+
+            handled = sync({"ABC": "token"}, queue)
+            # Only the calls of the notified collection are fetched, once.
+            assert sorted(path for _, path in replay_server.requests) == [
+                "/1.2/user/-/sleep/date/2023-03-05/2023-03-05.json",
+                "/1/user/-/br/date/2023-03-05/2023-03-05/all.json",
+                "/1/user/-/hrv/date/2023-03-05/2023-03-05/all.json",
+                "/1/user/-/spo2/date/2023-03-05/2023-03-05/all.json",
+            ]
+            assert [n[:3] for n in handled] == [("sleep", day, "ABC")]
+            assert list(store.read_day("hrv", day)["hrv"]) == [40.0]
+
+            # A new notification fetches the data again, even though the responses
+            # are cached.
+            _notify(receiver.url, entries[:1], "secret")
+            sync({"ABC": "token"}, queue)
+            assert len(replay_server.requests) == 8
+
+        # The notification of the unknown user is kept.
+        assert [n[:3] for n in queue.pending()] == [("activities", day, "XYZ")]
+    finally:
+        store.close()
@@ -0,0 +1,56 @@
+import socket
+
+import pytest
+import requests
+
+from fitbit.replay import ReplayServer, save_fixture
+from fitbit.transport import Transport
+
+
+class _Session:
+    def __init__(self):
+        self.calls = []
+
+    def request(self, method, url, **kw_args):
+        self.calls.append((method, url, kw_args))
+        return "response"
+
+
+def test_base_url_and_headers(tmp_path):
+    save_fixture(tmp_path, "GET", "/1/user/-/profile.json", {"user": {}})
+    transport = Transport(timeout=5)
+    with ReplayServer(tmp_path) as server:
+        transport.base_url = server.url
+        res = transport.get("/1/user/-/profile.json")
+        transport.post("/oauth2/token", data={"a": "b"})
+        # Connections are kept alive and reused by the same session.
+        assert transport.get("/1/user/-/profile.json").json() == {"user": {}}
+    transport.close()
+    assert res.status_code == 200
+    assert res.request.headers["Accept-Encoding"] == "gzip, deflate"
+    assert server.requests == [
+        ("GET", "/1/user/-/profile.json"),
+        ("POST", "/oauth2/token"),
+        ("GET", "/1/user/-/profile.json"),
+    ]
+
+
+def test_session_and_timeout():
+    session = _Session()
+    transport = Transport(base_url="http://api", session=session)
+    assert transport.get("/a") == "response"
+    transport.post("/b", timeout=1, data={})
+    assert session.calls == [
+        ("GET", "http://api/a", {"timeout": (10, 60)}),
+        ("POST", "http://api/b", {"timeout": 1, "data": {}}),
+    ]
+
+
+def test_timeout():
+    # A server which accepts connections, but never responds.
+    with socket.socket() as sock:
+        sock.bind(("localhost", 0))
+        sock.listen()
+        transport = Transport(f"http://localhost:{sock.getsockname()[1]}", timeout=0.2)
+        with pytest.raises(requests.Timeout):
+            transport.get("/")
@@ -0,0 +1,116 @@
+import importlib
+import json
+import threading
+
+import pytest
+import toml
+
+from fitbit.config import config
+from fitbit.rate import rate_limiter
+from fitbit.replay import save_fixture
+from fitbit.util import timestamp
+
+auth = importlib.import_module("fitbit.auth")
+users = importlib.import_module("fitbit.users")
+
+
+@pytest.fixture()
+def credentials(tmp_path, monkeypatch):
+    """Use a configuration with an app and the user in the section `session`.
+
+    Yields:
+        str: Path of the configuration.
+    """
+    path = tmp_path / "config.toml"
+    with open(path, "w") as f:
+        toml.dump(
+            {
+                "app": {"client_id": "ID", "client_secret": "secret"},
+                "session": {
+                    "user_id": "ABC",
+                    "token": "token_ABC",
+                    "token_expiry_timestamp_utc": timestamp() + 3600,
+                    "refresh_token": "refresh_ABC",
+                },
+            },
+            f,
+        )
+    monkeypatch.setattr(config, "_path", str(path))
+    monkeypatch.setattr(config, "_data", None)
+    monkeypatch.setattr(users, "_users", {"session": users.User()})
+    yield path
+    config.flush()
+
+
+def _token(user_id):
+    return {
+        "user_id": user_id,
+        "access_token": f"token_{user_id}",
+        "expires_in": 28800,
+        "refresh_token": f"refresh_{user_id}",
+    }
+
+
+def test_enroll(credentials, monkeypatch):
+    def full_authentication(section):
+        # Stand-in for authenticating in the browser.
+        return auth._store_token(_token("XYZ"), section)
+
+    monkeypatch.setattr(auth, "_full_authentication", full_authentication)
+    user = users.enroll()
+    assert user.id == "XYZ"
+    assert user.token == "token_XYZ"
+    assert user is users.get_user("XYZ")
+    # The new user has a quota of their own.
+    assert user.rate_limiter is not rate_limiter
+    assert user.rate_limiter.path == str(credentials.parent / "rate_limit_XYZ.json")
+    assert toml.load(credentials)["user_XYZ"]["refresh_token"] == "refresh_XYZ"
+
+    assert [u.id for u in users.enrolled_users()] == ["ABC", "XYZ"]
+    with pytest.raises(KeyError):
+        users.get_user("unknown")
+
+
+def test_refresh(credentials, replay_server):
+    save_fixture(replay_server.directory, "POST", "/oauth2/token", _token("XYZ"))
+    config["user_XYZ", "user_id"] = "XYZ"
+    config["user_XYZ", "token"] = "expired"
+    config["user_XYZ", "token_expiry_timestamp_utc"] = timestamp() - 1
+    config["user_XYZ", "refresh_token"] = "refresh_XYZ"
+
+    user = users.get_user("XYZ")
+    assert user.token == "token_XYZ"
+    assert user.expires_in > 28000
+    assert user.refresh() == "token_XYZ"
+    assert list(replay_server.requests) == [("POST", "/oauth2/token")] * 2
+    # The requests went through the rate limiter of the user.
+    with open(user.rate_limiter.path) as f:
+        assert json.load(f)["tokens"] < user.rate_limiter.capacity
+    assert not (credentials.parent / "rate_limit.json").exists()
+
+
+class _User:
+    def __init__(self, expires_in, fail=False):
+        self.expires_in = expires_in
+        self.fail = fail
+        self.refreshed = threading.Event()
+
+    def refresh(self):
+        self.refreshed.set()
+        if self.fail:
+            raise RuntimeError("Refresh token is invalid.")
+
+
+def test_token_refresher():
+    failing, expiring, valid = _User(60, fail=True), _User(300), _User(3600)
+    refresher = users.TokenRefresher(lambda: [failing, expiring, valid], margin=600)
+    refresher.refresh()
+    # A failed refresh does not stop the other refreshes.
+    assert failing.refreshed.is_set()
+    assert expiring.refreshed.is_set()
+    assert not valid.refreshed.is_set()
+
+    late = _User(3600)
+    with users.TokenRefresher(lambda: [late], margin=600, interval=0.01):
+        late.expires_in = 60
+        assert late.refreshed.wait(5)